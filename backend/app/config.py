@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -9,3 +10,131 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY", "")
 WYNONA_HOST = os.getenv("WYNONA_HOST", "")
 WYNONA_WOL_MAC = os.getenv("WYNONA_WOL_MAC", "")
+
+# Shared HTTP client pool (Supabase REST/Storage + engine APIs)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# API responses at least this large are compressed (zstd, brotli or gzip,
+# whichever the client accepts)
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+
+# Audio uploads
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(2 * 1024 * 1024 * 1024)))
+# Resumable upload staging; on the data volume so uploads resume across restarts
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR", "data/uploads")
+UPLOAD_RESUMABLE_TTL_HOURS = float(os.getenv("UPLOAD_RESUMABLE_TTL_HOURS", "24"))
+# Downloaded audio stays in memory up to this size, then spills to a temp file
+AUDIO_SPOOL_MAX_MEMORY = int(os.getenv("AUDIO_SPOOL_MAX_MEMORY", str(1024 * 1024)))
+
+# Long-recording chunking (requires ffmpeg/ffprobe on PATH)
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+CHUNK_MAX_SECONDS = float(os.getenv("CHUNK_MAX_SECONDS", "600"))
+CHUNK_MIN_SECONDS = float(os.getenv("CHUNK_MIN_SECONDS", "120"))
+CHUNK_OVERLAP_SECONDS = float(os.getenv("CHUNK_OVERLAP_SECONDS", "1.5"))
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", "4"))
+CHUNK_MAX_ATTEMPTS = int(os.getenv("CHUNK_MAX_ATTEMPTS", "3"))
+SILENCE_NOISE_DB = float(os.getenv("SILENCE_NOISE_DB", "-35"))
+SILENCE_MIN_SECONDS = float(os.getenv("SILENCE_MIN_SECONDS", "0.4"))
+
+# Audio normalisation before engine submission: 16 kHz mono Opus, cached
+# per session. Stereo (multi-source) recordings are downmixed, or split
+# into mic (left) and system (right) tracks with AUDIO_STEREO_MODE=split.
+AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", "16000"))
+AUDIO_BITRATE = os.getenv("AUDIO_BITRATE", "24k")
+AUDIO_NORMALIZED_DIR = os.getenv("AUDIO_NORMALIZED_DIR", "data/normalized")
+AUDIO_NORMALIZED_TTL_HOURS = float(os.getenv("AUDIO_NORMALIZED_TTL_HOURS", "24"))
+AUDIO_STEREO_MODE = os.getenv("AUDIO_STEREO_MODE", "downmix")
+
+# Durable transcription job queue (SQLite, WAL mode)
+QUEUE_DB_PATH = os.getenv("QUEUE_DB_PATH", "data/queue.sqlite3")
+QUEUE_CONCURRENCY = int(os.getenv("QUEUE_CONCURRENCY", "4"))
+QUEUE_LEASE_SECONDS = float(os.getenv("QUEUE_LEASE_SECONDS", "120"))
+QUEUE_POLL_SECONDS = float(os.getenv("QUEUE_POLL_SECONDS", "2"))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "5"))
+QUEUE_RETRY_BASE_SECONDS = float(os.getenv("QUEUE_RETRY_BASE_SECONDS", "10"))
+QUEUE_RETRY_MAX_SECONDS = float(os.getenv("QUEUE_RETRY_MAX_SECONDS", "600"))
+QUEUE_RETENTION_DAYS = float(os.getenv("QUEUE_RETENTION_DAYS", "7"))
+# How long a job may stay parked on an unavailable engine before each
+# further try counts as a failed attempt
+QUEUE_MAX_PARK_SECONDS = float(os.getenv("QUEUE_MAX_PARK_SECONDS", "1800"))
+
+# Per-engine limits: concurrent jobs, requests/min and audio seconds/min
+# (null = unlimited). Override with a JSON object in ENGINE_LIMITS_JSON.
+ENGINE_LIMITS = {
+    "groq-turbo": {"concurrency": 3, "requests_per_minute": 20, "audio_seconds_per_minute": 3600},
+    "groq-large": {"concurrency": 3, "requests_per_minute": 20, "audio_seconds_per_minute": 3600},
+    "deepgram": {"concurrency": 10, "requests_per_minute": 60, "audio_seconds_per_minute": None},
+    "wynona": {"concurrency": 1, "requests_per_minute": None, "audio_seconds_per_minute": None},
+}
+ENGINE_LIMITS.update(json.loads(os.getenv("ENGINE_LIMITS_JSON", "{}")))
+
+# Local transcript cache keyed by audio content hash + engine/model/language
+TRANSCRIPT_CACHE_PATH = os.getenv("TRANSCRIPT_CACHE_PATH", "data/transcript_cache.sqlite3")
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Local full-text index over titles, transcripts, notes and tag names
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "data/search_index.sqlite3")
+
+# In-process tag hierarchy cache; reloaded after this long so edits made by
+# other workers show up
+TAG_TREE_TTL_SECONDS = float(os.getenv("TAG_TREE_TTL_SECONDS", "300"))
+
+# Background engine health probing; cached results older than the TTL are
+# served while a refresh runs. ENGINE_PROBE_WINDOW probes feed the rolling
+# latency and availability stats.
+ENGINE_PROBE_INTERVAL_SECONDS = float(os.getenv("ENGINE_PROBE_INTERVAL_SECONDS", "30"))
+ENGINE_PROBE_TIMEOUT = float(os.getenv("ENGINE_PROBE_TIMEOUT", "5"))
+ENGINE_PROBE_WINDOW = int(os.getenv("ENGINE_PROBE_WINDOW", "20"))
+ENGINE_HEALTH_TTL_SECONDS = float(os.getenv("ENGINE_HEALTH_TTL_SECONDS", "60"))
+
+# "auto" engine routing: processing seconds per audio second for each
+# engine, and the longest estimated wait before the router pays for a
+# faster engine
+ENGINE_SPEED_FACTORS = {
+    "wynona": 0.15,
+    "groq-turbo": 0.02,
+    "groq-large": 0.05,
+    "deepgram": 0.03,
+}
+ENGINE_SPEED_FACTORS.update(json.loads(os.getenv("ENGINE_SPEED_FACTORS_JSON", "{}")))
+AUTO_MAX_WAIT_SECONDS = float(os.getenv("AUTO_MAX_WAIT_SECONDS", "900"))
+
+# WYNONA wake-on-LAN: magic packet target, backlog (queued audio seconds
+# that could run for free on WYNONA) that triggers a predictive wake, and
+# how long a boot may take before parked jobs fall back to Groq
+WYNONA_WOL_BROADCAST = os.getenv("WYNONA_WOL_BROADCAST", "255.255.255.255")
+WYNONA_WOL_PORT = int(os.getenv("WYNONA_WOL_PORT", "9"))
+WYNONA_WAKE_BACKLOG_SECONDS = float(os.getenv("WYNONA_WAKE_BACKLOG_SECONDS", "1800"))
+WYNONA_WAKE_CHECK_SECONDS = float(os.getenv("WYNONA_WAKE_CHECK_SECONDS", "10"))
+WYNONA_BOOT_DEADLINE_SECONDS = float(os.getenv("WYNONA_BOOT_DEADLINE_SECONDS", "300"))
+WYNONA_WAKE_COOLDOWN_SECONDS = float(os.getenv("WYNONA_WAKE_COOLDOWN_SECONDS", "900"))
+WYNONA_PARK_RETRY_SECONDS = float(os.getenv("WYNONA_PARK_RETRY_SECONDS", "15"))
+
+# WYNONA whisperx-stream container (WebSocket /ws/transcribe)
+WYNONA_PORT = int(os.getenv("WYNONA_PORT", "8765"))
+WYNONA_DIARIZE = os.getenv("WYNONA_DIARIZE", "true").lower() in ("1", "true", "yes")
+WYNONA_STREAM_CHUNK_SIZE = int(os.getenv("WYNONA_STREAM_CHUNK_SIZE", str(64 * 1024)))
+WYNONA_OPEN_TIMEOUT = float(os.getenv("WYNONA_OPEN_TIMEOUT", "10"))
+
+# Deepgram pre-recorded (/v1/listen over HTTPS) and streaming (same path
+# over WSS) endpoints; overridable to point tests at a local mock
+DEEPGRAM_MODEL = os.getenv("DEEPGRAM_MODEL", "nova-3")
+DEEPGRAM_API_URL = os.getenv("DEEPGRAM_API_URL", "https://api.deepgram.com/v1/listen")
+DEEPGRAM_WS_URL = os.getenv("DEEPGRAM_WS_URL", "wss://api.deepgram.com/v1/listen")
+
+# Live transcription (/ws/live): "deepgram" streams natively; Groq engines
+# use decoded audio kept in a ring buffer, the longest window sent per
+# pass, seconds of new audio between passes, and how far the engine may
+# fall behind before reads from the client pause
+LIVE_ENGINE = os.getenv("LIVE_ENGINE", "groq-turbo")
+LIVE_BUFFER_SECONDS = float(os.getenv("LIVE_BUFFER_SECONDS", "60"))
+LIVE_WINDOW_MAX_SECONDS = float(os.getenv("LIVE_WINDOW_MAX_SECONDS", "30"))
+LIVE_STEP_SECONDS = float(os.getenv("LIVE_STEP_SECONDS", "3"))
+LIVE_MAX_LAG_SECONDS = float(os.getenv("LIVE_MAX_LAG_SECONDS", "10"))
@@ -0,0 +1,31 @@
+from app.db.client import (
+    Database,
+    database,
+    get_db,
+    HEADERS,
+    STORAGE_HEADERS,
+    BASE_URL,
+    STORAGE_URL,
+    features,
+    is_foreign_key_violation,
+    is_invalid_input,
+    is_missing_column,
+    is_missing_function,
+    is_missing_relationship,
+)
+
+__all__ = [
+    "Database",
+    "database",
+    "get_db",
+    "HEADERS",
+    "STORAGE_HEADERS",
+    "BASE_URL",
+    "STORAGE_URL",
+    "features",
+    "is_foreign_key_violation",
+    "is_invalid_input",
+    "is_missing_column",
+    "is_missing_function",
+    "is_missing_relationship",
+]
@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import httpx
+from typing import Optional
+from app.config import (
+    SUPABASE_URL,
+    SUPABASE_SERVICE_KEY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP2_ENABLED,
+)
+
+# Supabase REST API configuration
+HEADERS = {
+    "apikey": SUPABASE_SERVICE_KEY,
+    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "return=representation",
+    "Accept-Profile": "app_nomad",
+    "Content-Profile": "app_nomad",
+}
+
+STORAGE_HEADERS = {
+    "apikey": SUPABASE_SERVICE_KEY,
+    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+}
+
+BASE_URL = f"{SUPABASE_URL}/rest/v1"
+STORAGE_URL = f"{SUPABASE_URL}/storage/v1"
+
+logger = logging.getLogger(__name__)
+
+
+def postgrest_code(response: httpx.Response) -> Optional[str]:
+    """The PostgREST/Postgres error code of a failed response, if any."""
+    if response.status_code < 400:
+        return None
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    return body.get("code") if isinstance(body, dict) else None
+
+
+def is_missing_column(response: httpx.Response) -> bool:
+    """A select named a column or computed field that does not exist (42703)."""
+    return response.status_code == 400 and postgrest_code(response) == "42703"
+
+
+def is_missing_relationship(response: httpx.Response) -> bool:
+    """A select embedded a relationship PostgREST cannot resolve (PGRST200/201)."""
+    return response.status_code == 400 and postgrest_code(response) in ("PGRST200", "PGRST201")
+
+
+def is_missing_function(response: httpx.Response) -> bool:
+    """An /rpc call named a function that is not installed (PGRST202)."""
+    return response.status_code == 404 and postgrest_code(response) == "PGRST202"
+
+
+def is_invalid_input(response: httpx.Response) -> bool:
+    """A filter or argument had the wrong syntax for its type, e.g. a malformed uuid (22P02)."""
+    return response.status_code == 400 and postgrest_code(response) == "22P02"
+
+
+def is_foreign_key_violation(response: httpx.Response) -> bool:
+    """Whether a PostgREST write failed on a foreign key (e.g. an unknown session_id)."""
+    return response.status_code == 409 and postgrest_code(response) == "23503"
+
+
+class UpstreamFeatures:
+    """
+    Optional upstream SQL features (sql/*.sql: computed fields, RPCs,
+    embeddable relationships), probed by use.
+
+    Every feature is assumed installed until a request shows otherwise;
+    callers then mark it missing and take their fallback path for the rest
+    of the process instead of failing on every request.
+    """
+
+    def __init__(self):
+        self._missing: set[str] = set()
+
+    def available(self, name: str) -> bool:
+        return name not in self._missing
+
+    def mark_missing(self, name: str) -> None:
+        if name not in self._missing:
+            logger.warning("Upstream feature %s is not installed; using its fallback", name)
+            self._missing.add(name)
+
+    def reset(self) -> None:
+        self._missing.clear()
+
+
+features = UpstreamFeatures()
+
+
+class _CountedStream(httpx.AsyncByteStream):
+    """Response body that reports when it is closed (connection released)."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._on_close is not None:
+                self._on_close()
+                self._on_close = None
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the pool's transport to count requests in flight: from send until
+    the response body is closed, which is when httpx returns the connection
+    to the pool.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, db: "Database"):
+        self._transport = transport
+        self._db = db
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._db._request_started()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self._db._request_finished()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_CountedStream(response.stream, self._db._request_finished),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class Database:
+    """
+    Process-wide pooled HTTP client for Supabase and engine APIs.
+
+    A single httpx.AsyncClient is shared by every router and service so
+    TCP+TLS connections to Supabase (and Groq, Deepgram, WYNONA) are kept
+    alive and reused instead of re-handshaking on every request.
+    The client is opened and closed by the FastAPI lifespan in app.main.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        timeout: float = HTTP_TIMEOUT,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        http2: bool = HTTP2_ENABLED,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2 and _http2_available()
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Clients left behind by an event loop change, closing in the background
+        self._closing: set[asyncio.Task] = set()
+        self._requests_total = 0
+        self._responses_total = 0
+        self._http2_responses_total = 0
+        self._in_flight = 0
+        self._peak_in_flight = 0
+
+    async def connect(self) -> None:
+        """Open the pooled client (idempotent)."""
+        self._ensure_client()
+
+    async def close(self) -> None:
+        """Close the pooled client and drop all pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        The shared httpx.AsyncClient.
+
+        Opened lazily if the lifespan has not run (e.g. a bare TestClient),
+        and rebuilt if the running event loop changed since it was opened,
+        as pooled connections cannot be shared across loops. The client it
+        replaces is closed in the background.
+        """
+        return self._ensure_client()
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            if self._client is not None and not self._client.is_closed:
+                task = loop.create_task(self._close_stale(self._client))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+            self._client = self._build_client()
+            self._loop = loop
+        return self._client
+
+    async def _close_stale(self, client: httpx.AsyncClient) -> None:
+        try:
+            await client.aclose()
+        except Exception:
+            # Its connections belonged to a loop that may already be closed
+            logger.debug("Error closing HTTP client from a previous event loop", exc_info=True)
+
+    def _build_client(self) -> httpx.AsyncClient:
+        transport = self.transport or httpx.AsyncHTTPTransport(
+            limits=self.limits, http2=self.http2
+        )
+        return httpx.AsyncClient(
+            limits=self.limits,
+            timeout=self.timeout,
+            http2=self.http2,
+            transport=_CountingTransport(transport, self),
+            event_hooks={"request": [self._on_request], "response": [self._on_response]},
+        )
+
+    def _request_started(self) -> None:
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    def _request_finished(self) -> None:
+        self._in_flight -= 1
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        self._requests_total += 1
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        self._responses_total += 1
+        if response.http_version == "HTTP/2":
+            self._http2_responses_total += 1
+
+    def stats(self) -> dict:
+        """
+        Pool utilisation and traffic counters.
+
+        Requests in flight hold a pooled connection (or, over HTTP/2, a
+        stream on one) from send until their response is closed; over
+        HTTP/1.1, any beyond max_connections are waiting for a connection.
+
+        Returns:
+            Dict with configured limits, requests in flight (now and peak),
+            their share of max_connections, how many are waiting, total
+            requests sent, responses received and how many of those came
+            over HTTP/2.
+        """
+        max_connections = self.limits.max_connections
+        return {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": self.http2,
+            "max_connections": max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "utilisation": round(self._in_flight / max_connections, 3) if max_connections else None,
+            "waiting": max(self._in_flight - max_connections, 0) if max_connections else 0,
+            "requests_total": self._requests_total,
+            "responses_total": self._responses_total,
+            "http2_responses_total": self._http2_responses_total,
+        }
+
+
+# Shared instance, opened/closed by the app lifespan
+database = Database()
+
+
+def get_db() -> Database:
+    """FastAPI dependency returning the shared Database client."""
+    return database
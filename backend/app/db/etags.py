@@ -0,0 +1,95 @@
+import hashlib
+import json
+from typing import Any, Optional
+from fastapi import Request, Response
+from app.db.client import Database, HEADERS, BASE_URL, features, is_missing_function
+
+# Conditional GET: responses carry a strong ETag and Cache-Control: no-cache,
+# so the PWA's HTTP cache revalidates with If-None-Match and an unchanged
+# view costs a 304 instead of a payload.
+#
+# Single sessions and tags are versioned upstream (sql/004_etags.sql): a
+# content hash computed in Postgres. A plain GET selects it as a computed
+# column of the row it already fetches; a revalidation asks the RPC for the
+# 32-character string alone, so a match never transfers or hydrates the
+# row. Listings, and everything when those functions are not installed,
+# hash the response payload instead.
+
+VERSION_FUNCTIONS = {
+    "session": ("session_etag", "session_id"),
+    "tag": ("tag_etag", "tag_id"),
+}
+
+# Computed columns returning the same version, selected as "version"
+VERSION_COLUMNS = {
+    "session": "version:session_version",
+    "tag": "version:tag_version",
+}
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def content_etag(payload: Any) -> str:
+    """Strong ETag over the canonical JSON of a response payload."""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return f'"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+
+
+def version_etag(version: str) -> str:
+    return f'"v-{version}"'
+
+
+async def fetch_version(db: Database, kind: str, row_id: str) -> Optional[str]:
+    """
+    Fetch the upstream content version of a session or tag.
+
+    Versions are best-effort: any upstream error just means no version.
+
+    Returns:
+        Version string, or None if the row does not exist, the id is
+        malformed, the version functions are not installed or the call
+        failed
+    """
+    if not features.available("etag_functions"):
+        return None
+    function, argument = VERSION_FUNCTIONS[kind]
+    response = await db.client.post(
+        f"{BASE_URL}/rpc/{function}", headers=HEADERS, json={argument: row_id}
+    )
+    if is_missing_function(response):
+        features.mark_missing("etag_functions")
+        return None
+    if response.status_code != 200:
+        return None
+    version = response.json()
+    return version if isinstance(version, str) and version else None
+
+
+def take_version(row: dict) -> Optional[str]:
+    """Pop the version selected through VERSION_COLUMNS off a fetched row."""
+    version = row.pop("version", None)
+    return version if isinstance(version, str) and version else None
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison (RFC 9110 13.1.2)
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Attach an ETag to a GET response.
+
+    Returns:
+        A 304 response if the request's If-None-Match already has this
+        ETag, otherwise None (the caller returns its payload)
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
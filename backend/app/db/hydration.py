@@ -0,0 +1,144 @@
+import asyncio
+from typing import Optional
+from app.db.client import (
+    Database, HEADERS, BASE_URL, features, is_missing_column, is_missing_relationship,
+)
+from app.db.etags import VERSION_COLUMNS
+
+# Sessions with their tags (through the session_tags junction) and notes,
+# resolved by PostgREST resource embedding in a single request.
+SESSION_EMBED_SELECT = "*,tags(*),notes(*)"
+
+
+def _in_filter(ids: list[str]) -> str:
+    return f"in.({','.join(ids)})"
+
+
+async def _fetch_embedded(db: Database, session_ids: list[str], with_version: bool = False):
+    select = SESSION_EMBED_SELECT
+    if with_version:
+        select += f",{VERSION_COLUMNS['session']}"
+    response = await db.client.get(
+        f"{BASE_URL}/sessions",
+        headers=HEADERS,
+        params={
+            "id": _in_filter(session_ids),
+            "select": select,
+            "notes.order": "created_at.asc",
+        },
+    )
+    if with_version and is_missing_column(response):
+        features.mark_missing("etag_columns")
+        return await _fetch_embedded(db, session_ids)
+    if is_missing_relationship(response):
+        return None
+    response.raise_for_status()
+
+    sessions = response.json()
+    for session in sessions:
+        session["tags"] = session.get("tags") or []
+        session["notes"] = session.get("notes") or []
+    return sessions
+
+
+async def _fetch_related(db: Database, table: str, params: dict) -> list:
+    # Related rows are best-effort: a failure leaves the session without them
+    try:
+        response = await db.client.get(f"{BASE_URL}/{table}", headers=HEADERS, params=params)
+        if response.status_code == 200:
+            return response.json()
+    except Exception:
+        pass
+    return []
+
+
+async def _fetch_concurrently(db: Database, session_ids: list[str]) -> list[dict]:
+    id_filter = _in_filter(session_ids)
+
+    async def fetch_sessions():
+        response = await db.client.get(
+            f"{BASE_URL}/sessions",
+            headers=HEADERS,
+            params={"id": id_filter, "select": "*"},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    sessions, tag_rows, note_rows = await asyncio.gather(
+        fetch_sessions(),
+        _fetch_related(db, "session_tags", {
+            "session_id": id_filter,
+            "select": "session_id,tag:tags(*)",
+        }),
+        _fetch_related(db, "notes", {
+            "session_id": id_filter,
+            "select": "*",
+            "order": "created_at.asc",
+        }),
+    )
+
+    tags_by_session: dict[str, list] = {}
+    for row in tag_rows:
+        if row.get("tag"):
+            tags_by_session.setdefault(row["session_id"], []).append(row["tag"])
+
+    notes_by_session: dict[str, list] = {}
+    for note in note_rows:
+        notes_by_session.setdefault(note["session_id"], []).append(note)
+
+    for session in sessions:
+        session["tags"] = tags_by_session.get(session["id"], [])
+        session["notes"] = notes_by_session.get(session["id"], [])
+    return sessions
+
+
+async def hydrate_sessions(
+    db: Database, session_ids: list[str], with_version: bool = False
+) -> list[dict]:
+    """
+    Fetch sessions with their tags and notes embedded.
+
+    Uses a single PostgREST embedded select; if the relationships cannot be
+    embedded upstream, falls back to fetching sessions, tags and notes
+    concurrently and stitching them together.
+
+    Args:
+        db: Shared database client
+        session_ids: Session IDs to hydrate
+        with_version: Also select each session's content version
+            (sql/004_etags.sql) as "version", when it is installed
+
+    Returns:
+        Hydrated sessions in the order of session_ids; unknown IDs are skipped
+
+    Raises:
+        httpx.HTTPStatusError: If the sessions query fails
+    """
+    if not session_ids:
+        return []
+
+    sessions = None
+    if features.available("session_embedding"):
+        sessions = await _fetch_embedded(
+            db, session_ids, with_version and features.available("etag_columns")
+        )
+        if sessions is None:
+            features.mark_missing("session_embedding")
+    if sessions is None:
+        sessions = await _fetch_concurrently(db, session_ids)
+
+    by_id = {session["id"]: session for session in sessions}
+    return [by_id[session_id] for session_id in session_ids if session_id in by_id]
+
+
+async def hydrate_session(
+    db: Database, session_id: str, with_version: bool = False
+) -> Optional[dict]:
+    """
+    Fetch a single session with its tags and notes embedded.
+
+    Returns:
+        Hydrated session dictionary or None if not found
+    """
+    sessions = await hydrate_sessions(db, [session_id], with_version)
+    return sessions[0] if sessions else None
@@ -0,0 +1,79 @@
+import json
+from typing import Optional
+from app.db.client import (
+    Database, HEADERS, BASE_URL, features, is_invalid_input, is_missing_function,
+)
+
+# Marks are appended server-side by sql/005_append_marks.sql in one UPDATE,
+# so a batch of taps costs a single round trip and concurrent appends never
+# overwrite each other. Without the function, appends fall back to a
+# compare-and-swap PATCH that only applies if marks are still what was read.
+
+CAS_ATTEMPTS = 5
+
+
+class MarkConflict(Exception):
+    """Raised when a compare-and-swap append keeps losing to concurrent writers."""
+
+
+async def _append_with_cas(db: Database, session_id: str, marks: list[dict]) -> Optional[list]:
+    for _ in range(CAS_ATTEMPTS):
+        response = await db.client.get(
+            f"{BASE_URL}/sessions",
+            headers=HEADERS,
+            params={"id": f"eq.{session_id}", "select": "marks"},
+        )
+        response.raise_for_status()
+        rows = response.json()
+        if not rows:
+            return None
+
+        current = rows[0].get("marks")
+        expected = "is.null" if current is None else f"eq.{json.dumps(current, separators=(',', ':'))}"
+        updated = [*(current or []), *marks]
+        response = await db.client.patch(
+            f"{BASE_URL}/sessions",
+            headers=HEADERS,
+            params={"id": f"eq.{session_id}", "marks": expected, "select": "marks"},
+            json={"marks": updated},
+        )
+        response.raise_for_status()
+        if response.json():
+            return updated
+    raise MarkConflict(f"Marks on {session_id} kept changing")
+
+
+async def append_marks(db: Database, session_id: str, marks: list[dict]) -> Optional[list]:
+    """
+    Atomically append marks to a session's JSONB marks array.
+
+    Args:
+        db: Shared database client
+        session_id: Session to append to
+        marks: Marks ({"time", "label"?}) in order; a None label is
+            dropped rather than stored as null
+
+    Returns:
+        The session's full marks array after the append, or None if the
+        session does not exist
+
+    Raises:
+        httpx.HTTPStatusError: If the upstream write fails
+        MarkConflict: If the fallback compare-and-swap still loses after
+            CAS_ATTEMPTS tries
+    """
+    marks = [{k: v for k, v in mark.items() if v is not None} for mark in marks]
+    if features.available("append_marks"):
+        response = await db.client.post(
+            f"{BASE_URL}/rpc/append_session_marks",
+            headers=HEADERS,
+            json={"session_id": session_id, "new_marks": marks},
+        )
+        if not is_missing_function(response):
+            if is_invalid_input(response):
+                return None
+            response.raise_for_status()
+            return response.json()
+        features.mark_missing("append_marks")
+
+    return await _append_with_cas(db, session_id, marks)
@@ -0,0 +1,80 @@
+import base64
+import json
+from typing import Any, Optional
+
+# Keyset pagination: instead of OFFSET (which makes Postgres scan and
+# discard every skipped row, and shifts pages when rows are inserted), each
+# page starts strictly after the sort key of the previous page's last row.
+# The key is handed to clients as an opaque cursor.
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded for the requested listing."""
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    Decode a cursor made by encode_cursor.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or has the wrong arity
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def _quote(value: Any) -> str:
+    # Double-quoted PostgREST values may contain reserved characters (, . : ())
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset_filter(columns: list[tuple[str, str]], values: list) -> str:
+    """
+    PostgREST "or" filter selecting rows after a sort key.
+
+    Args:
+        columns: (column, "asc" | "desc") in sort order
+        values: The previous page's last row values for those columns
+
+    Returns:
+        e.g. (created_at.lt."t",and(created_at.eq."t",id.lt."i")) for
+        [("created_at", "desc"), ("id", "desc")]
+    """
+    clauses = []
+    for depth, (column, direction) in enumerate(columns):
+        op = "gt" if direction == "asc" else "lt"
+        equal = [f"{c}.eq.{_quote(v)}" for (c, _), v in zip(columns[:depth], values)]
+        clause = f"{column}.{op}.{_quote(values[depth])}"
+        clauses.append(f"and({','.join(equal + [clause])})" if equal else clause)
+    return f"({','.join(clauses)})"
+
+
+def order_clause(columns: list[tuple[str, str]]) -> str:
+    return ",".join(f"{column}.{direction}" for column, direction in columns)
+
+
+def split_page(
+    rows: list[dict], limit: int, columns: list[tuple[str, str]]
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Trim rows fetched with limit + 1 to one page.
+
+    Returns:
+        (page rows, cursor for the next page or None on the last page)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor([page[-1].get(column) for column, _ in columns])
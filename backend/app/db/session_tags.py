@@ -0,0 +1,62 @@
+from app.db.client import Database, HEADERS, BASE_URL
+
+# Session/tag associations are written in bulk: one upsert for any number
+# of (session, tag) pairs, existing pairs skipped by the unique key, and one
+# filtered DELETE for removals.
+
+UPSERT_HEADERS = {
+    **HEADERS,
+    "Prefer": "return=representation,resolution=ignore-duplicates",
+}
+
+
+def _in_filter(ids: list[str]) -> str:
+    return f"in.({','.join(ids)})"
+
+
+async def add_session_tags(db: Database, pairs: list[tuple[str, str]]) -> list[dict]:
+    """
+    Associate (session_id, tag_id) pairs in a single upsert.
+
+    Returns:
+        The newly inserted rows ({"session_id", "tag_id"}); pairs that were
+        already associated are skipped
+
+    Raises:
+        httpx.HTTPStatusError: If the upsert fails (409 for unknown ids)
+    """
+    if not pairs:
+        return []
+    response = await db.client.post(
+        f"{BASE_URL}/session_tags",
+        headers=UPSERT_HEADERS,
+        params={"on_conflict": "session_id,tag_id", "select": "session_id,tag_id"},
+        json=[{"session_id": session_id, "tag_id": tag_id} for session_id, tag_id in pairs],
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def remove_session_tags(db: Database, session_ids: list[str], tag_ids: list[str]) -> list[dict]:
+    """
+    Remove every association between the given sessions and tags.
+
+    Returns:
+        The deleted rows ({"session_id", "tag_id"})
+
+    Raises:
+        httpx.HTTPStatusError: If the delete fails
+    """
+    if not session_ids or not tag_ids:
+        return []
+    response = await db.client.delete(
+        f"{BASE_URL}/session_tags",
+        headers=HEADERS,
+        params={
+            "session_id": _in_filter(session_ids),
+            "tag_id": _in_filter(tag_ids),
+            "select": "session_id,tag_id",
+        },
+    )
+    response.raise_for_status()
+    return response.json()
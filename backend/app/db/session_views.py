@@ -0,0 +1,129 @@
+from typing import Optional
+from app.db.client import (
+    Database, HEADERS, BASE_URL, features, is_missing_column, is_missing_relationship,
+)
+from app.models.schemas import SessionResponse
+
+# Computed fields defined in sql/003_session_summary.sql: a short transcript
+# preview and the full length, so list cards never download the transcript.
+SUMMARY_COMPUTED = (
+    "transcript_preview:session_transcript_preview,"
+    "transcript_length:session_transcript_length"
+)
+SUMMARY_COLUMNS = "id,title,status,input_mode,duration_seconds,transcript_words,created_at"
+TAG_IDS_EMBED = "session_tags(tag_id)"
+
+# Inner-joined, column-less embed used only to filter sessions by tag; the
+# alias keeps tag_ids complete when both are selected
+TAG_FILTER_EMBED = "tag_filter:session_tags!inner()"
+
+# Selectable in fields=: real columns plus the virtual summary fields
+SESSION_COLUMNS = frozenset(
+    name for name in SessionResponse.model_fields if name not in ("tags", "notes")
+)
+VIRTUAL_FIELDS = {
+    "tag_ids": TAG_IDS_EMBED,
+    "transcript_preview": "transcript_preview:session_transcript_preview",
+    "transcript_length": "transcript_length:session_transcript_length",
+}
+SUMMARY_COMPUTED_FIELDS = {
+    VIRTUAL_FIELDS["transcript_preview"], VIRTUAL_FIELDS["transcript_length"],
+}
+
+# Always selected: the keyset pagination cursor is built from them
+REQUIRED_FIELDS = ("id", "created_at")
+
+
+def parse_fields(fields: str) -> list[str]:
+    """
+    Validate a fields= parameter.
+
+    Raises:
+        ValueError: If a field is not a session column or virtual field
+    """
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in SESSION_COLUMNS and f not in VIRTUAL_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*REQUIRED_FIELDS, *requested]))
+
+
+def select_for(view: str, fields: Optional[list[str]]) -> str:
+    """PostgREST select for a list view ("summary" or "full") or a field list."""
+    if fields:
+        return ",".join(VIRTUAL_FIELDS.get(f, f) for f in fields)
+    if view == "full":
+        return "*"
+    return f"{SUMMARY_COLUMNS},{SUMMARY_COMPUTED},{TAG_IDS_EMBED}"
+
+
+def tag_filter(select: str, params: dict, tag_ids: list[str]) -> str:
+    """
+    Restrict a sessions query to sessions tagged with any of tag_ids.
+
+    Adds the filter to params and returns the select to use.
+    """
+    params["tag_filter.tag_id"] = f"in.({','.join(tag_ids)})"
+    return f"{select},{TAG_FILTER_EMBED}"
+
+
+def _flatten_tag_ids(session: dict) -> dict:
+    if "session_tags" in session:
+        session["tag_ids"] = [row["tag_id"] for row in session.pop("session_tags") or []]
+    session.pop("tag_filter", None)
+    return session
+
+
+def _without(select: str, parts: set[str]) -> str:
+    return ",".join(part for part in select.split(",") if part not in parts) or "id"
+
+
+async def _tagged_session_ids(db: Database, tag_ids: list[str]) -> list[str]:
+    response = await db.client.get(
+        f"{BASE_URL}/session_tags",
+        headers=HEADERS,
+        params={"select": "session_id", "tag_id": f"in.({','.join(tag_ids)})"},
+    )
+    response.raise_for_status()
+    return list(dict.fromkeys(row["session_id"] for row in response.json()))
+
+
+async def fetch_session_rows(
+    db: Database, params: dict, select: str, tag_ids: Optional[list[str]] = None
+) -> list[dict]:
+    """
+    Fetch session rows with a projection, optionally only those tagged
+    with any of tag_ids.
+
+    Embedded tag ids come back flattened as "tag_ids". The computed preview
+    fields and the session_tags relationship are separate upstream
+    features: if either is missing, retries without it (and stops asking
+    for it). Without the relationship, tag ids are left out and the tag
+    filter is resolved with a session_tags lookup instead.
+
+    Raises:
+        httpx.HTTPStatusError: If the sessions query itself fails
+    """
+    summary = features.available("session_summary")
+    embedded = features.available("session_tags_embed")
+    query, projection = dict(params), select
+    if not summary:
+        projection = _without(projection, SUMMARY_COMPUTED_FIELDS)
+    if not embedded:
+        projection = _without(projection, {TAG_IDS_EMBED})
+    if tag_ids and embedded:
+        projection = tag_filter(projection, query, tag_ids)
+    elif tag_ids:
+        query["id"] = f"in.({','.join(await _tagged_session_ids(db, tag_ids))})"
+
+    response = await db.client.get(
+        f"{BASE_URL}/sessions", headers=HEADERS, params={**query, "select": projection}
+    )
+    if summary and is_missing_column(response):
+        features.mark_missing("session_summary")
+        return await fetch_session_rows(db, params, select, tag_ids)
+    if embedded and is_missing_relationship(response):
+        features.mark_missing("session_tags_embed")
+        return await fetch_session_rows(db, params, select, tag_ids)
+    response.raise_for_status()
+    return [_flatten_tag_ids(session) for session in response.json()]
@@ -0,0 +1,78 @@
+from app.db.client import Database, HEADERS, BASE_URL, features, is_missing_column
+from app.db.etags import VERSION_COLUMNS
+
+# Computed fields defined in sql/001_tag_stats.sql. PostgREST exposes functions
+# taking a tags row as virtual columns, so the stats come back embedded in the
+# same request as the tags themselves.
+TAG_STATS_SELECT = (
+    "*,"
+    "session_count:tag_session_count,"
+    "session_count_rollup:tag_session_count_rollup,"
+    "total_duration_seconds:tag_total_duration_seconds"
+)
+
+# Fallback when the computed fields are not installed: aggregate embedding
+# returns the direct session count per tag as session_tags=[{"count": n}].
+# The inner-joined, column-less sessions embed and TAG_COUNT_FILTER skip
+# soft-deleted sessions, as the computed fields do.
+TAG_COUNT_SELECT = "*,session_tags(count(),sessions!inner())"
+TAG_COUNT_FILTER = {"session_tags.sessions.deleted_at": "is.null"}
+
+
+def _flatten_embedded_count(tag: dict) -> dict:
+    embedded = tag.pop("session_tags", None) or []
+    tag["session_count"] = embedded[0].get("count", 0) if embedded else 0
+    return tag
+
+
+async def fetch_tags_with_stats(
+    db: Database, params: dict, with_version: bool = False
+) -> list[dict]:
+    """
+    Fetch tags with their session statistics in a single round trip.
+
+    Each tag gets session_count (direct), session_count_rollup (including
+    descendant tags) and total_duration_seconds (audio across the rollup).
+    If the computed fields are missing upstream, falls back to an embedded
+    count aggregate (also of live sessions only) and leaves the rollup
+    fields unset.
+
+    Args:
+        db: Shared database client
+        params: PostgREST query params (filters, order, limit, offset);
+            any "select" is replaced
+        with_version: Also select each tag's content version
+            (sql/004_etags.sql) as "version", when it is installed
+
+    Returns:
+        List of tag dictionaries with stats attached
+
+    Raises:
+        httpx.HTTPStatusError: If the tags query itself fails
+    """
+    if features.available("tag_stats"):
+        with_version = with_version and features.available("etag_columns")
+        select = TAG_STATS_SELECT
+        if with_version:
+            select += f",{VERSION_COLUMNS['tag']}"
+        response = await db.client.get(
+            f"{BASE_URL}/tags",
+            headers=HEADERS,
+            params={**params, "select": select},
+        )
+        if not is_missing_column(response):
+            response.raise_for_status()
+            return response.json()
+        if with_version:
+            # The version hashes the stats, so retry without it first
+            features.mark_missing("etag_columns")
+            return await fetch_tags_with_stats(db, params)
+        features.mark_missing("tag_stats")
+
+    response = await db.client.get(
+        f"{BASE_URL}/tags",
+        headers=HEADERS,
+        params={**params, **TAG_COUNT_FILTER, "select": TAG_COUNT_SELECT},
+    )
+    response.raise_for_status()
+    return [_flatten_embedded_count(tag) for tag in response.json()]
@@ -1,13 +1,54 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import sessions, tags, engines, upload, transcribe
+from app.compression import CompressionMiddleware
+from app.config import COMPRESSION_MINIMUM_SIZE, QUEUE_RETENTION_DAYS
+from app.db import database
+from app.responses import JSONResponse
+from app.services.engine_health import engine_health
+from app.services.search_index import search_index
+from app.routers import sessions, tags, engines, upload, transcribe, live
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared keep-alive HTTP pool used by all routers and services
+    await database.connect()
+    app.state.db = database
+
+    # Resume durable transcription jobs left over from a previous run
+    transcribe.queue_manager.purge_finished(QUEUE_RETENTION_DAYS * 86400)
+    transcribe.groq_service.normalizer.purge_expired()
+    await transcribe.job_worker.start()
+
+    # Probe engines in the background so status reads never block, and
+    # wake WYNONA ahead of queued work
+    await engine_health.start()
+    await transcribe.wynona_waker.start()
+
+    # Fill an empty search index without delaying startup
+    backfill = asyncio.create_task(search_index.backfill_if_empty(database))
+    try:
+        yield
+    finally:
+        backfill.cancel()
+        await transcribe.wynona_waker.stop()
+        await engine_health.stop()
+        await transcribe.job_worker.stop()
+        await database.close()
+
 
 app = FastAPI(
     title="NOMAD API",
     description="Universal audio capture & transcription backend",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=JSONResponse,
 )
 
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -28,7 +69,16 @@ app.include_router(engines.router, prefix="/api")
 app.include_router(upload.router, prefix="/api")
 app.include_router(transcribe.router, prefix="/api")
 
+# WebSocket routes live outside /api (docs/ARCHITECTURE.md)
+app.include_router(live.router)
+
 
 @app.get("/api/health")
 async def health():
     return {"status": "ok", "service": "nomad-api"}
+
+
+@app.get("/api/health/pool")
+async def health_pool():
+    """Shared HTTP client pool utilisation and traffic counters"""
+    return database.stats()
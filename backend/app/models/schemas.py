@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Any
 from datetime import datetime
 
@@ -29,6 +29,14 @@ class SessionUpdate(BaseModel):
     error_message: Optional[str] = None
 
 
+class SessionBulkUpdate(BaseModel):
+    session_ids: list[str] = Field(min_length=1, max_length=500)
+    add_tag_ids: list[str] = []
+    remove_tag_ids: list[str] = []
+    status: Optional[str] = None
+    delete: bool = False
+
+
 class TagCreate(BaseModel):
     name: str
     emoji: str = "🏷️"
@@ -52,6 +60,10 @@ class MarkCreate(BaseModel):
     label: Optional[str] = None
 
 
+class MarkBatch(BaseModel):
+    marks: list[MarkCreate] = Field(min_length=1, max_length=500)
+
+
 class TranscribeRequest(BaseModel):
     engine: str = "auto"
 
@@ -84,11 +96,18 @@ class TagResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
     session_count: Optional[int] = None
+    session_count_rollup: Optional[int] = None
+    total_duration_seconds: Optional[int] = None
 
     class Config:
         from_attributes = True
 
 
+class TagTreeNode(TagResponse):
+    """A tag with its sub-tags nested (GET /tags/tree)."""
+    children: list["TagTreeNode"] = []
+
+
 class SessionResponse(BaseModel):
     id: str
     title: Optional[str] = None
@@ -119,3 +138,29 @@ class SessionResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class SessionSummary(BaseModel):
+    """List card projection: no transcript, segments or marks."""
+    id: str
+    title: Optional[str] = None
+    status: str = "pending"
+    input_mode: Optional[str] = None
+    duration_seconds: Optional[int] = None
+    transcript_words: Optional[int] = None
+    transcript_preview: Optional[str] = None
+    transcript_length: Optional[int] = None
+    tag_ids: list[str] = []
+    created_at: datetime
+
+
+class SessionPage(BaseModel):
+    """Cursor-paginated session listing (when a cursor parameter is sent)."""
+    items: list[SessionSummary]
+    next_cursor: Optional[str] = None
+
+
+class TagPage(BaseModel):
+    """Cursor-paginated tag listing (when a cursor parameter is sent)."""
+    items: list[TagResponse]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,83 @@
+import typing
+from functools import lru_cache
+from typing import Any, Optional
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+# Supabase rows are already JSON: they only need to be cut down to the
+# response model's fields. Validating them through Pydantic and encoding
+# with the stdlib json module dominates the cost of transcript-heavy
+# responses (a long transcript plus thousands of segments), so trusted
+# upstream payloads are projected onto the model's shape and encoded with
+# orjson instead.
+
+
+class JSONResponse(ORJSONResponse):
+    """orjson-encoded response; the app's default response class."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _nested_model(annotation) -> tuple[Optional[type[BaseModel]], bool]:
+    # Optional[list[Model]] -> (Model, True); Optional[Model] -> (Model, False)
+    args = typing.get_args(annotation)
+    if typing.get_origin(annotation) is typing.Union:
+        non_null = [arg for arg in args if arg is not type(None)]
+        return _nested_model(non_null[0]) if len(non_null) == 1 else (None, False)
+    if typing.get_origin(annotation) is list and args:
+        model, _ = _nested_model(args[0])
+        return model, model is not None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+@lru_cache(maxsize=None)
+def _plan(model: type[BaseModel]) -> tuple:
+    plan = []
+    for name, field in model.model_fields.items():
+        default = field.get_default(call_default_factory=True) if not field.is_required() else KeyError
+        nested, many = _nested_model(field.annotation)
+        plan.append((name, default, nested, many))
+    return tuple(plan)
+
+
+def project(model: type[BaseModel], data: dict) -> dict:
+    """
+    Shape a trusted upstream row like model.model_dump() would, without
+    validating it: unknown keys are dropped, missing ones get the field
+    default and nested models are projected recursively.
+    """
+    result = {}
+    for name, default, nested, many in _plan(model):
+        if name in data:
+            value = data[name]
+        elif default is KeyError:
+            continue
+        else:
+            value = default
+        if nested is not None and value is not None:
+            value = [project(nested, item) for item in value] if many else project(nested, value)
+        result[name] = value
+    return result
+
+
+def trusted_response(
+    model: type[BaseModel], data: dict, response: Optional[Response] = None
+) -> JSONResponse:
+    """
+    Serialise an upstream row for a response_model endpoint, skipping validation.
+
+    Args:
+        model: The endpoint's response model
+        data: Row as returned by Supabase
+        response: The endpoint's injected Response, whose headers (ETag,
+            Cache-Control...) are carried over
+    """
+    result = JSONResponse(project(model, data))
+    if response is not None:
+        result.raw_headers.extend(response.headers.raw)
+    return result
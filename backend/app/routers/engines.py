@@ -1,6 +1,8 @@
-from fastapi import APIRouter
-import httpx
-from app.config import GROQ_API_KEY, DEEPGRAM_API_KEY, WYNONA_HOST
+from fastapi import APIRouter, HTTPException
+from app.config import WYNONA_HOST, WYNONA_WOL_MAC
+from app.services.engine_router import ENGINES
+from app.services.engine_health import engine_health
+from app.routers.transcribe import wynona_waker
 
 router = APIRouter(prefix="/engines", tags=["engines"])
 
@@ -10,38 +12,23 @@ async def get_engine_status():
     """
     Returns status and cost information for all transcription engines.
 
+    Answers from the background prober's cache without waiting on any
+    engine; a stale cache is refreshed in the background. Each engine
+    carries rolling latency and availability stats under "health".
+
     Engines:
     - groq-turbo: Groq Whisper Turbo (fast, lower quality)
     - groq-large: Groq Whisper Large v3 (slower, higher quality)
     - deepgram: Deepgram Nova-3 (cloud API)
     - wynona: Local WhisperX on WYNONA GPU server
     """
-    engines = [
-        {
-            "id": "groq-turbo",
-            "name": "Groq Whisper Turbo",
-            "status": "online" if GROQ_API_KEY else "offline",
-            "cost_per_hour": 0.04,
-        },
-        {
-            "id": "groq-large",
-            "name": "Groq Whisper Large v3",
-            "status": "online" if GROQ_API_KEY else "offline",
-            "cost_per_hour": 0.11,
-        },
-        {
-            "id": "deepgram",
-            "name": "Deepgram Nova-3",
-            "status": "online" if DEEPGRAM_API_KEY else "offline",
-            "cost_per_hour": 0.46,
-        },
-        {
-            "id": "wynona",
-            "name": "WYNONA WhisperX",
-            "status": await _check_wynona_health(),
-            "cost_per_hour": 0.0,
-        },
-    ]
+    engine_health.revalidate()
+    engines = []
+    for engine_id, info in ENGINES.items():
+        health = engine_health.snapshot(engine_id)
+        engines.append({"id": engine_id, **info, "status": health["status"], "health": health})
+        if engine_id == "wynona":
+            engines[-1]["wake"] = wynona_waker.snapshot()
 
     return {"engines": engines}
 
@@ -51,42 +38,31 @@ async def wake_wynona():
     """
     Triggers WYNONA GPU server wake-up.
 
-    This endpoint sends a wake signal to the WYNONA server.
-    The server may take several minutes to boot up and become available.
+    Sends a wake-on-LAN magic packet to WYNONA_WOL_MAC. The server may take
+    several minutes to boot up and become available; WYNONA jobs queued
+    meanwhile are parked until it answers its health check.
 
     Returns:
         Status of the wake request
     """
     if not WYNONA_HOST:
         return {"success": False, "message": "WYNONA host not configured"}
+    if not WYNONA_WOL_MAC:
+        return {"success": False, "message": "WYNONA_WOL_MAC not configured"}
 
     # Check if WYNONA is already online
-    current_status = await _check_wynona_health()
+    current_status = await engine_health.probe("wynona")
     if current_status == "online":
         return {"success": True, "message": "WYNONA is already online"}
 
-    # TODO: Implement actual wake-on-LAN or wake API call
-    # For now, return success - actual wake logic to be implemented
+    try:
+        sent = wynona_waker.wake("manual wake request")
+    except (ValueError, OSError) as e:
+        raise HTTPException(status_code=500, detail=f"Wake-on-LAN failed: {str(e)}")
+
     return {
         "success": True,
-        "message": "Wake signal sent to WYNONA",
+        "message": "Wake signal sent to WYNONA" if sent else "WYNONA is already booting",
         "note": "Server may take several minutes to boot",
+        "wake": wynona_waker.snapshot(),
     }
-
-
-async def _check_wynona_health() -> str:
-    """
-    Checks if WYNONA server is reachable via HTTP health check.
-
-    Returns:
-        "online" if health check succeeds, "offline" otherwise
-    """
-    if not WYNONA_HOST:
-        return "offline"
-
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"http://{WYNONA_HOST}:8765/health")
-            return "online" if response.status_code == 200 else "offline"
-    except (httpx.TimeoutException, httpx.ConnectError, Exception):
-        return "offline"
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import tempfile
+import uuid
+from typing import BinaryIO, Optional
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.config import LIVE_ENGINE, AUDIO_SPOOL_MAX_MEMORY
+from app.db import Database, database, HEADERS, BASE_URL
+from app.services.storage_service import StorageService
+from app.services.live_transcription import WindowedLiveSession
+from app.services.rate_limiter import EngineUnavailable
+from app.services.transcript_cache import transcript_cache, new_content_hasher
+from app.services.search_index import search_index
+from app.routers.transcribe import groq_service, deepgram_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["live"])
+
+storage_service = StorageService(database)
+
+
+async def _persist_live_session(
+    db: Database,
+    audio: BinaryIO,
+    hasher,
+    size: int,
+    result: dict,
+    marks: list[dict],
+    language: Optional[str],
+) -> str:
+    """
+    Upload the recorded stream and create its session with the transcript
+    committed live, so nothing is transcribed a second time.
+
+    Returns:
+        The new session id
+    """
+    session_id = str(uuid.uuid4())
+    storage_path = f"martun/{session_id}.webm"
+
+    async def read(n: int) -> bytes:
+        return audio.read(n)
+
+    audio.seek(0)
+    await storage_service.upload_stream(
+        storage_path,
+        storage_service.iter_reader(read),
+        content_type="audio/webm",
+        content_length=size,
+    )
+    audio_url = storage_service.public_url(storage_path)
+    transcript_cache.remember_audio(audio_url, hasher.hexdigest())
+
+    transcript = result["text"]
+    resp = await db.client.post(
+        f"{BASE_URL}/sessions",
+        headers=HEADERS,
+        json={
+            "id": session_id,
+            "user_id": "martun",
+            "duration_seconds": round(result["duration"]),
+            "input_mode": "live",
+            "status": "transcribed",
+            "audio_url": audio_url,
+            "file_size_bytes": size,
+            "language": language,
+            "engine_used": LIVE_ENGINE,
+            "transcript": transcript,
+            "transcript_segments": result["segments"],
+            "transcript_words": len(transcript.split()),
+            "marks": marks,
+        },
+    )
+    if resp.status_code not in (200, 201):
+        raise Exception(f"Session create failed: {resp.text}")
+    await asyncio.to_thread(
+        search_index.upsert,
+        session_id, transcript=transcript, segments=result["segments"], status="transcribed",
+    )
+    return session_id
+
+
+@router.websocket("/ws/live")
+async def live_transcription(websocket: WebSocket, language: Optional[str] = "fr"):
+    """
+    Live transcription of a MediaRecorder stream.
+
+    Binary messages are webm/opus chunks; JSON messages are
+    {"type": "mark", "time"} and {"type": "stop"}. Transcript updates are
+    pushed as {"type": "transcript", "text", "is_final"}.
+
+    With LIVE_ENGINE "deepgram" chunks are forwarded to Deepgram's
+    streaming API. Otherwise they are decoded locally and re-transcribed
+    in sliding windows; while that engine is more than
+    LIVE_MAX_LAG_SECONDS behind, the server stops reading (after a
+    {"type": "backpressure"} notice), so the client's socket buffer fills
+    instead of server memory.
+
+    On stop the full recording and the committed transcript are saved as a
+    "live" session and {"type": "done", "session_id", "total_text"} is sent.
+    """
+    await websocket.accept()
+
+    async def send(event: dict) -> None:
+        try:
+            await websocket.send_json(event)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+
+    async def transcribe_window(audio_file: BinaryIO) -> dict:
+        return await groq_service.transcribe_window(audio_file, language, LIVE_ENGINE)
+
+    try:
+        if LIVE_ENGINE == "deepgram":
+            session = deepgram_service.stream(language, send)
+        else:
+            session = WindowedLiveSession(transcribe_window, send)
+        await session.start()
+    except (EngineUnavailable, ValueError, RuntimeError) as e:
+        await send({"type": "error", "message": str(e)})
+        await websocket.close(code=1011)
+        return
+
+    marks: list[dict] = []
+    hasher = new_content_hasher()
+    received = 0
+    stopped = False
+    with tempfile.SpooledTemporaryFile(max_size=AUDIO_SPOOL_MAX_MEMORY, suffix=".webm") as audio:
+        try:
+            while True:
+                await session.wait_for_capacity()
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes"):
+                    chunk = message["bytes"]
+                    audio.write(chunk)
+                    hasher.update(chunk)
+                    received += len(chunk)
+                    await session.feed(chunk)
+                elif message.get("text"):
+                    try:
+                        event = json.loads(message["text"])
+                    except ValueError:
+                        await send({"type": "error", "message": "Invalid JSON message"})
+                        continue
+                    if event.get("type") == "mark":
+                        mark = {"time": event.get("time")}
+                        if event.get("label") is not None:
+                            mark["label"] = event["label"]
+                        marks.append(mark)
+                    elif event.get("type") == "stop":
+                        stopped = True
+                        break
+        finally:
+            result = await session.finish()
+
+        if not received:
+            if stopped:
+                await send({"type": "error", "message": "No audio received"})
+                await websocket.close()
+            return
+
+        try:
+            session_id = await _persist_live_session(
+                database, audio, hasher, received, result, marks, language
+            )
+        except Exception as e:
+            logger.exception("Failed to save live session")
+            await send({"type": "error", "message": f"Failed to save session: {e}"})
+            if stopped:
+                await websocket.close(code=1011)
+            return
+
+    if stopped:
+        await send({"type": "done", "session_id": session_id, "total_text": result["text"]})
+        await websocket.close()
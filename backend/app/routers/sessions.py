@@ -1,33 +1,39 @@
+import asyncio
 import httpx
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import Optional, List
-from app.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from app.db import Database, get_db, HEADERS, BASE_URL, is_foreign_key_violation, is_invalid_input
+from app.db.etags import (
+    conditional_response, content_etag, fetch_version, take_version, version_etag,
+)
+from app.db.hydration import hydrate_session
+from app.db.marks import MarkConflict, append_marks
+from app.db.pagination import InvalidCursor, decode_cursor, keyset_filter, order_clause, split_page
+from app.db.session_tags import add_session_tags, remove_session_tags
+from app.db.session_views import fetch_session_rows, parse_fields, select_for
+from app.responses import project, trusted_response
+from app.services.search_index import search_index
+from app.services.tag_tree import tag_tree
 from app.models.schemas import (
     SessionResponse,
+    SessionSummary,
     SessionCreate,
     SessionUpdate,
+    SessionBulkUpdate,
     MarkCreate,
+    MarkBatch,
     NoteCreate,
     NoteResponse,
 )
 
-# Supabase REST API configuration
-HEADERS = {
-    "apikey": SUPABASE_SERVICE_KEY,
-    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation",
-    "Accept-Profile": "app_nomad",
-    "Content-Profile": "app_nomad",
-}
-
-BASE_URL = f"{SUPABASE_URL}/rest/v1"
-
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
+# Listing sort key; also the keyset cursor for pagination
+SESSION_ORDER = [("created_at", "desc"), ("id", "desc")]
+
 
 @router.post("/", response_model=SessionResponse, status_code=201)
-async def create_session(session: SessionCreate):
+async def create_session(session: SessionCreate, db: Database = Depends(get_db)):
     """Create a new recording session"""
     try:
         session_data = {
@@ -54,121 +60,281 @@ async def create_session(session: SessionCreate):
         if session.offline_created:
             session_data["offline_created"] = True
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{BASE_URL}/sessions",
-                headers=HEADERS,
-                json=session_data,
-            )
-            response.raise_for_status()
-
-            created_session = response.json()
-            if isinstance(created_session, list) and len(created_session) > 0:
-                created_session = created_session[0]
-
-            return created_session
+        client = db.client
+        response = await client.post(
+            f"{BASE_URL}/sessions",
+            headers=HEADERS,
+            json=session_data,
+        )
+        response.raise_for_status()
+
+        created_session = response.json()
+        if isinstance(created_session, list) and len(created_session) > 0:
+            created_session = created_session[0]
+
+        if created_session.get("id"):
+            await asyncio.to_thread(search_index.upsert_session, created_session)
+        return created_session
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail="Failed to create session")
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/", response_model=List[SessionResponse])
+@router.get(
+    "/",
+    response_model=None,
+    responses={200: {"model": List[SessionSummary], "description": "Sessions (summary view)"}},
+)
 async def list_sessions(
+    request: Request,
+    response: Response,
     status: Optional[str] = None,
     tag: Optional[str] = None,
+    include_descendants: bool = False,
     search: Optional[str] = None,
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    fields: Optional[str] = None,
+    db: Database = Depends(get_db),
 ):
-    """List sessions with optional filters"""
+    """
+    List sessions with optional filters, newest first.
+
+    The default summary view returns list cards (SessionSummary: no
+    transcript or segments, a short transcript preview and the tag ids);
+    tag= keeps sessions carrying that tag, or with include_descendants
+    any tag in its subtree (resolved from the in-process tag tree).
+
+    view=full returns whole rows. fields= selects exactly the listed
+    columns (id and created_at are always included). Rows are trusted
+    upstream data: they are shaped to the model, not re-validated.
+
+    Sending cursor (empty for the first page) switches to keyset pagination
+    and returns {"items", "next_cursor"}; pages then cost the same at any
+    depth and do not shift when new sessions arrive. Without it, the plain
+    list is returned and offset applies. Either way the next page's cursor
+    is sent in the X-Next-Cursor header.
+
+    The ETag is a hash of the page, so an unchanged page revalidates with
+    a 304 and no body.
+    """
+    try:
+        after = decode_cursor(cursor, len(SESSION_ORDER)) if cursor else None
+        field_list = parse_fields(fields) if fields else None
+    except (InvalidCursor, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         params = {
-            "select": "*",
-            "order": "created_at.desc",
-            "limit": limit,
-            "offset": offset,
+            "order": order_clause(SESSION_ORDER),
+            "limit": limit + 1,
         }
+        if after:
+            params["or"] = keyset_filter(SESSION_ORDER, after)
+        elif offset:
+            params["offset"] = offset
 
         if status:
             params["status"] = f"eq.{status}"
-        if search:
+        tag_ids = None
+        if tag:
+            if include_descendants:
+                await tag_tree.ensure_loaded(db)
+                tag_ids = tag_tree.subtree_ids(tag)
+            else:
+                tag_ids = [tag]
+        indexed = bool(search) and search_index.ready
+        if indexed:
+            # Resolve the page from the full-text index, then fetch its rows
+            session_ids = await asyncio.to_thread(
+                search_index.match_ids,
+                search, limit + 1, 0 if after else offset, status, after=after, tag_ids=tag_ids,
+            )
+            params["id"] = f"in.({','.join(session_ids)})"
+            params.pop("or", None)
+            params.pop("offset", None)
+        elif search:
+            # Index empty or still backfilling: match titles upstream
             params["title"] = f"ilike.*{search}*"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{BASE_URL}/sessions",
-                headers=HEADERS,
-                params=params,
+        sessions, next_cursor = [], None
+        if not indexed or session_ids:
+            # The index already applied the tag filter
+            rows = await fetch_session_rows(
+                db, params, select_for(view, field_list), None if indexed else tag_ids
             )
-            response.raise_for_status()
-            return response.json()
+            sessions, next_cursor = split_page(rows, limit, SESSION_ORDER)
+        if not field_list:
+            model = SessionResponse if view == "full" else SessionSummary
+            sessions = [project(model, row) for row in sessions]
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        page = {"items": sessions, "next_cursor": next_cursor} if cursor is not None else sessions
+        return conditional_response(request, response, content_etag(page)) or page
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail="Failed to fetch sessions")
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/search")
+async def search_sessions(
+    q: str = Query(..., min_length=1),
+    status: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Ranked full-text search over titles, transcripts, notes and tag names.
+
+    Accent-insensitive with French stemming; the last word also matches as
+    a prefix. Each result carries highlighted snippets and the timestamps
+    of matching transcript segments.
+    """
+    return await asyncio.to_thread(
+        search_index.search, q, limit=limit, offset=offset, status=status
+    )
+
+
+@router.post("/search/reindex")
+async def reindex_sessions(db: Database = Depends(get_db)):
+    """Rebuild the search index from Supabase."""
+    try:
+        await asyncio.to_thread(search_index.clear)
+        return {"indexed": await search_index.backfill(db)}
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=e.response.status_code, detail="Failed to fetch sessions")
+    except httpx.ConnectError:
+        raise HTTPException(status_code=503, detail="Database connection failed")
+
+
+@router.post("/bulk")
+async def bulk_update_sessions(bulk: SessionBulkUpdate, db: Database = Depends(get_db)):
+    """
+    Apply tag additions/removals, a status change and/or soft-delete to
+    many sessions at once.
+
+    Each kind of change is a single upstream call and they run
+    concurrently, so retagging a hundred sessions costs two calls (the
+    association upsert and the tag names for the search index). The
+    changes are not one transaction: an unknown session or tag id fails
+    with 404 after the other changes have been applied.
+    """
+    session_ids = list(dict.fromkeys(bulk.session_ids))
+    add_tag_ids = list(dict.fromkeys(bulk.add_tag_ids))
+    remove_tag_ids = list(dict.fromkeys(bulk.remove_tag_ids))
+    if set(add_tag_ids) & set(remove_tag_ids):
+        raise HTTPException(status_code=400, detail="A tag cannot be both added and removed")
+
+    update_data = {}
+    if bulk.status is not None:
+        update_data["status"] = bulk.status
+    if bulk.delete:
+        update_data["deleted_at"] = "now()"
+    if not (update_data or add_tag_ids or remove_tag_ids):
+        raise HTTPException(status_code=400, detail="No changes requested")
+
+    async def update_sessions():
+        if not update_data:
+            return None
+        response = await db.client.patch(
+            f"{BASE_URL}/sessions",
+            headers=HEADERS,
+            params={"id": f"in.({','.join(session_ids)})", "select": "id,status,deleted_at"},
+            json=update_data,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def fetch_tag_names():
+        if not add_tag_ids:
+            return []
+        response = await db.client.get(
+            f"{BASE_URL}/tags",
+            headers=HEADERS,
+            params={"id": f"in.({','.join(add_tag_ids)})", "select": "id,name"},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    try:
+        updated, added, removed, tags = await asyncio.gather(
+            update_sessions(),
+            add_session_tags(db, [(sid, tid) for sid in session_ids for tid in add_tag_ids]),
+            remove_session_tags(db, session_ids, remove_tag_ids),
+            fetch_tag_names(),
+        )
+    except httpx.HTTPStatusError as e:
+        if is_foreign_key_violation(e.response):
+            raise HTTPException(status_code=404, detail="Unknown session or tag")
+        raise HTTPException(status_code=e.response.status_code, detail="Failed to update sessions")
+    except httpx.ConnectError:
+        raise HTTPException(status_code=503, detail="Database connection failed")
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    tags_by_id = {tag["id"]: tag for tag in tags}
+    added_by_session: dict[str, list] = {}
+    for row in added:
+        tag = tags_by_id.get(row["tag_id"], {"id": row["tag_id"]})
+        added_by_session.setdefault(row["session_id"], []).append(tag)
+
+    def update_index():
+        for session_id, session_tags in added_by_session.items():
+            search_index.add_tags(session_id, session_tags)
+        for row in removed:
+            search_index.remove_tag(row["tag_id"], row["session_id"])
+        for row in updated or []:
+            if row.get("deleted_at"):
+                search_index.remove(row["id"])
+            else:
+                search_index.upsert(row["id"], status=row.get("status"))
+
+    await asyncio.to_thread(update_index)
+
+    return {
+        "updated": len(updated) if updated is not None else None,
+        "tags_added": len(added),
+        "tags_removed": len(removed),
+    }
+
+
 @router.get("/{session_id}", response_model=SessionResponse)
-async def get_session(session_id: str):
-    """Get session detail with embedded tags and notes"""
+async def get_session(
+    session_id: str, request: Request, response: Response, db: Database = Depends(get_db)
+):
+    """
+    Get session detail with embedded tags and notes.
+
+    Revalidations (If-None-Match) are answered from the upstream version
+    alone; the session is only hydrated when it has changed.
+    """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{BASE_URL}/sessions",
-                headers=HEADERS,
-                params={
-                    "id": f"eq.{session_id}",
-                    "select": "*",
-                },
-            )
-            response.raise_for_status()
-            sessions = response.json()
-
-            if not sessions or len(sessions) == 0:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            session = sessions[0]
-
-            # Fetch related tags via junction table
-            try:
-                tags_response = await client.get(
-                    f"{BASE_URL}/session_tags",
-                    headers=HEADERS,
-                    params={
-                        "session_id": f"eq.{session_id}",
-                        "select": "tag:tags(*)",
-                    },
-                )
-                if tags_response.status_code == 200:
-                    tag_data = tags_response.json()
-                    session["tags"] = [item["tag"] for item in tag_data if item.get("tag")]
-                else:
-                    session["tags"] = []
-            except Exception:
-                session["tags"] = []
-
-            # Fetch related notes
-            try:
-                notes_response = await client.get(
-                    f"{BASE_URL}/notes",
-                    headers=HEADERS,
-                    params={
-                        "session_id": f"eq.{session_id}",
-                        "select": "*",
-                        "order": "created_at.asc",
-                    },
-                )
-                if notes_response.status_code == 200:
-                    session["notes"] = notes_response.json()
-                else:
-                    session["notes"] = []
-            except Exception:
-                session["notes"] = []
-
-            # marks is already a JSONB column on sessions — no separate fetch needed
-
-            return session
+        if request.headers.get("if-none-match"):
+            version = await fetch_version(db, "session", session_id)
+            if version:
+                not_modified = conditional_response(request, response, version_etag(version))
+                if not_modified:
+                    return not_modified
+            # Session row, tags and notes in a single embedded select
+            session = await hydrate_session(db, session_id)
+        else:
+            # Nothing to revalidate: the version is a column of the same select
+            session = await hydrate_session(db, session_id, with_version=True)
+            version = take_version(session) if session else None
+
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+
+        # marks is already a JSONB column on sessions — no separate fetch needed
+
+        etag = version_etag(version) if version else content_etag(session)
+        return conditional_response(request, response, etag) or trusted_response(
+            SessionResponse, session, response
+        )
     except HTTPException:
         raise
     except httpx.HTTPStatusError as e:
@@ -182,7 +348,11 @@ async def get_session(session_id: str):
 
 
 @router.put("/{session_id}", response_model=SessionResponse)
-async def update_session(session_id: str, session_update: SessionUpdate):
+async def update_session(
+    session_id: str,
+    session_update: SessionUpdate,
+    db: Database = Depends(get_db),
+):
     """Update session fields"""
     try:
         update_data = session_update.model_dump(exclude_none=True)
@@ -190,20 +360,24 @@ async def update_session(session_id: str, session_update: SessionUpdate):
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                f"{BASE_URL}/sessions",
-                headers=HEADERS,
-                params={"id": f"eq.{session_id}"},
-                json=update_data,
-            )
-            response.raise_for_status()
-            updated_sessions = response.json()
+        client = db.client
+        response = await client.patch(
+            f"{BASE_URL}/sessions",
+            headers=HEADERS,
+            params={"id": f"eq.{session_id}"},
+            json=update_data,
+        )
+        if is_invalid_input(response):
+            raise HTTPException(status_code=404, detail="Session not found")
+        response.raise_for_status()
+        # No matching row can come back as an empty body rather than []
+        updated_sessions = response.json() if response.content else []
 
-            if not updated_sessions or len(updated_sessions) == 0:
-                raise HTTPException(status_code=404, detail="Session not found")
+        if not updated_sessions:
+            raise HTTPException(status_code=404, detail="Session not found")
 
-            return updated_sessions[0]
+        await asyncio.to_thread(search_index.upsert_session, updated_sessions[0])
+        return updated_sessions[0]
     except HTTPException:
         raise
     except httpx.HTTPStatusError as e:
@@ -217,36 +391,29 @@ async def update_session(session_id: str, session_update: SessionUpdate):
 
 
 @router.delete("/{session_id}", status_code=204)
-async def delete_session(session_id: str):
+async def delete_session(session_id: str, db: Database = Depends(get_db)):
     """Soft-delete a session (set deleted_at)"""
     try:
-        async with httpx.AsyncClient() as client:
-            # Check if session exists
-            check_response = await client.get(
-                f"{BASE_URL}/sessions",
-                headers=HEADERS,
-                params={"id": f"eq.{session_id}", "select": "id"},
-            )
-            check_response.raise_for_status()
-            sessions = check_response.json()
-
-            if not sessions or len(sessions) == 0:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            # Soft delete: set deleted_at timestamp
-            response = await client.patch(
-                f"{BASE_URL}/sessions",
-                headers=HEADERS,
-                params={"id": f"eq.{session_id}"},
-                json={"deleted_at": "now()"},
-            )
-            response.raise_for_status()
+        client = db.client
+        # Soft delete: set deleted_at timestamp; no row back means no session
+        response = await client.patch(
+            f"{BASE_URL}/sessions",
+            headers=HEADERS,
+            params={"id": f"eq.{session_id}", "select": "id"},
+            json={"deleted_at": "now()"},
+        )
+        response.raise_for_status()
+
+        if not response.json():
+            raise HTTPException(status_code=404, detail="Session not found")
 
-            return None
+        await asyncio.to_thread(search_index.remove, session_id)
+        return None
     except HTTPException:
         raise
     except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
+        # A malformed id (22P02) cannot name a session either
+        if e.response.status_code == 404 or is_invalid_input(e.response):
             raise HTTPException(status_code=404, detail="Session not found")
         raise HTTPException(status_code=e.response.status_code, detail="Failed to delete session")
     except httpx.ConnectError:
@@ -255,88 +422,77 @@ async def delete_session(session_id: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.post("/{session_id}/marks", status_code=201)
-async def add_mark_to_session(session_id: str, mark: MarkCreate):
-    """Add a timestamp mark to a session (appends to JSONB marks array)"""
-    try:
-        async with httpx.AsyncClient() as client:
-            # Fetch current session to get existing marks
-            response = await client.get(
-                f"{BASE_URL}/sessions",
-                headers=HEADERS,
-                params={
-                    "id": f"eq.{session_id}",
-                    "select": "id,marks",
-                },
-            )
-            response.raise_for_status()
-            sessions = response.json()
-
-            if not sessions or len(sessions) == 0:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            current_marks = sessions[0].get("marks") or []
-
-            # Append new mark to JSONB array
-            new_mark = {"time": mark.time}
-            if mark.label is not None:
-                new_mark["label"] = mark.label
-            current_marks.append(new_mark)
-
-            # Update session with new marks array
-            update_response = await client.patch(
-                f"{BASE_URL}/sessions",
-                headers=HEADERS,
-                params={"id": f"eq.{session_id}"},
-                json={"marks": current_marks},
-            )
-            update_response.raise_for_status()
+def _mark_dict(mark: MarkCreate) -> dict:
+    new_mark = {"time": mark.time}
+    if mark.label is not None:
+        new_mark["label"] = mark.label
+    return new_mark
 
-            return new_mark
-    except HTTPException:
-        raise
+
+async def _append_marks(db: Database, session_id: str, marks: list[dict]) -> list:
+    try:
+        all_marks = await append_marks(db, session_id, marks)
+    except MarkConflict:
+        raise HTTPException(status_code=409, detail="Marks changed concurrently, retry")
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail="Failed to add mark")
     except httpx.ConnectError:
         raise HTTPException(status_code=503, detail="Database connection failed")
     except Exception:
         raise HTTPException(status_code=500, detail="Internal server error")
+    if all_marks is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return all_marks
+
+
+@router.post("/{session_id}/marks", status_code=201)
+async def add_mark_to_session(session_id: str, mark: MarkCreate, db: Database = Depends(get_db)):
+    """Add a timestamp mark to a session (atomic append to the JSONB marks array)"""
+    new_mark = _mark_dict(mark)
+    await _append_marks(db, session_id, [new_mark])
+    return new_mark
+
+
+@router.post("/{session_id}/marks/batch", status_code=201)
+async def add_marks_to_session(session_id: str, batch: MarkBatch, db: Database = Depends(get_db)):
+    """
+    Append many marks in one atomic call.
+
+    Lets clients buffer rapid taps during a recording and flush them
+    together; returns the appended marks and the session's new mark count.
+    """
+    new_marks = [_mark_dict(mark) for mark in batch.marks]
+    all_marks = await _append_marks(db, session_id, new_marks)
+    return {"marks": new_marks, "total": len(all_marks)}
 
 
 @router.post("/{session_id}/notes", response_model=NoteResponse, status_code=201)
-async def add_note_to_session(session_id: str, note: NoteCreate):
+async def add_note_to_session(session_id: str, note: NoteCreate, db: Database = Depends(get_db)):
     """Add a text note to a session"""
     try:
-        async with httpx.AsyncClient() as client:
-            # Check if session exists
-            check_response = await client.get(
-                f"{BASE_URL}/sessions",
-                headers=HEADERS,
-                params={"id": f"eq.{session_id}", "select": "id"},
-            )
-            check_response.raise_for_status()
-            sessions = check_response.json()
-
-            if not sessions or len(sessions) == 0:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            note_data = {
-                "session_id": session_id,
-                "content": note.content,
-            }
+        client = db.client
+        note_data = {
+            "session_id": session_id,
+            "content": note.content,
+        }
 
-            response = await client.post(
-                f"{BASE_URL}/notes",
-                headers=HEADERS,
-                json=note_data,
-            )
-            response.raise_for_status()
+        # An unknown session fails the notes.session_id foreign key, a
+        # malformed one the uuid cast
+        response = await client.post(
+            f"{BASE_URL}/notes",
+            headers=HEADERS,
+            json=note_data,
+        )
+        if is_foreign_key_violation(response) or is_invalid_input(response):
+            raise HTTPException(status_code=404, detail="Session not found")
+        response.raise_for_status()
 
-            created_note = response.json()
-            if isinstance(created_note, list) and len(created_note) > 0:
-                created_note = created_note[0]
+        created_note = response.json()
+        if isinstance(created_note, list) and len(created_note) > 0:
+            created_note = created_note[0]
 
-            return created_note
+        await asyncio.to_thread(search_index.add_note, session_id, note.content)
+        return created_note
     except HTTPException:
         raise
     except httpx.HTTPStatusError as e:
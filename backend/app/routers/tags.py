@@ -1,45 +1,70 @@
+import asyncio
 import httpx
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
-from app.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import Optional, List, Union
+from app.db import (
+    Database, get_db, HEADERS, BASE_URL, is_foreign_key_violation, is_invalid_input,
+)
+from app.db.etags import (
+    conditional_response, content_etag, fetch_version, take_version, version_etag,
+)
+from app.db.hydration import hydrate_session
+from app.db.pagination import InvalidCursor, decode_cursor, keyset_filter, order_clause, split_page
+from app.db.session_tags import add_session_tags
+from app.db.tag_stats import fetch_tags_with_stats
+from app.responses import trusted_response
+from app.services.search_index import search_index
+from app.services.tag_tree import tag_tree
 from app.models.schemas import (
     TagResponse,
+    TagPage,
+    TagTreeNode,
     TagCreate,
     TagUpdate,
     TagAssociation,
     SessionResponse,
 )
 
-# Supabase REST API configuration
-HEADERS = {
-    "apikey": SUPABASE_SERVICE_KEY,
-    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation",
-    "Accept-Profile": "app_nomad",
-    "Content-Profile": "app_nomad",
-}
-
-BASE_URL = f"{SUPABASE_URL}/rest/v1"
-
 router = APIRouter(prefix="/tags", tags=["tags"])
 
+# Listing sort key; also the keyset cursor for pagination
+TAG_ORDER = [("name", "asc"), ("id", "asc")]
 
-@router.get("/", response_model=List[TagResponse])
+
+@router.get("/", response_model=Union[List[TagResponse], TagPage])
 async def list_tags(
+    request: Request,
+    response: Response,
     parent_id: Optional[str] = None,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    db: Database = Depends(get_db),
 ):
-    """List all tags with optional parent filter"""
+    """
+    List all tags with optional parent filter.
+
+    Sending cursor (empty for the first page) switches to keyset pagination
+    on (name, id) and returns {"items", "next_cursor"}; otherwise the plain
+    list is returned and offset applies. The next page's cursor is also
+    sent in the X-Next-Cursor header. An unchanged page revalidates
+    (If-None-Match) with a 304 and no body.
+    """
+    try:
+        after = decode_cursor(cursor, len(TAG_ORDER)) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         # Build query parameters
         params = {
-            "select": "*",
-            "order": "name.asc",
-            "limit": limit,
-            "offset": offset,
+            "order": order_clause(TAG_ORDER),
+            "limit": limit + 1,
         }
+        if after:
+            params["or"] = keyset_filter(TAG_ORDER, after)
+        elif offset:
+            params["offset"] = offset
 
         # Filter by parent_id if provided
         if parent_id is not None:
@@ -49,38 +74,12 @@ async def list_tags(
             else:
                 params["parent_id"] = f"eq.{parent_id}"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{BASE_URL}/tags",
-                headers=HEADERS,
-                params=params,
-            )
-            response.raise_for_status()
-            tags = response.json()
-
-            # Optionally add session count for each tag
-            for tag in tags:
-                try:
-                    count_response = await client.get(
-                        f"{BASE_URL}/session_tags",
-                        headers=HEADERS,
-                        params={
-                            "tag_id": f"eq.{tag['id']}",
-                            "select": "count",
-                        },
-                    )
-                    if count_response.status_code == 200:
-                        count_data = count_response.headers.get("Content-Range", "")
-                        if "/" in count_data:
-                            tag["session_count"] = int(count_data.split("/")[1])
-                        else:
-                            tag["session_count"] = 0
-                    else:
-                        tag["session_count"] = 0
-                except Exception:
-                    tag["session_count"] = 0
-
-            return tags
+        # Tags and their session stats in a single round trip
+        tags, next_cursor = split_page(await fetch_tags_with_stats(db, params), limit, TAG_ORDER)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        page = {"items": tags, "next_cursor": next_cursor} if cursor is not None else tags
+        return conditional_response(request, response, content_etag(page)) or page
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail="Failed to fetch tags")
     except httpx.ConnectError as e:
@@ -90,7 +89,7 @@ async def list_tags(
 
 
 @router.post("/", response_model=TagResponse, status_code=201)
-async def create_tag(tag: TagCreate):
+async def create_tag(tag: TagCreate, db: Database = Depends(get_db)):
     """Create a new tag"""
     try:
         # Prepare tag data for insertion
@@ -104,19 +103,20 @@ async def create_tag(tag: TagCreate):
         if tag.parent_id is not None:
             tag_data["parent_id"] = tag.parent_id
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{BASE_URL}/tags",
-                headers=HEADERS,
-                json=tag_data,
-            )
-            response.raise_for_status()
+        client = db.client
+        response = await client.post(
+            f"{BASE_URL}/tags",
+            headers=HEADERS,
+            json=tag_data,
+        )
+        response.raise_for_status()
 
-            created_tag = response.json()
-            if isinstance(created_tag, list) and len(created_tag) > 0:
-                created_tag = created_tag[0]
+        created_tag = response.json()
+        if isinstance(created_tag, list) and len(created_tag) > 0:
+            created_tag = created_tag[0]
 
-            return created_tag
+        tag_tree.upsert(created_tag)
+        return created_tag
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail="Failed to create tag")
     except httpx.ConnectError as e:
@@ -125,49 +125,50 @@ async def create_tag(tag: TagCreate):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/{tag_id}", response_model=TagResponse)
-async def get_tag(tag_id: str):
-    """Get a single tag by ID"""
+@router.get("/tree", response_model=List[TagTreeNode])
+async def get_tag_tree(request: Request, response: Response, db: Database = Depends(get_db)):
+    """The whole tag hierarchy, nested by parent_id, from the in-process tree cache."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{BASE_URL}/tags",
-                headers=HEADERS,
-                params={
-                    "id": f"eq.{tag_id}",
-                    "select": "*",
-                },
-            )
-            response.raise_for_status()
-            tags = response.json()
+        await tag_tree.ensure_loaded(db)
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=e.response.status_code, detail="Failed to fetch tags")
+    except httpx.ConnectError:
+        raise HTTPException(status_code=503, detail="Database connection failed")
 
-            if not tags or len(tags) == 0:
-                raise HTTPException(status_code=404, detail="Tag not found")
+    tree = tag_tree.tree()
+    return conditional_response(request, response, content_etag(tree)) or tree
 
-            tag = tags[0]
 
-            # Add session count
-            try:
-                count_response = await client.get(
-                    f"{BASE_URL}/session_tags",
-                    headers=HEADERS,
-                    params={
-                        "tag_id": f"eq.{tag_id}",
-                        "select": "count",
-                    },
-                )
-                if count_response.status_code == 200:
-                    count_data = count_response.headers.get("Content-Range", "")
-                    if "/" in count_data:
-                        tag["session_count"] = int(count_data.split("/")[1])
-                    else:
-                        tag["session_count"] = 0
-                else:
-                    tag["session_count"] = 0
-            except Exception:
-                tag["session_count"] = 0
-
-            return tag
+@router.get("/{tag_id}", response_model=TagResponse)
+async def get_tag(
+    tag_id: str, request: Request, response: Response, db: Database = Depends(get_db)
+):
+    """
+    Get a single tag by ID.
+
+    Revalidations (If-None-Match) are answered from the upstream version
+    alone; the tag and its stats are only fetched when they have changed.
+    """
+    try:
+        if request.headers.get("if-none-match"):
+            version = await fetch_version(db, "tag", tag_id)
+            if version:
+                not_modified = conditional_response(request, response, version_etag(version))
+                if not_modified:
+                    return not_modified
+            tags = await fetch_tags_with_stats(db, {"id": f"eq.{tag_id}"})
+        else:
+            # Nothing to revalidate: the version is a column of the same select
+            tags = await fetch_tags_with_stats(db, {"id": f"eq.{tag_id}"}, with_version=True)
+            version = take_version(tags[0]) if tags else None
+
+        if not tags or len(tags) == 0:
+            raise HTTPException(status_code=404, detail="Tag not found")
+
+        etag = version_etag(version) if version else content_etag(tags[0])
+        return conditional_response(request, response, etag) or trusted_response(
+            TagResponse, tags[0], response
+        )
     except HTTPException:
         raise
     except httpx.HTTPStatusError as e:
@@ -181,7 +182,7 @@ async def get_tag(tag_id: str):
 
 
 @router.put("/{tag_id}", response_model=TagResponse)
-async def update_tag(tag_id: str, tag_update: TagUpdate):
+async def update_tag(tag_id: str, tag_update: TagUpdate, db: Database = Depends(get_db)):
     """Update a tag"""
     try:
         # Build update data from provided fields
@@ -198,21 +199,24 @@ async def update_tag(tag_id: str, tag_update: TagUpdate):
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
 
-        async with httpx.AsyncClient() as client:
-            # Update the tag
-            response = await client.patch(
-                f"{BASE_URL}/tags",
-                headers=HEADERS,
-                params={"id": f"eq.{tag_id}"},
-                json=update_data,
-            )
-            response.raise_for_status()
-            updated_tags = response.json()
-
-            if not updated_tags or len(updated_tags) == 0:
-                raise HTTPException(status_code=404, detail="Tag not found")
+        client = db.client
+        # Update the tag
+        response = await client.patch(
+            f"{BASE_URL}/tags",
+            headers=HEADERS,
+            params={"id": f"eq.{tag_id}"},
+            json=update_data,
+        )
+        response.raise_for_status()
+        updated_tags = response.json()
+
+        if not updated_tags or len(updated_tags) == 0:
+            raise HTTPException(status_code=404, detail="Tag not found")
 
-            return updated_tags[0]
+        tag_tree.upsert(updated_tags[0])
+        if "name" in update_data:
+            await asyncio.to_thread(search_index.rename_tag, tag_id, update_data["name"])
+        return updated_tags[0]
     except HTTPException:
         raise
     except httpx.HTTPStatusError as e:
@@ -226,35 +230,30 @@ async def update_tag(tag_id: str, tag_update: TagUpdate):
 
 
 @router.delete("/{tag_id}", status_code=204)
-async def delete_tag(tag_id: str):
+async def delete_tag(tag_id: str, db: Database = Depends(get_db)):
     """Delete a tag"""
     try:
-        async with httpx.AsyncClient() as client:
-            # Check if tag exists first
-            check_response = await client.get(
-                f"{BASE_URL}/tags",
-                headers=HEADERS,
-                params={"id": f"eq.{tag_id}", "select": "id"},
-            )
-            check_response.raise_for_status()
-            tags = check_response.json()
-
-            if not tags or len(tags) == 0:
-                raise HTTPException(status_code=404, detail="Tag not found")
-
-            # Delete the tag (junction table entries will cascade delete)
-            response = await client.delete(
-                f"{BASE_URL}/tags",
-                headers=HEADERS,
-                params={"id": f"eq.{tag_id}"},
-            )
-            response.raise_for_status()
+        client = db.client
+        # Delete the tag (junction table entries will cascade delete); no
+        # row back means no tag
+        response = await client.delete(
+            f"{BASE_URL}/tags",
+            headers=HEADERS,
+            params={"id": f"eq.{tag_id}", "select": "id"},
+        )
+        response.raise_for_status()
+
+        if not response.json():
+            raise HTTPException(status_code=404, detail="Tag not found")
 
-            return None
+        tag_tree.remove(tag_id)
+        await asyncio.to_thread(search_index.remove_tag, tag_id)
+        return None
     except HTTPException:
         raise
     except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
+        # A malformed id (22P02) cannot name a tag either
+        if e.response.status_code == 404 or is_invalid_input(e.response):
             raise HTTPException(status_code=404, detail="Tag not found")
         raise HTTPException(status_code=e.response.status_code, detail="Failed to delete tag")
     except httpx.ConnectError as e:
@@ -268,103 +267,67 @@ sessions_tags_router = APIRouter(prefix="/sessions", tags=["tags"])
 
 
 @sessions_tags_router.post("/{session_id}/tags", response_model=SessionResponse)
-async def associate_tags_with_session(session_id: str, tag_assoc: TagAssociation):
-    """Associate multiple tags with a session"""
+async def associate_tags_with_session(
+    session_id: str,
+    tag_assoc: TagAssociation,
+    db: Database = Depends(get_db),
+):
+    """
+    Associate multiple tags with a session.
+
+    The associations are upserted while the session (with its tags and
+    notes) and the requested tags are read: three requests issued
+    concurrently, so the request waits about one round-trip time. Unknown
+    tag ids are ignored: if the upsert fails on one, the known tags are
+    upserted again on their own.
+    """
     try:
-        async with httpx.AsyncClient() as client:
-            # First, verify the session exists
-            session_response = await client.get(
-                f"{BASE_URL}/sessions",
-                headers=HEADERS,
-                params={
-                    "id": f"eq.{session_id}",
-                    "select": "id",
-                },
-            )
-            session_response.raise_for_status()
-            sessions = session_response.json()
-
-            if not sessions or len(sessions) == 0:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            # Insert tag associations into junction table
-            # Create association records for each tag
-            for tag_id in tag_assoc.tag_ids:
-                association_data = {
-                    "session_id": session_id,
-                    "tag_id": tag_id,
-                }
-
-                try:
-                    assoc_response = await client.post(
-                        f"{BASE_URL}/session_tags",
-                        headers=HEADERS,
-                        json=association_data,
-                    )
-                    # Ignore conflicts (tag already associated)
-                    if assoc_response.status_code not in [200, 201, 409]:
-                        assoc_response.raise_for_status()
-                except httpx.HTTPStatusError as e:
-                    # Ignore 409 conflicts (duplicate associations)
-                    if e.response.status_code != 409:
-                        raise
-
-            # Fetch and return the updated session with embedded tags
-            session_detail_response = await client.get(
-                f"{BASE_URL}/sessions",
+        tag_ids = list(dict.fromkeys(tag_assoc.tag_ids))
+
+        async def fetch_tags():
+            if not tag_ids:
+                return []
+            response = await db.client.get(
+                f"{BASE_URL}/tags",
                 headers=HEADERS,
-                params={
-                    "id": f"eq.{session_id}",
-                    "select": "*",
-                },
+                params={"id": f"in.({','.join(tag_ids)})", "select": "*"},
             )
-            session_detail_response.raise_for_status()
-            session = session_detail_response.json()[0]
+            response.raise_for_status()
+            return response.json()
 
-            # Fetch related tags via junction table
-            try:
-                tags_response = await client.get(
-                    f"{BASE_URL}/session_tags",
-                    headers=HEADERS,
-                    params={
-                        "session_id": f"eq.{session_id}",
-                        "select": "tag:tags(*)",
-                    },
-                )
-                if tags_response.status_code == 200:
-                    tag_data = tags_response.json()
-                    session["tags"] = [item["tag"] for item in tag_data if item.get("tag")]
-                else:
-                    session["tags"] = []
-            except Exception:
-                session["tags"] = []
-
-            # Fetch related notes (handle gracefully if table doesn't exist)
+        async def upsert_requested():
             try:
-                notes_response = await client.get(
-                    f"{BASE_URL}/notes",
-                    headers=HEADERS,
-                    params={
-                        "session_id": f"eq.{session_id}",
-                        "select": "*",
-                        "order": "created_at.asc",
-                    },
-                )
-                if notes_response.status_code == 200:
-                    session["notes"] = notes_response.json()
-                else:
-                    session["notes"] = []
-            except Exception:
-                session["notes"] = []
-
-            # marks is already a JSONB column on sessions — no separate fetch needed
-
-            return session
+                await add_session_tags(db, [(session_id, tag_id) for tag_id in tag_ids])
+                return True
+            except httpx.HTTPStatusError as e:
+                # Unknown session or tag id; told apart by the reads below
+                if is_foreign_key_violation(e.response):
+                    return False
+                raise
+
+        session, tags, upserted = await asyncio.gather(
+            hydrate_session(db, session_id), fetch_tags(), upsert_requested()
+        )
+
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if not upserted:
+            await add_session_tags(db, [(session_id, tag["id"]) for tag in tags])
+
+        # The session may have been read before or after the upsert, so
+        # merge by id and index every requested tag (add_tags is idempotent)
+        merged = {tag["id"]: tag for tag in session["tags"]}
+        merged.update((tag["id"], tag) for tag in tags)
+        session["tags"] = list(merged.values())
+        await asyncio.to_thread(search_index.add_tags, session_id, tags)
+        return session
     except HTTPException:
         raise
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
             raise HTTPException(status_code=404, detail="Session not found")
+        if is_invalid_input(e.response):
+            raise HTTPException(status_code=404, detail="Session or tag not found")
         raise HTTPException(status_code=e.response.status_code, detail="Failed to associate tags")
     except httpx.ConnectError as e:
         raise HTTPException(status_code=503, detail="Database connection failed")
@@ -1,53 +1,88 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-import httpx
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from app.config import GROQ_API_KEY
+from app.db import Database, database, get_db, HEADERS, BASE_URL
 from app.models.schemas import TranscribeRequest
 from app.services.queue_manager import QueueManager
+from app.services.job_worker import JobWorker
+from app.services.rate_limiter import LimiterRegistry
+from app.services.engine_router import EngineRouter
+from app.services.engine_health import engine_health
+from app.services.wynona_waker import WynonaWaker
 from app.services.groq_service import GroqService
+from app.services.transcript_cache import transcript_cache
 from app.services.wynona_service import WynonaService
-from app.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from app.services.deepgram_service import DeepgramService
 
 router = APIRouter(prefix="/transcribe", tags=["transcribe"])
 
-HEADERS = {
-    "apikey": SUPABASE_SERVICE_KEY,
-    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
-    "Content-Type": "application/json",
-    "Accept-Profile": "app_nomad",
-    "Content-Profile": "app_nomad",
-}
-BASE_URL = f"{SUPABASE_URL}/rest/v1"
-
 # Initialize services
 queue_manager = QueueManager()
-groq_service = GroqService()
-wynona_service = WynonaService()
-
+engine_limiters = LimiterRegistry()
+groq_service = GroqService(database)
+wynona_service = WynonaService(database)
+deepgram_service = DeepgramService(database)
+engine_router = EngineRouter(queue_manager, engine_health.status)
+
+
+async def process_transcription(job: dict):
+    """
+    Run one leased transcription job.
+
+    Raising marks the attempt failed; the worker retries it with backoff
+    unless the error is permanent (unknown engine).
+    """
+    session_id = job["session_id"]
+    engine = job["engine"]
+    audio_url = job["audio_url"]
+
+    # Jobs queued as "auto" (before routing happened at enqueue time)
+    if engine == "auto":
+        routing = await engine_router.route(
+            job["meta"].get("duration_seconds") or 0, job["meta"].get("input_mode")
+        )
+        await asyncio.to_thread(queue_manager.update_meta, job["id"], routing=routing)
+        engine = routing["engine"]
+
+    if engine in ["groq-turbo", "groq-large"]:
+        await groq_service.transcribe(
+            session_id,
+            audio_url,
+            engine,
+            language=job["meta"].get("language"),
+            mix_mode=job["meta"].get("mix_mode"),
+        )
+    elif engine == "wynona":
+        # Parks the job (or moves it to Groq) while the GPU host boots
+        await wynona_waker.ensure_ready()
+        await wynona_service.transcribe(
+            session_id, audio_url, language=job["meta"].get("language")
+        )
+    elif engine == "deepgram":
+        await deepgram_service.transcribe(
+            session_id,
+            audio_url,
+            language=job["meta"].get("language"),
+            mix_mode=job["meta"].get("mix_mode"),
+        )
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
 
-async def process_transcription(job_id: str, session_id: str, engine: str, audio_url: str):
-    try:
-        queue_manager.update_status(job_id, "processing")
-
-        if engine in ["groq-turbo", "groq-large"]:
-            await groq_service.transcribe(session_id, audio_url, engine)
-            queue_manager.update_status(job_id, "completed")
-        elif engine == "wynona":
-            await wynona_service.transcribe(session_id, audio_url)
-            queue_manager.update_status(job_id, "completed")
-        elif engine == "deepgram":
-            raise NotImplementedError("Deepgram transcription not yet implemented")
-        else:
-            raise ValueError(f"Unknown engine: {engine}")
 
-    except Exception as e:
-        queue_manager.update_status(job_id, "failed")
-        print(f"Transcription job {job_id} failed: {str(e)}")
+job_worker = JobWorker(queue_manager, process_transcription, limiters=engine_limiters)
+wynona_waker = WynonaWaker(
+    queue_manager,
+    engine_health,
+    fallback_engine="groq-turbo" if GROQ_API_KEY else None,
+    on_ready=job_worker.notify,
+)
 
 
 @router.post("/{session_id}")
 async def transcribe_session(
     session_id: str,
     request: TranscribeRequest,
-    background_tasks: BackgroundTasks
+    db: Database = Depends(get_db),
 ):
     if not session_id:
         raise HTTPException(status_code=400, detail="Invalid session_id")
@@ -61,46 +96,70 @@ async def transcribe_session(
 
     # Check if session exists via httpx REST API
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{BASE_URL}/sessions?id=eq.{session_id}&select=id,audio_url",
-                headers=HEADERS,
-            )
-            if resp.status_code != 200:
-                raise HTTPException(status_code=500, detail="Failed to query session")
-
-            rows = resp.json()
-            if not rows:
-                raise HTTPException(status_code=404, detail="Session not found")
-
-            audio_url = rows[0].get("audio_url")
-            if not audio_url:
-                raise HTTPException(status_code=400, detail="Session has no audio file")
+        client = db.client
+        resp = await client.get(
+            f"{BASE_URL}/sessions?id=eq.{session_id}&select=id,audio_url,duration_seconds,language,mix_mode,input_mode",
+            headers=HEADERS,
+        )
+        if resp.status_code != 200:
+            raise HTTPException(status_code=500, detail="Failed to query session")
+
+        rows = resp.json()
+        if not rows:
+            raise HTTPException(status_code=404, detail="Session not found")
+
+        audio_url = rows[0].get("audio_url")
+        if not audio_url:
+            raise HTTPException(status_code=400, detail="Session has no audio file")
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to verify session: {str(e)}")
 
-    job_id = queue_manager.add_job(session_id, request.engine)
+    meta = {
+        "duration_seconds": rows[0].get("duration_seconds") or 0,
+        "language": rows[0].get("language"),
+        "mix_mode": rows[0].get("mix_mode"),
+        "input_mode": rows[0].get("input_mode"),
+    }
 
-    background_tasks.add_task(
-        process_transcription,
-        job_id,
-        session_id,
-        request.engine,
-        audio_url
+    # Resolve "auto" now so the job is queued (and rate limited) under the
+    # engine that will actually run it
+    engine = request.engine
+    routing = None
+    if engine == "auto":
+        try:
+            routing = await engine_router.route(meta["duration_seconds"], meta["input_mode"])
+        except ValueError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        engine = routing["engine"]
+        meta["routing"] = routing
+
+    # Persist the job; the worker pool picks it up (and retries it) from there
+    job_id = await asyncio.to_thread(
+        queue_manager.add_job, session_id, engine, audio_url, meta=meta
     )
+    job_worker.notify()
 
-    return {
+    response = {
         "job_id": job_id,
         "status": "queued",
         "session_id": session_id,
-        "engine": request.engine
+        "engine": engine
     }
+    if routing:
+        response["routing_reason"] = routing["reason"]
+    return response
 
 
 @router.get("/queue")
 async def get_queue():
-    jobs = queue_manager.get_jobs()
-    return {"jobs": jobs, "total": len(jobs)}
+    jobs = await asyncio.to_thread(queue_manager.get_jobs)
+    return {"jobs": jobs, "total": len(jobs), "limiters": engine_limiters.snapshot()}
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Transcript cache hit/miss counters and disk usage."""
+    return transcript_cache.stats()
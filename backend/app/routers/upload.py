@@ -1,33 +1,119 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+import asyncio
+import base64
 import httpx
+import shutil
+import tempfile
 import uuid
 from pathlib import Path
-from app.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from app.db import Database, database, get_db, HEADERS, BASE_URL
+from app.services.storage_service import StorageService, UploadTooLarge
+from app.services.chunking import AudioChunker
+from app.services.resumable_upload import ResumableUploadStore, OffsetMismatch
+from app.services.transcript_cache import transcript_cache, new_content_hasher
+from app.services.search_index import search_index
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
 # Allowed audio file extensions
 ALLOWED_EXTENSIONS = {".wav", ".mp3", ".m4a", ".webm", ".ogg"}
 
+TUS_VERSION = "1.0.0"
 
-HEADERS = {
-    "apikey": SUPABASE_SERVICE_KEY,
-    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation",
-    "Accept-Profile": "app_nomad",
-    "Content-Profile": "app_nomad",
-}
-BASE_URL = f"{SUPABASE_URL}/rest/v1"
+storage_service = StorageService(database)
+resumable_store = ResumableUploadStore()
+audio_chunker = AudioChunker()
+
+
+def _validate_extension(filename: str) -> str:
+    file_ext = Path(filename or "").suffix.lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    return file_ext
+
+
+def _parse_upload_metadata(header: str) -> dict:
+    """Parse a TUS Upload-Metadata header: "key b64value,key b64value"."""
+    metadata = {}
+    for pair in filter(None, (p.strip() for p in header.split(","))):
+        key, _, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value).decode() if value else ""
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid Upload-Metadata for {key}")
+    return metadata
+
+
+async def _probe_duration(path: str) -> float:
+    """
+    Duration of a local audio file in seconds, or 0 when it cannot be probed.
+
+    Stored on the session so the job queue charges the engine limiters for
+    the real length of imported recordings.
+    """
+    if not audio_chunker.available:
+        return 0.0
+    try:
+        return await audio_chunker.probe_duration(path)
+    except (RuntimeError, ValueError):
+        return 0.0
+
+
+async def _probe_upload(file: UploadFile, file_ext: str) -> float:
+    if not audio_chunker.available:
+        return 0.0
+    # The spooled upload has no path ffprobe could open
+    await file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=file_ext) as copy:
+        await asyncio.to_thread(shutil.copyfileobj, file.file, copy)
+        await asyncio.to_thread(copy.flush)
+        return await _probe_duration(copy.name)
+
+
+async def _create_import_session(
+    db: Database,
+    session_id: str,
+    audio_url: str,
+    filename: str,
+    file_size: int,
+    duration_seconds: float,
+) -> None:
+    session_data = {
+        "id": session_id,
+        "user_id": "martun",
+        "duration_seconds": round(duration_seconds),
+        "input_mode": "import",
+        "status": "uploaded",
+        "audio_url": audio_url,
+        "original_filename": filename,
+        "file_size_bytes": file_size,
+    }
+    resp = await db.client.post(
+        f"{BASE_URL}/sessions",
+        headers=HEADERS,
+        json=session_data,
+    )
+    if resp.status_code not in (200, 201):
+        raise HTTPException(status_code=500, detail=f"Session create failed: {resp.text}")
+
+    # Index it now, so search pages order it by its Supabase created_at
+    created = resp.json()
+    if isinstance(created, list) and created and created[0].get("id"):
+        await asyncio.to_thread(search_index.upsert_session, created[0])
 
 
 @router.post("/")
-async def upload_audio(file: UploadFile = File(...)):
+async def upload_audio(file: UploadFile = File(...), db: Database = Depends(get_db)):
     """
     Upload audio file to Supabase Storage and create session record.
 
     Accepts audio files in formats: .wav, .mp3, .m4a, .webm, .ogg
-    Stores file in Supabase Storage bucket 'nomad-audio'
+    Streams the file to Supabase Storage bucket 'nomad-audio' in fixed-size
+    chunks, so memory use does not grow with the recording length
     Creates session record in app_nomad.sessions table
 
     Returns:
@@ -35,12 +121,7 @@ async def upload_audio(file: UploadFile = File(...)):
         file_url: Public URL of uploaded file
     """
     # Validate file extension
-    file_ext = Path(file.filename).suffix.lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
+    file_ext = _validate_extension(file.filename)
 
     # Generate session ID
     session_id = str(uuid.uuid4())
@@ -51,51 +132,181 @@ async def upload_audio(file: UploadFile = File(...)):
     storage_path = f"{user_id}/{session_id}{file_ext}"
 
     try:
-        file_content = await file.read()
-        file_size = len(file_content)
-
-        async with httpx.AsyncClient() as client:
-            # Upload to Supabase Storage bucket "nomad-audio"
-            storage_headers = {
-                "apikey": SUPABASE_SERVICE_KEY,
-                "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
-                "Content-Type": file.content_type or "audio/mpeg",
-            }
-            storage_url = f"{SUPABASE_URL}/storage/v1/object/nomad-audio/{storage_path}"
-            upload_resp = await client.post(
-                storage_url, headers=storage_headers, content=file_content
-            )
-            if upload_resp.status_code not in (200, 201):
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Storage upload failed: {upload_resp.text}"
-                )
-
-            # Build public URL
-            audio_url = f"{SUPABASE_URL}/storage/v1/object/public/nomad-audio/{storage_path}"
-
-            # Create session record
-            session_data = {
-                "id": session_id,
-                "user_id": user_id,
-                "duration_seconds": 0,
-                "input_mode": "import",
-                "status": "uploaded",
-                "audio_url": audio_url,
-                "original_filename": file.filename,
-                "file_size_bytes": file_size,
-            }
-            resp = await client.post(
-                f"{BASE_URL}/sessions",
-                headers=HEADERS,
-                json=session_data,
-            )
-            if resp.status_code not in (200, 201):
-                raise HTTPException(status_code=500, detail=f"Session create failed: {resp.text}")
+        # Upload to Supabase Storage bucket "nomad-audio", hashing as it streams
+        hasher = new_content_hasher()
+        file_size = await storage_service.upload_stream(
+            storage_path,
+            storage_service.iter_reader(file.read),
+            content_type=file.content_type or "audio/mpeg",
+            content_length=file.size,
+            hasher=hasher,
+        )
+
+        # Build public URL
+        audio_url = storage_service.public_url(storage_path)
+        transcript_cache.remember_audio(audio_url, hasher.hexdigest())
+
+        # Create session record
+        duration = await _probe_upload(file, file_ext)
+        await _create_import_session(
+            db, session_id, audio_url, file.filename, file_size, duration
+        )
 
         return {"session_id": session_id, "audio_url": audio_url}
 
     except HTTPException:
         raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=500, detail=f"Storage upload failed: {e.response.text}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+
+# Resumable uploads (TUS-style): create, then PATCH chunks at Upload-Offset,
+# HEAD to recover the offset after a dropped connection.
+
+@router.post("/resumable", status_code=201)
+async def create_resumable_upload(request: Request, response: Response):
+    """
+    Start a resumable upload.
+
+    Headers:
+        Upload-Length: Total size in bytes
+        Upload-Metadata: "filename <base64>,filetype <base64>"
+
+    Returns:
+        upload_id and upload_url; Location header points at the upload
+    """
+    try:
+        length = int(request.headers["Upload-Length"])
+        if length <= 0:
+            raise ValueError
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="Missing or invalid Upload-Length")
+
+    metadata = _parse_upload_metadata(request.headers.get("Upload-Metadata", ""))
+    filename = metadata.get("filename", "")
+    _validate_extension(filename)
+
+    try:
+        upload = resumable_store.create(
+            length, filename, metadata.get("filetype") or "audio/mpeg"
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    upload_url = f"{request.url.path.rstrip('/')}/{upload['id']}"
+    response.headers["Location"] = upload_url
+    response.headers["Tus-Resumable"] = TUS_VERSION
+    response.headers["Upload-Offset"] = "0"
+    return {"upload_id": upload["id"], "upload_url": upload_url}
+
+
+@router.head("/resumable/{upload_id}")
+async def get_resumable_upload_offset(upload_id: str):
+    """Report how many bytes of a resumable upload have been received."""
+    upload = resumable_store.get(upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    return Response(
+        status_code=200,
+        headers={
+            "Upload-Offset": str(upload["offset"]),
+            "Upload-Length": str(upload["length"]),
+            "Tus-Resumable": TUS_VERSION,
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+@router.patch("/resumable/{upload_id}")
+async def append_resumable_upload(
+    upload_id: str, request: Request, db: Database = Depends(get_db)
+):
+    """
+    Append a chunk to a resumable upload.
+
+    The body is streamed to disk as it arrives. When the last byte lands the
+    file is streamed to Supabase Storage and the session record is created.
+
+    Returns:
+        204 with the new Upload-Offset, or 200 with session_id and audio_url
+        once the upload is complete
+    """
+    if request.headers.get("Content-Type") != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Content-Type must be application/offset+octet-stream")
+    try:
+        offset = int(request.headers["Upload-Offset"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="Missing or invalid Upload-Offset")
+
+    upload = resumable_store.get(upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    async with resumable_store.lock(upload_id):
+        try:
+            new_offset = await resumable_store.append(upload, offset, request.stream())
+        except FileNotFoundError:
+            # Completed or cancelled by a request that held the lock first
+            raise HTTPException(status_code=404, detail="Upload not found")
+        except OffsetMismatch as e:
+            raise HTTPException(
+                status_code=409,
+                detail=str(e),
+                headers={"Upload-Offset": str(e.expected)},
+            )
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+
+        headers = {"Upload-Offset": str(new_offset), "Tus-Resumable": TUS_VERSION}
+        if new_offset < upload["length"]:
+            return Response(status_code=204, headers=headers)
+
+        # Upload complete: push to Storage and create the session
+        session_id = str(uuid.uuid4())
+        file_ext = _validate_extension(upload["filename"])
+        storage_path = f"martun/{session_id}{file_ext}"
+
+        try:
+            hasher = new_content_hasher()
+            await storage_service.upload_stream(
+                storage_path,
+                resumable_store.iter_chunks(upload),
+                content_type=upload["content_type"],
+                content_length=upload["length"],
+                hasher=hasher,
+            )
+            audio_url = storage_service.public_url(storage_path)
+            transcript_cache.remember_audio(audio_url, hasher.hexdigest())
+            duration = await _probe_duration(str(resumable_store.data_path(upload_id)))
+            await _create_import_session(
+                db, session_id, audio_url, upload["filename"], upload["length"], duration
+            )
+        except HTTPException:
+            raise
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(status_code=500, detail=f"Storage upload failed: {e.response.text}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+        resumable_store.delete(upload_id)
+
+    return JSONResponse(
+        content={"session_id": session_id, "audio_url": audio_url},
+        headers=headers,
+    )
+
+
+@router.delete("/resumable/{upload_id}", status_code=204)
+async def cancel_resumable_upload(upload_id: str):
+    """Abort a resumable upload and discard the staged bytes."""
+    if resumable_store.get(upload_id) is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    resumable_store.delete(upload_id)
+    return None
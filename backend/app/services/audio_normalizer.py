@@ -0,0 +1,186 @@
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Optional
+from app.config import (
+    FFMPEG_BIN,
+    AUDIO_SAMPLE_RATE,
+    AUDIO_BITRATE,
+    AUDIO_NORMALIZED_DIR,
+    AUDIO_NORMALIZED_TTL_HOURS,
+    AUDIO_STEREO_MODE,
+)
+from app.services.chunking import run_process
+
+# MIME types for the formats accepted by the upload router
+AUDIO_CONTENT_TYPES = {
+    ".wav": "audio/wav",
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".webm": "audio/webm",
+    ".ogg": "audio/ogg",
+}
+
+# Multi-source recordings carry the mic on the left channel and system
+# audio on the right (see docs/ARCHITECTURE.md, Multi-Source Recording)
+STEREO_CHANNELS = (("mic", "c0"), ("system", "c1"))
+
+
+def content_type_for(suffix: str) -> str:
+    return AUDIO_CONTENT_TYPES.get(suffix.lower(), "application/octet-stream")
+
+
+def merge_channels(results: list[tuple[str, dict]]) -> dict:
+    """
+    Interleave per-channel transcripts by time.
+
+    Each segment is tagged with its channel label, so the mic and system
+    sides of a split stereo recording stay apart in the merged transcript.
+
+    Args:
+        results: (channel_label, result) pairs with "text"/"segments" results
+
+    Returns:
+        Result dictionary with "text", "segments" and "duration"
+    """
+    segments = [
+        {**segment, "channel": label}
+        for label, result in results
+        for segment in result.get("segments") or []
+    ]
+    segments.sort(key=lambda s: (s.get("start", 0.0), s["channel"]))
+    for index, segment in enumerate(segments):
+        segment["id"] = index
+
+    merged = {
+        "text": " ".join(s["text"].strip() for s in segments if s.get("text", "").strip()),
+        "segments": segments,
+        "duration": max((r.get("duration") or 0.0 for _, r in results), default=0.0),
+    }
+    language = next((r["language"] for _, r in results if r.get("language")), None)
+    if language:
+        merged["language"] = language
+    return merged
+
+
+class AudioNormalizer:
+    """
+    Transcodes session audio to compact 16 kHz mono Opus with ffmpeg.
+
+    Browser recordings (WebM/Opus at 48 kHz, WAV, M4A) are several times
+    larger than speech engines need. Normalised tracks are cached on disk
+    per session and source hash, so retries and engine fallbacks reuse them
+    instead of downloading and transcoding again.
+    """
+
+    def __init__(
+        self,
+        ffmpeg: str = FFMPEG_BIN,
+        root: str = AUDIO_NORMALIZED_DIR,
+        sample_rate: int = AUDIO_SAMPLE_RATE,
+        bitrate: str = AUDIO_BITRATE,
+        stereo_mode: str = AUDIO_STEREO_MODE,
+        ttl_hours: float = AUDIO_NORMALIZED_TTL_HOURS,
+    ):
+        self.ffmpeg = ffmpeg
+        self.root = Path(root)
+        self.sample_rate = sample_rate
+        self.bitrate = bitrate
+        self.stereo_mode = stereo_mode
+        self.ttl_seconds = ttl_hours * 3600
+
+    @property
+    def available(self) -> bool:
+        return bool(shutil.which(self.ffmpeg))
+
+    def splits(self, mix_mode: Optional[str]) -> bool:
+        """Whether a recording with this mix_mode is transcribed per channel."""
+        return (mix_mode or "mono") != "mono" and self.stereo_mode == "split"
+
+    def track_paths(
+        self, session_id: str, content_hash: str, split: bool
+    ) -> list[tuple[Path, Optional[str]]]:
+        """Cache paths of the normalised tracks, with their channel labels."""
+        stem = f"{session_id}-{content_hash[:16]}"
+        if split:
+            return [(self.root / f"{stem}.{label}.ogg", label) for label, _ in STEREO_CHANNELS]
+        return [(self.root / f"{stem}.ogg", None)]
+
+    def cached(
+        self, session_id: str, content_hash: str, split: bool
+    ) -> Optional[list[tuple[Path, Optional[str]]]]:
+        """Normalised tracks from a previous run, or None if any is missing."""
+        tracks = self.track_paths(session_id, content_hash, split)
+        if not all(path.exists() for path, _ in tracks):
+            return None
+        for path, _ in tracks:
+            path.touch()
+        return tracks
+
+    def _encode_args(self, path: Path) -> list[str]:
+        return [
+            "-vn", "-ac", "1", "-ar", str(self.sample_rate),
+            "-c:a", "libopus", "-b:a", self.bitrate, "-application", "voip",
+            str(path),
+        ]
+
+    async def normalize(
+        self, session_id: str, content_hash: str, source_path: str, split: bool
+    ) -> list[tuple[Path, Optional[str]]]:
+        """
+        Transcode a local audio file into cached mono tracks.
+
+        Args:
+            session_id: Session the audio belongs to
+            content_hash: Hash of the source audio, part of the cache name
+            source_path: Local source file
+            split: Write one track per stereo channel instead of a downmix
+
+        Returns:
+            (path, channel_label) per track; the label is None for a downmix
+        """
+        tracks = self.cached(session_id, content_hash, split)
+        if tracks:
+            return tracks
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.purge_expired()
+        tracks = self.track_paths(session_id, content_hash, split)
+        partials = [path.with_suffix(".part.ogg") for path, _ in tracks]
+
+        args = [self.ffmpeg, "-hide_banner", "-nostats", "-y", "-i", source_path]
+        if split:
+            for (label, channel), partial in zip(STEREO_CHANNELS, partials):
+                args += ["-map", "0:a:0", "-af", f"pan=mono|c0={channel}", *self._encode_args(partial)]
+        else:
+            args += self._encode_args(partials[0])
+
+        try:
+            await run_process(*args)
+            for partial, (path, _) in zip(partials, tracks):
+                os.replace(partial, path)
+        finally:
+            for partial in partials:
+                partial.unlink(missing_ok=True)
+        return tracks
+
+    def purge_expired(self) -> int:
+        """
+        Delete normalised tracks older than the TTL.
+
+        Returns:
+            Number of files deleted
+        """
+        if not self.root.exists():
+            return 0
+        cutoff = time.time() - self.ttl_seconds
+        purged = 0
+        for path in self.root.glob("*.ogg"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    purged += 1
+            except FileNotFoundError:
+                continue
+        return purged
@@ -0,0 +1,340 @@
+import asyncio
+import re
+import shutil
+import tempfile
+from typing import Awaitable, BinaryIO, Callable, Optional
+from app.config import (
+    FFMPEG_BIN,
+    FFPROBE_BIN,
+    CHUNK_MAX_SECONDS,
+    CHUNK_MIN_SECONDS,
+    CHUNK_OVERLAP_SECONDS,
+    CHUNK_CONCURRENCY,
+    CHUNK_MAX_ATTEMPTS,
+    SILENCE_NOISE_DB,
+    SILENCE_MIN_SECONDS,
+)
+from app.services.rate_limiter import EngineRateLimited
+from app.services.transcript_cache import TranscriptCache
+
+# Longest Retry-After a chunk waits out in place before giving up the job
+MAX_CHUNK_RETRY_AFTER = 60.0
+
+SILENCE_START_RE = re.compile(r"silence_start: (-?[\d.]+)")
+SILENCE_END_RE = re.compile(r"silence_end: (-?[\d.]+)")
+
+# Longest word run compared when trimming duplicated text at a hard cut
+MAX_OVERLAP_WORDS = 12
+
+
+async def run_process(*args: str) -> tuple[str, str]:
+    """
+    Run an ffmpeg/ffprobe command without blocking the event loop.
+
+    Returns:
+        (stdout, stderr) decoded as text
+
+    Raises:
+        RuntimeError: If the command exits non-zero
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"{args[0]} failed: {stderr.decode(errors='replace')[-500:]}")
+    return stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
+def parse_silences(ffmpeg_stderr: str) -> list[tuple[float, float]]:
+    """
+    Parse ffmpeg silencedetect output into (start, end) intervals.
+
+    A trailing silence_start without a matching end (silence running to the
+    end of the file) is dropped, since there is nothing to cut after it.
+    """
+    silences = []
+    start = None
+    for line in ffmpeg_stderr.splitlines():
+        match = SILENCE_START_RE.search(line)
+        if match:
+            start = max(float(match.group(1)), 0.0)
+            continue
+        match = SILENCE_END_RE.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def plan_chunks(
+    duration: float,
+    silences: list[tuple[float, float]],
+    max_seconds: float = CHUNK_MAX_SECONDS,
+    min_seconds: float = CHUNK_MIN_SECONDS,
+    overlap_seconds: float = CHUNK_OVERLAP_SECONDS,
+) -> list[tuple[float, float]]:
+    """
+    Split [0, duration] into chunks of at most max_seconds.
+
+    Each cut lands in the middle of the latest silence that leaves the chunk
+    between min_seconds and max_seconds long. When no silence fits, the chunk
+    is cut hard at max_seconds and the next one starts overlap_seconds
+    earlier so no word is lost at the boundary.
+
+    Returns:
+        List of (start, end) times in seconds
+    """
+    midpoints = sorted((s + e) / 2 for s, e in silences)
+    chunks = []
+    start = 0.0
+
+    while duration - start > max_seconds:
+        low, high = start + min_seconds, start + max_seconds
+        candidates = [m for m in midpoints if low <= m <= high]
+        if candidates:
+            cut = candidates[-1]
+            chunks.append((start, cut))
+            start = cut
+        else:
+            chunks.append((start, high))
+            start = high - overlap_seconds
+
+    chunks.append((start, duration))
+    return chunks
+
+
+def normalise_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def dedupe_overlap(previous_text: str, next_text: str) -> str:
+    """
+    Drop the leading words of next_text that repeat the tail of previous_text.
+
+    Returns:
+        next_text without the duplicated prefix
+    """
+    prev_words = [normalise_word(w) for w in previous_text.split()][-MAX_OVERLAP_WORDS:]
+    next_tokens = next_text.split()
+    next_words = [normalise_word(w) for w in next_tokens]
+
+    for size in range(min(len(prev_words), len(next_words)), 0, -1):
+        if prev_words[-size:] == next_words[:size]:
+            return " ".join(next_tokens[size:])
+    return next_text
+
+
+def stitch_segments(chunk_results: list[tuple[float, float, dict]]) -> dict:
+    """
+    Merge per-chunk transcription results into one transcript.
+
+    Segment timestamps are shifted by their chunk's start time. Inside the
+    overlap of a hard cut, segments already covered by the previous chunk are
+    dropped and duplicated words at the seam are trimmed.
+
+    Args:
+        chunk_results: (chunk_start, chunk_end, result) in chunk order, where
+            result has the engine's "text"/"segments" shape
+
+    Returns:
+        Result dictionary with "text", "segments" and "duration"
+    """
+    segments = []
+    previous_end = 0.0
+    language = None
+
+    for chunk_start, chunk_end, result in chunk_results:
+        language = language or result.get("language")
+        chunk_segments = result.get("segments") or []
+        if not chunk_segments and result.get("text", "").strip():
+            chunk_segments = [{"start": 0.0, "end": chunk_end - chunk_start, "text": result["text"]}]
+
+        for segment in chunk_segments:
+            start = segment.get("start", 0.0) + chunk_start
+            end = segment.get("end", 0.0) + chunk_start
+            text = segment.get("text", "")
+
+            in_overlap = chunk_start < previous_end
+            if in_overlap and end <= previous_end:
+                continue
+            if in_overlap and start < previous_end and segments:
+                text = dedupe_overlap(segments[-1]["text"], text)
+                if not text.strip():
+                    continue
+
+            segments.append({
+                **segment,
+                "id": len(segments),
+                "start": round(start, 3),
+                "end": round(end, 3),
+                "text": text,
+            })
+        previous_end = chunk_end
+
+    merged = {
+        "text": " ".join(s["text"].strip() for s in segments if s["text"].strip()),
+        "segments": segments,
+        "duration": chunk_results[-1][1] if chunk_results else 0.0,
+    }
+    if language:
+        merged["language"] = language
+    return merged
+
+
+class AudioChunker:
+    """Splits long recordings at silences using ffmpeg, off the event loop."""
+
+    def __init__(
+        self,
+        ffmpeg: str = FFMPEG_BIN,
+        ffprobe: str = FFPROBE_BIN,
+        max_seconds: float = CHUNK_MAX_SECONDS,
+        min_seconds: float = CHUNK_MIN_SECONDS,
+        overlap_seconds: float = CHUNK_OVERLAP_SECONDS,
+        concurrency: int = CHUNK_CONCURRENCY,
+        max_attempts: int = CHUNK_MAX_ATTEMPTS,
+    ):
+        self.ffmpeg = ffmpeg
+        self.ffprobe = ffprobe
+        self.max_seconds = max_seconds
+        self.min_seconds = min_seconds
+        self.overlap_seconds = overlap_seconds
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+
+    @property
+    def available(self) -> bool:
+        return bool(shutil.which(self.ffmpeg) and shutil.which(self.ffprobe))
+
+    async def probe_duration(self, path: str) -> float:
+        stdout, _ = await run_process(
+            self.ffprobe, "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            path,
+        )
+        return float(stdout.strip())
+
+    async def detect_silences(self, path: str) -> list[tuple[float, float]]:
+        _, stderr = await run_process(
+            self.ffmpeg, "-hide_banner", "-nostats", "-i", path,
+            "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}",
+            "-f", "null", "-",
+        )
+        return parse_silences(stderr)
+
+    async def plan(self, path: str) -> list[tuple[float, float]]:
+        """
+        Plan chunk boundaries for a local audio file.
+
+        Silence detection is skipped for recordings short enough to send whole.
+        """
+        duration = await self.probe_duration(path)
+        if duration <= self.max_seconds:
+            return [(0.0, duration)]
+        silences = await self.detect_silences(path)
+        return plan_chunks(
+            duration, silences, self.max_seconds, self.min_seconds, self.overlap_seconds
+        )
+
+    async def extract(self, path: str, start: float, end: float) -> BinaryIO:
+        """
+        Cut [start, end] out of a normalised Opus track into a temp file.
+
+        The track is already 16 kHz mono Opus, so the packets are copied
+        rather than decoded and re-encoded.
+
+        Returns:
+            Named temp file positioned at offset 0 (caller closes it)
+        """
+        piece = tempfile.NamedTemporaryFile(suffix=".ogg")
+        try:
+            await run_process(
+                self.ffmpeg, "-hide_banner", "-nostats", "-y",
+                "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", path,
+                "-c", "copy",
+                piece.name,
+            )
+            piece.seek(0)
+            return piece
+        except BaseException:
+            piece.close()
+            raise
+
+    async def transcribe(
+        self,
+        path: str,
+        transcribe_piece: Callable[[BinaryIO, str, str], Awaitable[dict]],
+        cache: Optional[TranscriptCache] = None,
+        cache_key: Optional[Callable[[float, float], str]] = None,
+    ) -> dict:
+        """
+        Transcribe a local file chunk by chunk with bounded fan-out.
+
+        Each chunk is retried up to max_attempts times, so one transient
+        engine error does not lose the whole job. A 429 is retried after its
+        Retry-After if that is short; otherwise it propagates so the job
+        goes back to the queue. The first chunk to fail cancels the others,
+        so they stop spending engine quota on a job that will be retried.
+
+        Args:
+            path: Local normalised (Opus in Ogg) audio track
+            transcribe_piece: Engine call taking (file, filename, content_type)
+                and returning a "text"/"segments" result
+            cache: Transcript cache for finished chunks of split recordings,
+                so a retried job only pays for the chunks it is missing
+            cache_key: Cache key of the chunk (start, end) of this track
+
+        Returns:
+            Stitched result with absolute segment timestamps
+        """
+        chunks = await self.plan(path)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        cached = cache is not None and cache_key is not None and len(chunks) > 1
+
+        async def open_piece(start: float, end: float) -> BinaryIO:
+            # A recording sent whole needs no cut
+            if len(chunks) == 1:
+                return open(path, "rb")
+            return await self.extract(path, start, end)
+
+        async def attempt_piece(start: float, end: float) -> dict:
+            with await open_piece(start, end) as piece:
+                for attempt in range(self.max_attempts):
+                    try:
+                        piece.seek(0)
+                        return await transcribe_piece(piece, "chunk.ogg", "audio/ogg")
+                    except EngineRateLimited as e:
+                        if attempt == self.max_attempts - 1 or e.retry_after > MAX_CHUNK_RETRY_AFTER:
+                            raise
+                        await asyncio.sleep(e.retry_after)
+                    except Exception:
+                        if attempt == self.max_attempts - 1:
+                            raise
+                        await asyncio.sleep(2 ** attempt)
+
+        async def run(start: float, end: float) -> dict:
+            if cached:
+                result = await asyncio.to_thread(cache.get, cache_key(start, end))
+                if result is not None:
+                    return result
+            async with semaphore:
+                result = await attempt_piece(start, end)
+            if cached:
+                await asyncio.to_thread(cache.put, cache_key(start, end), result)
+            return result
+
+        tasks = [asyncio.create_task(run(start, end)) for start, end in chunks]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        results = [task.result() for task in tasks]
+        return stitch_segments([
+            (start, end, result) for (start, end), result in zip(chunks, results)
+        ])
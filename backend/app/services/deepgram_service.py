@@ -0,0 +1,281 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable, Optional
+from urllib.parse import urlencode, urlparse
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake, InvalidURI
+from app.config import (
+    DEEPGRAM_API_KEY,
+    DEEPGRAM_MODEL,
+    DEEPGRAM_API_URL,
+    DEEPGRAM_WS_URL,
+)
+from app.db import Database
+from app.services.storage_service import StorageService
+from app.services.audio_normalizer import (
+    AudioNormalizer,
+    STEREO_CHANNELS,
+    content_type_for,
+    merge_channels,
+)
+from app.services.rate_limiter import EngineUnavailable, raise_for_engine_status
+from app.services.transcripts import transcribe_cached
+from app.services.transcript_cache import TranscriptCache, transcript_cache
+
+logger = logging.getLogger(__name__)
+
+OPEN_TIMEOUT = 10.0
+
+
+def _words(alternative: dict) -> list[dict]:
+    return [
+        {"word": w.get("punctuated_word") or w["word"], "start": w["start"], "end": w["end"]}
+        for w in alternative.get("words") or []
+    ]
+
+
+def _segments(utterances: list[dict]) -> list[dict]:
+    return [
+        {"id": index, "start": u["start"], "end": u["end"], "text": u["transcript"].strip()}
+        for index, u in enumerate(utterances)
+        if u.get("transcript", "").strip()
+    ]
+
+
+def build_result(payload: dict, language: Optional[str] = None) -> dict:
+    """
+    Convert a pre-recorded /v1/listen response to the engine result shape.
+
+    Utterances become segments; without them the whole channel is one
+    segment. With multichannel audio, channels are merged and their
+    segments tagged like a split stereo recording.
+
+    Returns:
+        Result dictionary with "text", "segments", "words" and "duration"
+    """
+    results = payload.get("results") or {}
+    channels = results.get("channels") or []
+    duration = (payload.get("metadata") or {}).get("duration") or 0.0
+    utterances = results.get("utterances")
+
+    per_channel = []
+    for index, channel in enumerate(channels):
+        alternative = (channel.get("alternatives") or [{}])[0]
+        words = _words(alternative)
+        text = alternative.get("transcript", "").strip()
+        if utterances is not None:
+            segments = _segments([u for u in utterances if u.get("channel", 0) == index])
+        elif text:
+            segments = [{
+                "id": 0,
+                "start": words[0]["start"] if words else 0.0,
+                "end": words[-1]["end"] if words else duration,
+                "text": text,
+            }]
+        else:
+            segments = []
+        per_channel.append({
+            "text": text,
+            "segments": segments,
+            "words": words,
+            "duration": duration,
+            "language": channel.get("detected_language") or language,
+        })
+
+    if len(per_channel) == 1:
+        return per_channel[0]
+    labels = [label for label, _ in STEREO_CHANNELS]
+    return merge_channels(list(zip(labels, per_channel)))
+
+
+class DeepgramService:
+    """
+    Deepgram Nova transcription, pre-recorded and streaming.
+
+    Batch jobs stream the stored recording to /v1/listen in one request and
+    share the transcript cache and session write with the other engines.
+    Stereo recordings in split mode are sent once with multichannel=true
+    instead of as two tracks. Live capture opens a DeepgramStream on the
+    same path over WSS.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        api_key: str = DEEPGRAM_API_KEY,
+        model: str = DEEPGRAM_MODEL,
+        api_url: str = DEEPGRAM_API_URL,
+        ws_url: str = DEEPGRAM_WS_URL,
+        cache: TranscriptCache = transcript_cache,
+    ):
+        self.db = db
+        self.storage = StorageService(db)
+        self.normalizer = AudioNormalizer()
+        self.cache = cache
+        self.api_key = api_key
+        self.model = model
+        self.api_url = api_url
+        self.ws_url = ws_url
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Token {self.api_key}"}
+
+    def _params(self, language: Optional[str], **extra) -> dict:
+        params = {"model": self.model, "smart_format": "true", "punctuate": "true", **extra}
+        if language:
+            params["language"] = language
+        else:
+            params["detect_language"] = "true"
+        return params
+
+    async def transcribe(
+        self,
+        session_id: str,
+        audio_url: str,
+        language: Optional[str] = None,
+        mix_mode: Optional[str] = "mono",
+    ) -> dict:
+        if not self.api_key:
+            raise ValueError("DEEPGRAM_API_KEY is not configured")
+        split = self.normalizer.splits(mix_mode)
+        variant = f"{self.model}+split" if split else self.model
+
+        async def run(audio_file: BinaryIO, content_hash: str) -> dict:
+            suffix = Path(urlparse(audio_url).path).suffix.lower()
+            return await self._call_listen(audio_file, content_type_for(suffix), language, split)
+
+        return await transcribe_cached(
+            self.db, self.cache, self.storage, session_id, audio_url,
+            lambda content_hash: self.cache.key(content_hash, "deepgram", variant, language),
+            run,
+        )
+
+    async def _call_listen(
+        self,
+        audio_file: BinaryIO,
+        content_type: str,
+        language: Optional[str] = None,
+        multichannel: bool = False,
+    ) -> dict:
+        params = self._params(language, utterances="true")
+        if multichannel:
+            params["multichannel"] = "true"
+
+        async def read(n: int) -> bytes:
+            return await asyncio.to_thread(audio_file.read, n)
+
+        response = await self.db.client.post(
+            self.api_url,
+            params=params,
+            headers={**self.headers, "Content-Type": content_type},
+            content=self.storage.iter_reader(read),
+            timeout=300.0,
+        )
+        raise_for_engine_status(response, "deepgram")
+        return build_result(response.json(), language)
+
+    def stream(
+        self, language: Optional[str], on_event: Callable[[dict], Awaitable[None]]
+    ) -> "DeepgramStream":
+        """Live session for containerised audio chunks (e.g. MediaRecorder webm)."""
+        if not self.api_key:
+            raise ValueError("DEEPGRAM_API_KEY is not configured")
+        params = self._params(language, interim_results="true")
+        return DeepgramStream(f"{self.ws_url}?{urlencode(params)}", self.headers, on_event)
+
+
+class DeepgramStream:
+    """
+    One streaming /v1/listen connection.
+
+    Audio chunks are forwarded as they arrive; interim results are pushed
+    as partial text and final results are committed as segments. Sending
+    waits on the socket's write buffer, so a slow upstream slows the
+    client down instead of queueing audio in memory.
+
+        Client → Deepgram: binary audio, then JSON {"type": "CloseStream"}
+        Deepgram → Client: JSON {"type": "Results", "start", "duration",
+                           "is_final", "channel": {"alternatives": [...]}}
+        Deepgram → Client: JSON {"type": "Metadata", "duration"} on close
+    """
+
+    def __init__(self, url: str, headers: dict, on_event: Callable[[dict], Awaitable[None]]):
+        self.url = url
+        self.headers = headers
+        self.on_event = on_event
+        self.segments: list[dict] = []
+        self.words: list[dict] = []
+        self.duration = 0.0
+        self._websocket: Optional[ClientConnection] = None
+        self._receiver: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """
+        Raises:
+            EngineUnavailable: If Deepgram cannot be reached
+        """
+        try:
+            self._websocket = await connect(
+                self.url, additional_headers=self.headers, open_timeout=OPEN_TIMEOUT
+            )
+        except (OSError, asyncio.TimeoutError, InvalidHandshake, InvalidURI) as e:
+            raise EngineUnavailable("deepgram", f"Deepgram streaming unreachable: {e}")
+        self._receiver = asyncio.create_task(self._receive())
+
+    async def feed(self, chunk: bytes) -> None:
+        await self._websocket.send(chunk)
+
+    async def wait_for_capacity(self) -> None:
+        # feed() already waits for the socket to drain
+        return None
+
+    async def _receive(self) -> None:
+        async for message in self._websocket:
+            event = json.loads(message)
+            if event.get("type") == "Metadata":
+                self.duration = max(self.duration, event.get("duration") or 0.0)
+            elif event.get("type") == "Results":
+                await self._on_results(event)
+
+    async def _on_results(self, event: dict) -> None:
+        alternative = (event.get("channel", {}).get("alternatives") or [{}])[0]
+        text = alternative.get("transcript", "").strip()
+        start = event.get("start", 0.0)
+        end = start + event.get("duration", 0.0)
+        self.duration = max(self.duration, end)
+        if not text:
+            return
+        if not event.get("is_final"):
+            await self.on_event({"type": "transcript", "text": text, "is_final": False})
+            return
+        self.segments.append({"id": len(self.segments), "start": start, "end": end, "text": text})
+        self.words += _words(alternative)
+        await self.on_event({
+            "type": "transcript",
+            "text": text,
+            "is_final": True,
+            "start": round(start, 3),
+            "end": round(end, 3),
+        })
+
+    async def finish(self) -> dict:
+        """Flush the stream and return everything committed."""
+        if self._websocket is not None:
+            try:
+                await self._websocket.send(json.dumps({"type": "CloseStream"}))
+            except ConnectionClosed:
+                pass
+            try:
+                await self._receiver
+            except (ConnectionClosed, ValueError) as e:
+                logger.warning("Deepgram stream ended abnormally: %s", e)
+            await self._websocket.close()
+        return {
+            "text": " ".join(s["text"] for s in self.segments),
+            "segments": self.segments,
+            "words": self.words,
+            "duration": self.duration,
+        }
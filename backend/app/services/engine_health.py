@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from typing import Optional
+import httpx
+from app.config import (
+    GROQ_API_KEY,
+    DEEPGRAM_API_KEY,
+    WYNONA_HOST,
+    WYNONA_PORT,
+    ENGINE_PROBE_INTERVAL_SECONDS,
+    ENGINE_PROBE_TIMEOUT,
+    ENGINE_PROBE_WINDOW,
+    ENGINE_HEALTH_TTL_SECONDS,
+)
+from app.db import Database, database
+
+logger = logging.getLogger(__name__)
+
+# Engines sharing an upstream share its probe
+ENGINE_PROVIDERS = {
+    "groq-turbo": "groq",
+    "groq-large": "groq",
+    "deepgram": "deepgram",
+    "wynona": "wynona",
+}
+
+
+def default_probe_targets() -> dict:
+    """
+    Lightweight reachability checks per provider: (url, headers), or None
+    when the provider is not configured.
+
+    Groq and Deepgram are probed on cheap authenticated listing endpoints,
+    so a bad API key shows up as offline too.
+    """
+    return {
+        "groq": (
+            "https://api.groq.com/openai/v1/models",
+            {"Authorization": f"Bearer {GROQ_API_KEY}"},
+        ) if GROQ_API_KEY else None,
+        "deepgram": (
+            "https://api.deepgram.com/v1/projects",
+            {"Authorization": f"Token {DEEPGRAM_API_KEY}"},
+        ) if DEEPGRAM_API_KEY else None,
+        "wynona": (f"http://{WYNONA_HOST}:{WYNONA_PORT}/health", {}) if WYNONA_HOST else None,
+    }
+
+
+class ProviderHealth:
+    """Latest status plus rolling latency/availability for one provider."""
+
+    def __init__(self, window: int):
+        self.status = "unknown"
+        self.checked_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+        self.latencies: deque = deque(maxlen=window)
+        self.results: deque = deque(maxlen=window)
+
+    def record(self, online: bool, latency: float, error: Optional[str] = None) -> None:
+        self.status = "online" if online else "offline"
+        self.checked_at = time.time()
+        self.results.append(online)
+        if online:
+            self.latencies.append(latency)
+            self.consecutive_failures = 0
+            self.last_error = None
+        else:
+            self.consecutive_failures += 1
+            self.last_error = error
+
+    def snapshot(self, ttl_seconds: float) -> dict:
+        latencies = sorted(self.latencies)
+        age = time.time() - self.checked_at if self.checked_at else None
+        return {
+            "status": self.status,
+            "checked_at": self.checked_at,
+            "stale": age is None or age > ttl_seconds,
+            "latency_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+            "latency_p95_ms": (
+                round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000, 1)
+                if latencies else None
+            ),
+            "availability": round(statistics.fmean(self.results), 3) if self.results else None,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+
+class EngineHealthProber:
+    """
+    Background task probing every engine on an interval.
+
+    Readers never wait on a probe: status() and snapshot() answer from the
+    cache, and a stale cache (older than ttl_seconds) triggers one refresh
+    in the background (stale-while-revalidate).
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        targets: Optional[dict] = None,
+        interval_seconds: float = ENGINE_PROBE_INTERVAL_SECONDS,
+        timeout: float = ENGINE_PROBE_TIMEOUT,
+        window: int = ENGINE_PROBE_WINDOW,
+        ttl_seconds: float = ENGINE_HEALTH_TTL_SECONDS,
+    ):
+        self.db = db
+        self.targets = targets if targets is not None else default_probe_targets()
+        self.interval_seconds = interval_seconds
+        self.timeout = timeout
+        self.ttl_seconds = ttl_seconds
+        self.health = {provider: ProviderHealth(window) for provider in self.targets}
+        self._task: Optional[asyncio.Task] = None
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def probe(self, provider: str) -> str:
+        """Check one provider now and record the result."""
+        health = self.health[provider]
+        target = self.targets.get(provider)
+        if target is None:
+            health.record(False, 0.0, "not configured")
+            return health.status
+
+        url, headers = target
+        started = time.perf_counter()
+        try:
+            response = await self.db.client.get(url, headers=headers, timeout=self.timeout)
+            latency = time.perf_counter() - started
+            # 429 still proves the engine is up; the limiter handles the rate
+            online = response.is_success or response.status_code == 429
+            health.record(online, latency, None if online else f"HTTP {response.status_code}")
+        except httpx.HTTPError as e:
+            health.record(False, time.perf_counter() - started, type(e).__name__)
+        return health.status
+
+    async def refresh(self) -> None:
+        """Probe all providers concurrently."""
+        await asyncio.gather(*(self.probe(provider) for provider in self.targets))
+
+    def _is_stale(self) -> bool:
+        now = time.time()
+        return any(
+            h.checked_at is None or now - h.checked_at > self.ttl_seconds
+            for h in self.health.values()
+        )
+
+    def revalidate(self) -> None:
+        """Start a background refresh if the cache is stale and none is running."""
+        if self._is_stale() and (self._refresh is None or self._refresh.done()):
+            self._refresh = asyncio.get_running_loop().create_task(self.refresh())
+
+    async def status(self, engine: str) -> str:
+        """Cached status of an engine: "online", "offline" or "unknown"."""
+        self.revalidate()
+        health = self.health.get(ENGINE_PROVIDERS.get(engine, engine))
+        return health.status if health else "unknown"
+
+    def snapshot(self, engine: str) -> dict:
+        health = self.health.get(ENGINE_PROVIDERS.get(engine, engine))
+        if health is None:
+            return {"status": "unknown"}
+        return health.snapshot(self.ttl_seconds)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Engine health probe failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._refresh):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *(t for t in (self._task, self._refresh) if t is not None), return_exceptions=True
+        )
+        self._task = None
+        self._refresh = None
+
+
+engine_health = EngineHealthProber(database)
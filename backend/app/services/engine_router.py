@@ -0,0 +1,122 @@
+from typing import Awaitable, Callable, Optional
+from app.config import (
+    GROQ_API_KEY,
+    DEEPGRAM_API_KEY,
+    WYNONA_HOST,
+    ENGINE_SPEED_FACTORS,
+    AUTO_MAX_WAIT_SECONDS,
+)
+from app.services.queue_manager import QueueManager
+
+# Engine catalogue shared by /engines/status and the auto router
+ENGINES = {
+    "groq-turbo": {"name": "Groq Whisper Turbo", "cost_per_hour": 0.04},
+    "groq-large": {"name": "Groq Whisper Large v3", "cost_per_hour": 0.11},
+    "deepgram": {"name": "Deepgram Nova-3", "cost_per_hour": 0.46},
+    "wynona": {"name": "WYNONA WhisperX", "cost_per_hour": 0.0},
+}
+
+# Engines "auto" chooses between, in preference order for batch jobs
+# (docs/ARCHITECTURE.md): WYNONA when online, else Groq, else Deepgram.
+# Live recordings prefer Deepgram over Groq.
+AUTO_CANDIDATES = ("wynona", "groq-turbo", "deepgram")
+AUTO_CANDIDATES_LIVE = ("wynona", "deepgram", "groq-turbo")
+
+
+class EngineRouter:
+    """
+    Resolves the "auto" engine for a transcription job.
+
+    Candidates are filtered by availability (API key configured, cached
+    health not offline, WYNONA confirmed online), then the cheapest one (or, for
+    live recordings, the most preferred one) whose estimated completion
+    time fits AUTO_MAX_WAIT_SECONDS wins. The estimate is the engine's
+    queued audio plus this recording, times its speed factor. When none
+    fits, the fastest estimate wins.
+    """
+
+    def __init__(
+        self,
+        queue: QueueManager,
+        health_check: Callable[[str], Awaitable[str]],
+        enabled: Optional[dict] = None,
+        speed_factors: dict = ENGINE_SPEED_FACTORS,
+        max_wait_seconds: float = AUTO_MAX_WAIT_SECONDS,
+    ):
+        self.queue = queue
+        self.health_check = health_check
+        self.enabled = enabled if enabled is not None else {
+            "groq-turbo": bool(GROQ_API_KEY),
+            "groq-large": bool(GROQ_API_KEY),
+            "deepgram": bool(DEEPGRAM_API_KEY),
+            "wynona": bool(WYNONA_HOST),
+        }
+        self.speed_factors = speed_factors
+        self.max_wait_seconds = max_wait_seconds
+
+    async def available(self, engine: str) -> bool:
+        """
+        Whether an engine can take a job now.
+
+        Cloud engines only need their key and no failed probe; WYNONA sleeps
+        most of the time, so it must be known to be online.
+        """
+        if not self.enabled.get(engine):
+            return False
+        status = await self.health_check(engine)
+        if engine == "wynona":
+            return status == "online"
+        return status != "offline"
+
+    def estimate_seconds(self, engine: str, duration_seconds: float, backlog: dict) -> float:
+        queued = backlog.get(engine, {}).get("audio_seconds", 0)
+        return (queued + duration_seconds) * self.speed_factors.get(engine, 1.0)
+
+    async def route(self, duration_seconds: float = 0, input_mode: Optional[str] = None) -> dict:
+        """
+        Pick an engine for one recording.
+
+        Args:
+            duration_seconds: Length of the recording (0 if unknown)
+            input_mode: Session input mode ("live" prefers streaming engines)
+
+        Returns:
+            {"engine", "reason", "estimates"} where estimates maps each
+            available candidate to its estimated completion in seconds
+
+        Raises:
+            ValueError: If no engine is available
+        """
+        live = input_mode == "live"
+        order = AUTO_CANDIDATES_LIVE if live else AUTO_CANDIDATES
+        backlog = self.queue.backlog()
+        estimates = {
+            engine: round(self.estimate_seconds(engine, duration_seconds or 0, backlog), 1)
+            for engine in order
+            if await self.available(engine)
+        }
+        if not estimates:
+            raise ValueError("No transcription engine available for auto routing")
+
+        skipped = [engine for engine in order if engine not in estimates]
+        if live:
+            ranked = sorted(estimates, key=order.index)
+        else:
+            ranked = sorted(estimates, key=lambda e: (ENGINES[e]["cost_per_hour"], order.index(e)))
+        within = [e for e in ranked if estimates[e] <= self.max_wait_seconds]
+
+        if within:
+            engine = within[0]
+            preferred = "preferred live" if live else "cheapest"
+            reason = f"{engine} is the {preferred} engine within {self.max_wait_seconds:.0f}s"
+            slower = [e for e in ranked if e not in within]
+            if slower:
+                reason += f" ({', '.join(slower)} backlog too long)"
+        else:
+            engine = min(estimates, key=estimates.get)
+            reason = f"no engine within {self.max_wait_seconds:.0f}s, {engine} is fastest"
+        reason += f", est. {estimates[engine]:.0f}s"
+        if skipped:
+            reason += f"; unavailable: {', '.join(skipped)}"
+
+        return {"engine": engine, "reason": reason, "estimates": estimates}
@@ -1,71 +1,150 @@
-import httpx
-from app.config import GROQ_API_KEY, SUPABASE_URL, SUPABASE_SERVICE_KEY
-
-HEADERS = {
-    "apikey": SUPABASE_SERVICE_KEY,
-    "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation",
-    "Accept-Profile": "app_nomad",
-    "Content-Profile": "app_nomad",
+from pathlib import Path
+from typing import BinaryIO, Optional
+from urllib.parse import urlparse
+from app.config import GROQ_API_KEY
+from app.db import Database
+from app.services.storage_service import StorageService
+from app.services.chunking import AudioChunker
+from app.services.audio_normalizer import AudioNormalizer, content_type_for, merge_channels
+from app.services.rate_limiter import raise_for_engine_status
+from app.services.transcripts import transcribe_cached
+from app.services.transcript_cache import TranscriptCache, transcript_cache
+
+MODELS = {
+    "groq-turbo": "whisper-large-v3-turbo",
+    "groq-large": "whisper-large-v3",
 }
-BASE_URL = f"{SUPABASE_URL}/rest/v1"
 
 
 class GroqService:
 
-    def __init__(self):
+    def __init__(self, db: Database, cache: TranscriptCache = transcript_cache):
+        self.db = db
+        self.cache = cache
+        self.storage = StorageService(db)
+        self.chunker = AudioChunker()
+        self.normalizer = AudioNormalizer()
         self.api_key = GROQ_API_KEY
         self.api_url = "https://api.groq.com/openai/v1/audio/transcriptions"
 
-    async def transcribe(self, session_id: str, audio_url: str, engine: str = "groq-turbo") -> dict:
+    async def transcribe(
+        self,
+        session_id: str,
+        audio_url: str,
+        engine: str = "groq-turbo",
+        language: Optional[str] = None,
+        mix_mode: Optional[str] = "mono",
+    ) -> dict:
         if not self.api_key:
             raise ValueError("GROQ_API_KEY is not configured")
+        split = self.normalizer.splits(mix_mode)
+        # With ffmpeg available, audio is transcoded to compact mono tracks
+        # and long recordings are split at silences and transcribed
+        # concurrently; tracks normalised by an earlier attempt are reused.
+        processed = self.chunker.available
+
+        def cache_key(content_hash: str) -> str:
+            return self._cache_key(content_hash, engine, language, split)
+
+        async def reuse_tracks(content_hash: str) -> Optional[dict]:
+            tracks = self.normalizer.cached(session_id, content_hash, split)
+            if not tracks:
+                return None
+            return await self._transcribe_tracks(tracks, engine, language, cache_key(content_hash))
+
+        async def run(audio_file: BinaryIO, content_hash: str) -> dict:
+            if processed:
+                tracks = await self.normalizer.normalize(
+                    session_id, content_hash, audio_file.name, split
+                )
+                return await self._transcribe_tracks(
+                    tracks, engine, language, cache_key(content_hash)
+                )
+            suffix = Path(urlparse(audio_url).path).suffix.lower()
+            return await self._call_groq_api(
+                audio_file, engine, f"audio{suffix}", content_type_for(suffix), language
+            )
+
+        return await transcribe_cached(
+            self.db, self.cache, self.storage, session_id, audio_url,
+            cache_key, run, named=processed, reuse=reuse_tracks,
+        )
+
+    async def _transcribe_tracks(
+        self,
+        tracks: list[tuple[Path, Optional[str]]],
+        engine: str,
+        language: Optional[str],
+        key: str,
+    ) -> dict:
+        # Chunks of split recordings are cached under the recording's key, so
+        # a retried job does not pay again for the ones that succeeded
+        results = []
+        for path, label in tracks:
+            result = await self.chunker.transcribe(
+                str(path),
+                lambda piece, filename, content_type: self._call_groq_api(
+                    piece, engine, filename, content_type, language
+                ),
+                cache=self.cache,
+                cache_key=lambda start, end: f"{key}:{label or 'mix'}:{start:.3f}-{end:.3f}",
+            )
+            results.append((label, result))
 
-        audio_data = await self._download_audio(audio_url)
-        result = await self._call_groq_api(audio_data, engine)
-        await self._store_transcript(session_id, result)
-        return result
+        if len(results) == 1 and results[0][0] is None:
+            return results[0][1]
+        return merge_channels(results)
 
-    async def _download_audio(self, audio_url: str) -> bytes:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(audio_url)
-            response.raise_for_status()
-            return response.content
+    def _cache_key(
+        self, content_hash: str, engine: str, language: Optional[str], split: bool
+    ) -> str:
+        model = self._model_for(engine)
+        if split:
+            model = f"{model}+split"
+        return self.cache.key(content_hash, engine, model, language)
 
-    async def _call_groq_api(self, audio_data: bytes, engine: str) -> dict:
-        model = "whisper-large-v3-turbo" if engine == "groq-turbo" else "whisper-large-v3"
+    async def transcribe_window(
+        self, audio_file: BinaryIO, language: Optional[str] = None, engine: str = "groq-turbo"
+    ) -> dict:
+        """
+        Transcribe a short in-memory WAV window (live mode), with word timestamps.
+
+        Nothing is cached or stored; the caller assembles the transcript.
+        """
+        if not self.api_key:
+            raise ValueError("GROQ_API_KEY is not configured")
+        return await self._call_groq_api(
+            audio_file, engine, "window.wav", "audio/wav", language, word_timestamps=True
+        )
+
+    def _model_for(self, engine: str) -> str:
+        return MODELS.get(engine, MODELS["groq-large"])
+
+    async def _call_groq_api(
+        self,
+        audio_file: BinaryIO,
+        engine: str,
+        filename: str = "audio.ogg",
+        content_type: str = "audio/ogg",
+        language: Optional[str] = None,
+        word_timestamps: bool = False,
+    ) -> dict:
+        model = self._model_for(engine)
 
         headers = {"Authorization": f"Bearer {self.api_key}"}
-        files = {"file": ("audio.mp3", audio_data, "audio/mpeg")}
+        files = {"file": (filename, audio_file, content_type)}
         data = {
             "model": model,
             "response_format": "verbose_json",
             "temperature": 0.0,
         }
+        if language:
+            data["language"] = language
+        if word_timestamps:
+            data["timestamp_granularities[]"] = ["word", "segment"]
 
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response = await client.post(
-                self.api_url, headers=headers, files=files, data=data
-            )
-            response.raise_for_status()
-            return response.json()
-
-    async def _store_transcript(self, session_id: str, result: dict) -> None:
-        transcript_text = result.get("text", "")
-        segments = result.get("segments", [])
-        word_count = len(transcript_text.split()) if transcript_text else 0
-
-        async with httpx.AsyncClient() as client:
-            resp = await client.patch(
-                f"{BASE_URL}/sessions?id=eq.{session_id}",
-                headers=HEADERS,
-                json={
-                    "transcript": transcript_text,
-                    "transcript_segments": segments,
-                    "transcript_words": word_count,
-                    "status": "transcribed",
-                },
-            )
-            if resp.status_code not in (200, 204):
-                raise Exception(f"Failed to update session {session_id}: {resp.text}")
+        response = await self.db.client.post(
+            self.api_url, headers=headers, files=files, data=data, timeout=300.0
+        )
+        raise_for_engine_status(response, engine)
+        return response.json()
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+from app.config import (
+    QUEUE_CONCURRENCY, QUEUE_LEASE_SECONDS, QUEUE_POLL_SECONDS, QUEUE_MAX_PARK_SECONDS,
+)
+from app.services.queue_manager import QueueManager
+from app.services.rate_limiter import EngineRateLimited, EngineUnavailable, LimiterRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """
+    Pool of asyncio workers draining the durable QueueManager.
+
+    Each worker slot leases one job at a time, keeps the lease alive with
+    heartbeats while the handler runs, then completes or fails the job.
+    Errors of a permanent type fail the job immediately; anything else is
+    retried with the queue's backoff.
+
+    Queue calls are SQLite writes that may wait on the file lock, so they
+    run in a thread rather than on the event loop.
+
+    Before a job starts, its engine's limiter must grant a slot; throttled
+    jobs, and jobs whose engine answers 429, go back to the queue until the
+    limiter (or Retry-After) allows them, without using up an attempt.
+    Jobs whose engine is unavailable are parked the same way, or moved to
+    a fallback engine. Parking is capped: once a job has been parked for
+    max_park_seconds, each further try counts as a failed attempt, so an
+    engine that never comes back eventually fails the job.
+    """
+
+    def __init__(
+        self,
+        queue: QueueManager,
+        handler: Callable[[dict], Awaitable[None]],
+        concurrency: int = QUEUE_CONCURRENCY,
+        lease_seconds: float = QUEUE_LEASE_SECONDS,
+        poll_seconds: float = QUEUE_POLL_SECONDS,
+        permanent_errors: tuple = (ValueError, NotImplementedError),
+        limiters: Optional[LimiterRegistry] = None,
+        max_park_seconds: float = QUEUE_MAX_PARK_SECONDS,
+    ):
+        self.queue = queue
+        self.limiters = limiters or LimiterRegistry({})
+        self.handler = handler
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.permanent_errors = permanent_errors
+        self.max_park_seconds = max_park_seconds
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Recover stale leases and start the worker slots."""
+        if self._tasks:
+            return
+        recovered = await asyncio.to_thread(self.queue.recover_stale_leases)
+        if recovered:
+            logger.info("Requeued %d transcription jobs with stale leases", recovered)
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(f"worker-{slot}"))
+            for slot in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Cancel the worker slots.
+
+        In-flight jobs keep their lease and are picked up again once it
+        expires, or straight away when the next process starts.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers immediately after a job is enqueued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _wait_for_work(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _heartbeat(self, job: dict) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await asyncio.to_thread(
+                self.queue.heartbeat, job["id"], job["lease_owner"], self.lease_seconds
+            ):
+                logger.warning("Transcription job %s lost its lease", job["id"])
+                return
+
+    async def _run(self, worker_id: str) -> None:
+        while True:
+            job = await asyncio.to_thread(self.queue.lease, worker_id, self.lease_seconds)
+            if job is None:
+                await self._wait_for_work()
+                continue
+            await self.run_job(job)
+
+    async def _throttle(self, job: dict, delay: float, reason: str, **meta) -> None:
+        await asyncio.to_thread(self.queue.release, job["id"], job["lease_owner"], delay)
+        await asyncio.to_thread(self.queue.update_meta, job["id"], throttled=reason, **meta)
+
+    async def _park(self, job: dict, error: EngineUnavailable) -> None:
+        parked_since = job["meta"].get("parked_since") or time.time()
+        parked = time.time() - parked_since
+        if parked < self.max_park_seconds:
+            await self._throttle(job, error.retry_after, str(error), parked_since=parked_since)
+            return
+        status = await asyncio.to_thread(
+            self.queue.fail, job["id"], job["lease_owner"], f"{error} (parked for {parked:.0f}s)"
+        )
+        logger.warning(
+            "Transcription job %s parked for %.0fs, attempt %d counted (%s): %s",
+            job["id"], parked, job["attempts"], status, error,
+        )
+
+    async def run_job(self, job: dict) -> None:
+        """Run the handler for one leased job and record the outcome."""
+        engine = job["engine"]
+        audio_seconds = job["meta"].get("duration_seconds") or 0
+        wait = self.limiters.try_acquire(engine, audio_seconds)
+        if wait > 0:
+            await self._throttle(job, wait, f"{engine} limit reached, waiting {wait:.0f}s")
+            return
+        if job["meta"].get("throttled"):
+            await asyncio.to_thread(self.queue.update_meta, job["id"], throttled=None)
+
+        success = False
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await self.handler(job)
+            await asyncio.to_thread(self.queue.complete, job["id"], job["lease_owner"])
+            success = True
+        except asyncio.CancelledError:
+            raise
+        except EngineRateLimited as e:
+            self.limiters.on_rate_limited(e.engine, e.retry_after)
+            await self._throttle(job, e.retry_after, str(e))
+        except EngineUnavailable as e:
+            if e.fallback:
+                await asyncio.to_thread(self.queue.reassign_engine, job["id"], e.fallback)
+                await self._throttle(
+                    job, e.retry_after, str(e),
+                    fallback={"from": engine, "reason": str(e)}, parked_since=None,
+                )
+            else:
+                await self._park(job, e)
+        except Exception as e:
+            retryable = not isinstance(e, self.permanent_errors)
+            status = await asyncio.to_thread(
+                self.queue.fail, job["id"], job["lease_owner"], str(e), retryable=retryable
+            )
+            logger.warning(
+                "Transcription job %s attempt %d failed (%s): %s",
+                job["id"], job["attempts"], status, e,
+            )
+        finally:
+            heartbeat.cancel()
+            self.limiters.release(engine, success)
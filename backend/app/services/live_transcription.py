@@ -0,0 +1,448 @@
+import asyncio
+import io
+import logging
+import shutil
+import wave
+from typing import Awaitable, BinaryIO, Callable, Optional
+from app.config import (
+    FFMPEG_BIN,
+    AUDIO_SAMPLE_RATE,
+    LIVE_BUFFER_SECONDS,
+    LIVE_WINDOW_MAX_SECONDS,
+    LIVE_STEP_SECONDS,
+    LIVE_MAX_LAG_SECONDS,
+)
+from app.services.chunking import normalise_word
+from app.services.rate_limiter import EngineRateLimited
+
+logger = logging.getLogger(__name__)
+
+# 16-bit mono PCM
+BYTES_PER_SAMPLE = 2
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int = AUDIO_SAMPLE_RATE) -> BinaryIO:
+    """Wrap raw 16-bit mono PCM in an in-memory WAV file."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(BYTES_PER_SAMPLE)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    buffer.seek(0)
+    return buffer
+
+
+def result_words(result: dict) -> list[dict]:
+    """
+    Word-level hypothesis from an engine result.
+
+    Uses the result's "words" when the engine returned word timestamps,
+    otherwise spreads each segment's words evenly over its time span.
+
+    Returns:
+        [{"word", "start", "end"}] with times relative to the window
+    """
+    if result.get("words"):
+        return [
+            {"word": w["word"].strip(), "start": w["start"], "end": w["end"]}
+            for w in result["words"] if w.get("word", "").strip()
+        ]
+    words = []
+    for segment in result.get("segments") or []:
+        tokens = segment.get("text", "").split()
+        if not tokens:
+            continue
+        step = (segment["end"] - segment["start"]) / len(tokens)
+        for index, token in enumerate(tokens):
+            start = segment["start"] + index * step
+            words.append({"word": token, "start": start, "end": start + step})
+    return words
+
+
+class PcmRingBuffer:
+    """
+    Bounded buffer of decoded PCM, addressed in absolute seconds.
+
+    Holds at most max_seconds of audio; appending past that drops the
+    oldest samples. start_time is the absolute time of the first sample.
+    """
+
+    def __init__(
+        self, max_seconds: float = LIVE_BUFFER_SECONDS, sample_rate: int = AUDIO_SAMPLE_RATE
+    ):
+        self.sample_rate = sample_rate
+        self.bytes_per_second = sample_rate * BYTES_PER_SAMPLE
+        self.max_bytes = int(max_seconds * self.bytes_per_second)
+        self.data = bytearray()
+        self.start_time = 0.0
+        self._partial = b""
+
+    @property
+    def end_time(self) -> float:
+        return self.start_time + len(self.data) / self.bytes_per_second
+
+    def append(self, pcm: bytes) -> float:
+        """
+        Add decoded samples.
+
+        Returns:
+            Seconds of old audio dropped to stay within the bound
+        """
+        pcm = self._partial + pcm
+        whole = len(pcm) - len(pcm) % BYTES_PER_SAMPLE
+        self._partial = pcm[whole:]
+        self.data += pcm[:whole]
+
+        overflow = len(self.data) - self.max_bytes
+        if overflow <= 0:
+            return 0.0
+        overflow += overflow % BYTES_PER_SAMPLE
+        del self.data[:overflow]
+        dropped = overflow / self.bytes_per_second
+        self.start_time += dropped
+        return dropped
+
+    def trim_to(self, time: float) -> None:
+        """Discard audio before an absolute time."""
+        offset = int((time - self.start_time) * self.sample_rate) * BYTES_PER_SAMPLE
+        if offset > 0:
+            offset = min(offset, len(self.data))
+            del self.data[:offset]
+            self.start_time += offset / self.bytes_per_second
+
+    def window(self, max_seconds: float) -> tuple[bytes, float]:
+        """
+        The most recent audio, at most max_seconds long.
+
+        Returns:
+            (pcm, absolute start time of the window)
+        """
+        size = min(len(self.data), int(max_seconds * self.sample_rate) * BYTES_PER_SAMPLE)
+        start = len(self.data) - size
+        return bytes(self.data[start:]), self.start_time + start / self.bytes_per_second
+
+
+class LocalAgreement:
+    """
+    Commits words once two consecutive hypotheses agree on them.
+
+    Each pass re-transcribes the uncommitted tail of the audio. A word is
+    final when the new hypothesis and the previous one share it in the
+    same position after the committed prefix (LocalAgreement-2), so text
+    that is still changing stays partial.
+    """
+
+    def __init__(self):
+        self.committed: list[dict] = []
+        self.pending: list[dict] = []
+
+    @property
+    def committed_end(self) -> float:
+        return self.committed[-1]["end"] if self.committed else 0.0
+
+    def insert(self, words: list[dict]) -> list[dict]:
+        """
+        Feed a new hypothesis (absolute word times).
+
+        Returns:
+            Words committed by this hypothesis
+        """
+        # Words overlapping committed audio were already emitted
+        hypothesis = [w for w in words if w["end"] > self.committed_end + 0.05]
+
+        agreed = []
+        for old, new in zip(self.pending, hypothesis):
+            if normalise_word(old["word"]) != normalise_word(new["word"]):
+                break
+            agreed.append(new)
+
+        self.committed.extend(agreed)
+        self.pending = hypothesis[len(agreed):]
+        return agreed
+
+    def flush(self, until: Optional[float] = None) -> list[dict]:
+        """
+        Commit pending words without agreement (end of stream, or audio
+        about to leave the buffer).
+
+        Args:
+            until: Only commit words ending before this time (None = all)
+        """
+        if until is None:
+            flushed, self.pending = self.pending, []
+        else:
+            flushed = [w for w in self.pending if w["end"] <= until]
+            self.pending = self.pending[len(flushed):]
+        self.committed.extend(flushed)
+        return flushed
+
+    @property
+    def pending_text(self) -> str:
+        return " ".join(w["word"] for w in self.pending)
+
+    def segments(self) -> list[dict]:
+        """Committed words grouped into segments at pauses of 1 s or more."""
+        segments = []
+        for word in self.committed:
+            if segments and word["start"] - segments[-1]["end"] < 1.0:
+                segments[-1]["end"] = word["end"]
+                segments[-1]["text"] += " " + word["word"]
+            else:
+                segments.append({
+                    "id": len(segments),
+                    "start": round(word["start"], 3),
+                    "end": word["end"],
+                    "text": word["word"],
+                })
+        for segment in segments:
+            segment["end"] = round(segment["end"], 3)
+        return segments
+
+    @property
+    def text(self) -> str:
+        return " ".join(w["word"] for w in self.committed)
+
+
+class FfmpegPcmDecoder:
+    """
+    Persistent ffmpeg process decoding a MediaRecorder stream to PCM.
+
+    MediaRecorder chunks are not decodable on their own (only the first
+    carries the container header), so all chunks go through one decoder.
+    """
+
+    def __init__(
+        self,
+        on_pcm: Callable[[bytes], None],
+        ffmpeg: str = FFMPEG_BIN,
+        sample_rate: int = AUDIO_SAMPLE_RATE,
+    ):
+        self.on_pcm = on_pcm
+        self.ffmpeg = ffmpeg
+        self.sample_rate = sample_rate
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    @property
+    def available(self) -> bool:
+        return bool(shutil.which(self.ffmpeg))
+
+    async def start(self) -> None:
+        self._process = await asyncio.create_subprocess_exec(
+            self.ffmpeg, "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-ar", str(self.sample_rate), "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        self._reader = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        while True:
+            pcm = await self._process.stdout.read(64 * 1024)
+            if not pcm:
+                break
+            self.on_pcm(pcm)
+
+    async def feed(self, chunk: bytes) -> None:
+        self._process.stdin.write(chunk)
+        await self._process.stdin.drain()
+
+    async def close(self) -> None:
+        """Flush the decoder and wait for the last samples."""
+        if self._process is None:
+            return
+        if not self._process.stdin.is_closing():
+            self._process.stdin.close()
+        await self._reader
+        await self._process.wait()
+
+
+class LiveTranscriber:
+    """
+    Incremental transcription of a growing audio stream.
+
+    Decoded PCM lands in a bounded ring buffer. A background loop sends
+    the uncommitted tail (at most window_max_seconds) to the engine each
+    time step_seconds of new audio has arrived, commits the words two
+    passes agree on, and reports partial and final text via on_event.
+
+    lag_seconds is how much received audio the engine has not seen yet;
+    callers stop reading input while it exceeds max_lag_seconds
+    (wait_for_capacity), which pushes back on the client.
+    """
+
+    def __init__(
+        self,
+        transcribe_window: Callable[[BinaryIO], Awaitable[dict]],
+        on_event: Callable[[dict], Awaitable[None]],
+        buffer_seconds: float = LIVE_BUFFER_SECONDS,
+        window_max_seconds: float = LIVE_WINDOW_MAX_SECONDS,
+        step_seconds: float = LIVE_STEP_SECONDS,
+        max_lag_seconds: float = LIVE_MAX_LAG_SECONDS,
+        sample_rate: int = AUDIO_SAMPLE_RATE,
+    ):
+        self.transcribe_window = transcribe_window
+        self.on_event = on_event
+        self.ring = PcmRingBuffer(buffer_seconds, sample_rate)
+        self.agreement = LocalAgreement()
+        self.window_max_seconds = window_max_seconds
+        self.step_seconds = step_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.processed_until = 0.0
+        self.passes = 0
+        self._audio = asyncio.Event()
+        self._capacity = asyncio.Event()
+        self._capacity.set()
+        self._stopping = False
+        self._overflowed: list[dict] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def duration(self) -> float:
+        return self.ring.end_time
+
+    @property
+    def lag_seconds(self) -> float:
+        return max(self.ring.end_time - self.processed_until, 0.0)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def add_pcm(self, pcm: bytes) -> None:
+        if self.ring.append(pcm):
+            # Audio left the buffer before agreement: keep what was heard
+            self._overflowed += self.agreement.flush(until=self.ring.start_time)
+            logger.warning("Live buffer overflow, dropped audio before %.1fs", self.ring.start_time)
+        if self.lag_seconds > self.max_lag_seconds:
+            self._capacity.clear()
+        self._audio.set()
+
+    async def wait_for_capacity(self) -> None:
+        if not self._capacity.is_set():
+            await self.on_event({"type": "backpressure", "lag_seconds": round(self.lag_seconds, 1)})
+            await self._capacity.wait()
+
+    def result(self) -> dict:
+        """Committed transcript in the engine result shape."""
+        return {
+            "text": self.agreement.text,
+            "segments": self.agreement.segments(),
+            "words": self.agreement.committed,
+            "duration": self.duration,
+        }
+
+    async def stop(self) -> None:
+        """Transcribe the remaining audio and commit everything."""
+        self._stopping = True
+        self._audio.set()
+        if self._task is not None:
+            await self._task
+
+    async def _emit_final(self, words: list[dict]) -> None:
+        if words:
+            await self.on_event({
+                "type": "transcript",
+                "text": " ".join(w["word"] for w in words),
+                "is_final": True,
+                "start": round(words[0]["start"], 3),
+                "end": round(words[-1]["end"], 3),
+            })
+
+    async def _pass(self) -> None:
+        # Window: the uncommitted tail, capped at window_max_seconds. Audio
+        # pushed out of the cap is committed as last heard.
+        overflowed, self._overflowed = self._overflowed, []
+        self.ring.trim_to(self.agreement.committed_end)
+        pcm, window_start = self.ring.window(self.window_max_seconds)
+        await self._emit_final(overflowed + self.agreement.flush(until=window_start))
+        if not pcm:
+            return
+
+        window_end = self.ring.end_time
+        try:
+            result = await self.transcribe_window(pcm_to_wav(pcm, self.ring.sample_rate))
+        except EngineRateLimited:
+            raise
+        except Exception:
+            # Skip ahead so a failing engine cannot stall the client; the
+            # uncommitted audio is retried in the next window
+            self.processed_until = window_end
+            raise
+        self.passes += 1
+        words = [
+            {**w, "start": w["start"] + window_start, "end": w["end"] + window_start}
+            for w in result_words(result)
+        ]
+        await self._emit_final(self.agreement.insert(words))
+        if self.agreement.pending:
+            await self.on_event({
+                "type": "transcript", "text": self.agreement.pending_text, "is_final": False,
+            })
+        self.processed_until = window_end
+
+    async def _run(self) -> None:
+        while True:
+            await self._audio.wait()
+            self._audio.clear()
+            if not self._stopping and self.ring.end_time - self.processed_until < self.step_seconds:
+                continue
+            try:
+                await self._pass()
+            except EngineRateLimited as e:
+                await self.on_event({"type": "error", "message": str(e)})
+                await asyncio.sleep(e.retry_after)
+                self._audio.set()
+                continue
+            except Exception as e:
+                logger.warning("Live transcription pass failed: %s", e)
+                await self.on_event({"type": "error", "message": f"Transcription failed: {e}"})
+            finally:
+                if self.lag_seconds <= self.max_lag_seconds:
+                    self._capacity.set()
+
+            if self._stopping:
+                await self._emit_final(self.agreement.flush())
+                return
+            if self.ring.end_time - self.processed_until >= self.step_seconds:
+                self._audio.set()
+
+
+class WindowedLiveSession:
+    """
+    Live session for batch engines: local decoding plus windowed passes.
+
+    Shares the start/feed/wait_for_capacity/finish interface of
+    DeepgramStream, so /ws/live drives either the same way.
+    """
+
+    def __init__(
+        self,
+        transcribe_window: Callable[[BinaryIO], Awaitable[dict]],
+        on_event: Callable[[dict], Awaitable[None]],
+    ):
+        self.transcriber = LiveTranscriber(transcribe_window, on_event)
+        self.decoder = FfmpegPcmDecoder(self.transcriber.add_pcm)
+
+    async def start(self) -> None:
+        """
+        Raises:
+            RuntimeError: If ffmpeg is not available for decoding
+        """
+        if not self.decoder.available:
+            raise RuntimeError("ffmpeg is not available for live decoding")
+        await self.decoder.start()
+        self.transcriber.start()
+
+    async def feed(self, chunk: bytes) -> None:
+        await self.decoder.feed(chunk)
+
+    async def wait_for_capacity(self) -> None:
+        await self.transcriber.wait_for_capacity()
+
+    async def finish(self) -> dict:
+        """Decode the tail, run the last pass and return the transcript."""
+        await self.decoder.close()
+        await self.transcriber.stop()
+        return self.transcriber.result()
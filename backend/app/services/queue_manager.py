@@ -1,38 +1,127 @@
-import uuid
+import json
+import os
+import random
+import sqlite3
 import threading
+import time
+import uuid
 from datetime import datetime
+from pathlib import Path
 from typing import Optional
+from app.config import (
+    QUEUE_DB_PATH,
+    QUEUE_MAX_ATTEMPTS,
+    QUEUE_RETRY_BASE_SECONDS,
+    QUEUE_RETRY_MAX_SECONDS,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    audio_url TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    last_error TEXT,
+    meta TEXT NOT NULL DEFAULT '{}',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready_idx ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_engine_idx ON jobs (status, engine);
+"""
+
+# Columns returned in job dictionaries (lease bookkeeping stays internal)
+JOB_FIELDS = (
+    "id", "session_id", "engine", "audio_url", "status", "attempts",
+    "max_attempts", "last_error", "meta", "created_at", "updated_at",
+)
+
+
+def _now_iso() -> str:
+    return datetime.utcnow().isoformat()
 
 
 class QueueManager:
-    """In-memory queue manager for tracking transcription jobs."""
+    """
+    Durable queue manager for tracking transcription jobs.
+
+    Jobs live in a local SQLite file in WAL mode, so queued and in-flight
+    work survives restarts and deploys. Workers lease jobs for a limited
+    time; a job whose lease expires (worker crashed, container killed) is
+    picked up again. Failed attempts are retried with exponential backoff.
 
-    def __init__(self):
-        self._jobs = {}
+    Leased jobs carry their lease_owner; heartbeats and outcomes are only
+    recorded for the owner still holding the lease, so a worker whose job
+    was recovered and leased again cannot overwrite the new attempt.
+    """
+
+    def __init__(
+        self,
+        db_path: str = QUEUE_DB_PATH,
+        max_attempts: int = QUEUE_MAX_ATTEMPTS,
+        retry_base_seconds: float = QUEUE_RETRY_BASE_SECONDS,
+        retry_max_seconds: float = QUEUE_RETRY_MAX_SECONDS,
+    ):
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.owner_prefix = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
         self._lock = threading.Lock()
 
-    def add_job(self, session_id: str, engine: str) -> str:
+    def _row_to_job(self, row: sqlite3.Row) -> dict:
+        job = {field: row[field] for field in JOB_FIELDS}
+        job["meta"] = json.loads(job["meta"] or "{}")
+        return job
+
+    def add_job(
+        self,
+        session_id: str,
+        engine: str,
+        audio_url: Optional[str] = None,
+        meta: Optional[dict] = None,
+    ) -> str:
         """
         Add a new transcription job to the queue.
 
         Args:
             session_id: The session ID to transcribe
             engine: The transcription engine to use (groq-turbo, groq-large, deepgram, wynona)
+            audio_url: URL of the session audio, stored so workers need no lookup
+            meta: Extra job details (e.g. duration_seconds for rate limiting)
 
         Returns:
             job_id: Unique identifier for the created job
         """
         job_id = str(uuid.uuid4())
+        now = _now_iso()
 
         with self._lock:
-            self._jobs[job_id] = {
-                "id": job_id,
-                "session_id": session_id,
-                "engine": engine,
-                "status": "queued",
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat(),
-            }
+            self._conn.execute(
+                """
+                INSERT INTO jobs (id, session_id, engine, audio_url, status, max_attempts,
+                                  available_at, meta, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?, ?)
+                """,
+                (
+                    job_id, session_id, engine, audio_url, self.max_attempts,
+                    time.time(), json.dumps(meta or {}), now, now,
+                ),
+            )
 
         return job_id
 
@@ -44,7 +133,8 @@ class QueueManager:
             List of job dictionaries
         """
         with self._lock:
-            return list(self._jobs.values())
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY created_at").fetchall()
+        return [self._row_to_job(row) for row in rows]
 
     def get_job(self, job_id: str) -> Optional[dict]:
         """
@@ -57,7 +147,8 @@ class QueueManager:
             Job dictionary or None if not found
         """
         with self._lock:
-            return self._jobs.get(job_id)
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
 
     def update_status(self, job_id: str, status: str) -> bool:
         """
@@ -71,8 +162,328 @@ class QueueManager:
             True if job was found and updated, False otherwise
         """
         with self._lock:
-            if job_id in self._jobs:
-                self._jobs[job_id]["status"] = status
-                self._jobs[job_id]["updated_at"] = datetime.utcnow().isoformat()
-                return True
-            return False
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                (status, _now_iso(), job_id),
+            )
+        return cursor.rowcount > 0
+
+    def reassign_engine(self, job_id: str, engine: str) -> bool:
+        """
+        Move a job to another engine.
+
+        Returns:
+            True if job was found and updated, False otherwise
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET engine = ?, updated_at = ? WHERE id = ?",
+                (engine, _now_iso(), job_id),
+            )
+        return cursor.rowcount > 0
+
+    def update_meta(self, job_id: str, **values) -> bool:
+        """
+        Merge values into a job's meta dictionary.
+
+        Returns:
+            True if job was found and updated, False otherwise
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT meta FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return False
+            meta = {**json.loads(row["meta"] or "{}"), **values}
+            self._conn.execute(
+                "UPDATE jobs SET meta = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(meta), _now_iso(), job_id),
+            )
+        return True
+
+    def backlog(self) -> dict:
+        """
+        Pending work per engine (queued and processing jobs).
+
+        Returns:
+            {engine: {"jobs": count, "audio_seconds": total duration}}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT engine, COUNT(*) AS jobs,
+                       COALESCE(SUM(json_extract(meta, '$.duration_seconds')), 0) AS audio_seconds
+                FROM jobs
+                WHERE status IN ('queued', 'processing')
+                GROUP BY engine
+                """
+            ).fetchall()
+        return {
+            row["engine"]: {"jobs": row["jobs"], "audio_seconds": row["audio_seconds"]}
+            for row in rows
+        }
+
+    def queued_audio_seconds(self, engine: str, include_routed: bool = False) -> float:
+        """
+        Total duration of the jobs queued for an engine.
+
+        Args:
+            include_routed: Also count queued jobs the engine router placed
+                (meta.routing set) on any engine
+
+        Returns:
+            Sum of meta.duration_seconds
+        """
+        routed = " OR json_extract(meta, '$.routing') IS NOT NULL" if include_routed else ""
+        with self._lock:
+            row = self._conn.execute(
+                f"""
+                SELECT COALESCE(SUM(json_extract(meta, '$.duration_seconds')), 0)
+                FROM jobs
+                WHERE status = 'queued' AND (engine = ?{routed})
+                """,
+                (engine,),
+            ).fetchone()
+        return row[0]
+
+    def reroute_queued(self, engine: str, reason: str) -> int:
+        """
+        Move queued router-placed jobs (meta.routing set, no fallback taken)
+        onto an engine in one statement.
+
+        Returns:
+            Number of jobs moved
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs
+                SET engine = ?, meta = json_set(meta, '$.rerouted', ?), updated_at = ?
+                WHERE status = 'queued' AND engine != ?
+                  AND json_extract(meta, '$.routing') IS NOT NULL
+                  AND json_extract(meta, '$.fallback') IS NULL
+                """,
+                (engine, reason, _now_iso(), engine),
+            )
+        return cursor.rowcount
+
+    def reassign_queued(self, from_engine: str, to_engine: str, reason: str) -> int:
+        """
+        Move every queued job of one engine to another, recording the
+        fallback in meta.
+
+        Returns:
+            Number of jobs moved
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs
+                SET engine = ?,
+                    meta = json_set(meta, '$.fallback', json_object('from', ?, 'reason', ?),
+                                    '$.parked_since', NULL),
+                    available_at = MIN(available_at, ?), updated_at = ?
+                WHERE status = 'queued' AND engine = ?
+                """,
+                (to_engine, from_engine, reason, time.time(), _now_iso(), from_engine),
+            )
+        return cursor.rowcount
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[dict]:
+        """
+        Atomically claim the next ready job.
+
+        A job is ready when it is queued and its backoff has elapsed, or when
+        it is processing under a lease that has expired.
+
+        Args:
+            worker_id: Identifier of the leasing worker
+            lease_seconds: How long the claim holds without a heartbeat
+
+        Returns:
+            The leased job (status processing, with its lease_owner) or None
+            if nothing is ready
+        """
+        now = time.time()
+        owner = f"{self.owner_prefix}:{worker_id}"
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    """
+                    SELECT id FROM jobs
+                    WHERE (status = 'queued' AND available_at <= ?)
+                       OR (status = 'processing' AND lease_expires_at < ?)
+                    ORDER BY available_at, created_at
+                    LIMIT 1
+                    """,
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+
+                self._conn.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'processing', attempts = attempts + 1,
+                        lease_owner = ?, lease_expires_at = ?, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (owner, now + lease_seconds, _now_iso(), row["id"]),
+                )
+                job = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        leased = self._row_to_job(job)
+        leased["lease_owner"] = owner
+        return leased
+
+    def heartbeat(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Extend the lease of a job that is still being worked on.
+
+        Returns:
+            True if the job is still processing under owner's lease and the
+            lease was extended
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs SET lease_expires_at = ?
+                WHERE id = ? AND status = 'processing' AND lease_owner = ?
+                """,
+                (time.time() + lease_seconds, job_id, owner),
+            )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: str, owner: str) -> bool:
+        """
+        Mark a leased job as completed and release its lease.
+
+        Returns:
+            True if owner still held the lease, False otherwise
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'completed', lease_owner = NULL, lease_expires_at = NULL,
+                    last_error = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ?
+                """,
+                (_now_iso(), job_id, owner),
+            )
+        return cursor.rowcount > 0
+
+    def release(self, job_id: str, owner: str, delay: float) -> bool:
+        """
+        Put a leased job back in the queue without counting the attempt.
+
+        Used when the job could not start (engine throttled) rather than
+        failed, so it waits in the queue instead of burning retries.
+
+        Returns:
+            True if owner still held the lease and the job was released
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'queued', attempts = MAX(attempts - 1, 0), available_at = ?,
+                    lease_owner = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ?
+                """,
+                (time.time() + delay, _now_iso(), job_id, owner),
+            )
+        return cursor.rowcount > 0
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the given attempt number."""
+        delay = min(self.retry_base_seconds * (2 ** max(attempts - 1, 0)), self.retry_max_seconds)
+        return delay * random.uniform(0.8, 1.2)
+
+    def fail(self, job_id: str, owner: str, error: str, retryable: bool = True) -> str:
+        """
+        Record a failed attempt.
+
+        The job is requeued with backoff while it has attempts left and the
+        error is retryable; otherwise it is marked failed for good.
+
+        Returns:
+            The job's new status ("queued" or "failed"), or "" if not found
+            or no longer leased by owner
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ?",
+                (job_id, owner),
+            ).fetchone()
+            if row is None:
+                return ""
+
+            if retryable and row["attempts"] < row["max_attempts"]:
+                status = "queued"
+                available_at = time.time() + self.retry_delay(row["attempts"])
+            else:
+                status = "failed"
+                available_at = time.time()
+
+            self._conn.execute(
+                """
+                UPDATE jobs
+                SET status = ?, available_at = ?, last_error = ?,
+                    lease_owner = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ?
+                """,
+                (status, available_at, error[:2000], _now_iso(), job_id, owner),
+            )
+        return status
+
+    def recover_stale_leases(self) -> int:
+        """
+        Requeue processing jobs whose lease has expired or that are leased
+        by another owner prefix (an earlier process of this service).
+
+        Called on startup so work interrupted by a restart is resumed
+        immediately instead of waiting for the old leases to run out.
+
+        Returns:
+            Number of jobs requeued
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'queued', available_at = ?, lease_owner = NULL,
+                    lease_expires_at = NULL, updated_at = ?
+                WHERE status = 'processing'
+                  AND (lease_expires_at IS NULL OR lease_expires_at < ?
+                       OR lease_owner IS NULL OR lease_owner NOT LIKE ?)
+                """,
+                (now, _now_iso(), now, f"{self.owner_prefix}:%"),
+            )
+        return cursor.rowcount
+
+    def purge_finished(self, older_than_seconds: float) -> int:
+        """
+        Delete completed and failed jobs older than the given age.
+
+        Returns:
+            Number of jobs deleted
+        """
+        cutoff = datetime.utcfromtimestamp(time.time() - older_than_seconds).isoformat()
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?",
+                (cutoff,),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
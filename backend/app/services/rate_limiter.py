@@ -0,0 +1,206 @@
+import math
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import httpx
+from app.config import ENGINE_LIMITS, CHUNK_MAX_SECONDS
+
+# Adaptive back-off: each 429 halves the request rate, each success
+# restores a little of it, never dropping below MIN_RATE_SCALE.
+MIN_RATE_SCALE = 0.125
+RATE_RECOVERY_STEP = 0.05
+DEFAULT_RETRY_AFTER = 30.0
+
+
+class EngineRateLimited(Exception):
+    """Raised when an engine answers 429; carries its Retry-After delay."""
+
+    def __init__(self, engine: str, retry_after: float):
+        super().__init__(f"{engine} rate limited, retry after {retry_after:.0f}s")
+        self.engine = engine
+        self.retry_after = retry_after
+
+
+class EngineUnavailable(Exception):
+    """
+    Raised when an engine cannot take a job yet (e.g. WYNONA still booting).
+
+    The job goes back to the queue after retry_after without using an
+    attempt (until its parking budget runs out), or is moved to the
+    fallback engine when one is given.
+    """
+
+    def __init__(
+        self,
+        engine: str,
+        reason: str,
+        retry_after: float = 0.0,
+        fallback: Optional[str] = None,
+    ):
+        super().__init__(reason)
+        self.engine = engine
+        self.retry_after = retry_after
+        self.fallback = fallback
+
+
+def parse_retry_after(value: Optional[str], default: float = DEFAULT_RETRY_AFTER) -> float:
+    """Parse a Retry-After header given as seconds or as an HTTP date."""
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+def raise_for_engine_status(response: httpx.Response, engine: str) -> None:
+    """raise_for_status, turning 429 into EngineRateLimited."""
+    if response.status_code == 429:
+        raise EngineRateLimited(engine, parse_retry_after(response.headers.get("Retry-After")))
+    response.raise_for_status()
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, scale: float) -> None:
+        now = time.monotonic()
+        rate = self.capacity * scale / 60.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, scale: float = 1.0) -> float:
+        """Seconds until amount tokens are available (0 if available now)."""
+        self._refill(scale)
+        # Requests bigger than the bucket only need it full, else they never fit
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / (self.capacity * scale / 60.0)
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class EngineLimiter:
+    """
+    Concurrency cap plus request and audio-seconds token buckets for one engine.
+
+    Acquisition never blocks: callers get the wait time back and decide
+    what to do with the job meanwhile (the worker puts it back in the queue).
+    """
+
+    def __init__(
+        self,
+        engine: str,
+        concurrency: int = 1,
+        requests_per_minute: Optional[float] = None,
+        audio_seconds_per_minute: Optional[float] = None,
+    ):
+        self.engine = engine
+        self.concurrency = concurrency
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.audio = TokenBucket(audio_seconds_per_minute) if audio_seconds_per_minute else None
+        self.active = 0
+        self.blocked_until = 0.0
+        self.rate_scale = 1.0
+        self.throttled_total = 0
+        self.rate_limited_total = 0
+
+    def try_acquire(self, requests: int = 1, audio_seconds: float = 0.0) -> float:
+        """
+        Claim a slot and tokens for one job.
+
+        Returns:
+            0.0 if acquired (call release() when done), otherwise the number
+            of seconds to wait before trying again
+        """
+        waits = [self.blocked_until - time.time()]
+        if self.active >= self.concurrency:
+            # Unknown when a slot frees up; retry soon
+            waits.append(1.0)
+        if self.requests:
+            waits.append(self.requests.wait_time(requests, self.rate_scale))
+        if self.audio:
+            waits.append(self.audio.wait_time(audio_seconds))
+
+        wait = max(waits)
+        if wait > 0:
+            self.throttled_total += 1
+            return wait
+
+        self.active += 1
+        if self.requests:
+            self.requests.take(requests)
+        if self.audio:
+            self.audio.take(audio_seconds)
+        return 0.0
+
+    def release(self, success: bool = True) -> None:
+        self.active = max(self.active - 1, 0)
+        if success:
+            self.rate_scale = min(1.0, self.rate_scale + RATE_RECOVERY_STEP)
+
+    def on_rate_limited(self, retry_after: float) -> None:
+        """Honour Retry-After and halve the request rate."""
+        self.rate_limited_total += 1
+        self.blocked_until = max(self.blocked_until, time.time() + retry_after)
+        self.rate_scale = max(MIN_RATE_SCALE, self.rate_scale / 2)
+
+    def snapshot(self) -> dict:
+        return {
+            "engine": self.engine,
+            "active": self.active,
+            "concurrency": self.concurrency,
+            "requests_available": round(self.requests.tokens, 2) if self.requests else None,
+            "audio_seconds_available": round(self.audio.tokens, 1) if self.audio else None,
+            "rate_scale": round(self.rate_scale, 3),
+            "blocked_for_seconds": round(max(self.blocked_until - time.time(), 0.0), 1),
+            "throttled_total": self.throttled_total,
+            "rate_limited_total": self.rate_limited_total,
+        }
+
+
+class LimiterRegistry:
+    """Per-engine limiters built from ENGINE_LIMITS."""
+
+    def __init__(self, limits: dict = ENGINE_LIMITS):
+        self.limiters = {engine: EngineLimiter(engine, **cfg) for engine, cfg in limits.items()}
+
+    def get(self, engine: str) -> Optional[EngineLimiter]:
+        return self.limiters.get(engine)
+
+    def try_acquire(self, engine: str, audio_seconds: float = 0.0) -> float:
+        """
+        Claim capacity for one job on an engine.
+
+        Long recordings are sent as several chunk requests, so they are
+        charged one request token per planned chunk.
+        """
+        limiter = self.get(engine)
+        if limiter is None:
+            return 0.0
+        requests = max(1, math.ceil(audio_seconds / CHUNK_MAX_SECONDS))
+        return limiter.try_acquire(requests, audio_seconds)
+
+    def release(self, engine: str, success: bool = True) -> None:
+        limiter = self.get(engine)
+        if limiter is not None:
+            limiter.release(success)
+
+    def on_rate_limited(self, engine: str, retry_after: float) -> None:
+        limiter = self.get(engine)
+        if limiter is not None:
+            limiter.on_rate_limited(retry_after)
+
+    def snapshot(self) -> dict:
+        return {engine: limiter.snapshot() for engine, limiter in self.limiters.items()}
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from app.config import (
+    UPLOAD_TMP_DIR,
+    UPLOAD_CHUNK_SIZE,
+    MAX_UPLOAD_BYTES,
+    UPLOAD_RESUMABLE_TTL_HOURS,
+)
+from app.services.storage_service import UploadTooLarge
+
+
+class OffsetMismatch(Exception):
+    """Raised when a chunk does not start at the upload's current offset."""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Expected Upload-Offset {expected}")
+        self.expected = expected
+
+
+class ResumableUploadStore:
+    """
+    Disk-backed staging area for TUS-style resumable uploads.
+
+    Each upload is a data file that chunks are appended to, plus a JSON
+    sidecar holding its declared length and metadata. The current offset is
+    the data file size, so an interrupted client can ask for it and resume
+    from there, even across an API restart.
+    """
+
+    def __init__(
+        self,
+        root: str = UPLOAD_TMP_DIR,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+        max_bytes: int = MAX_UPLOAD_BYTES,
+        ttl_hours: float = UPLOAD_RESUMABLE_TTL_HOURS,
+    ):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_hours * 3600
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def data_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.part"
+
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.json"
+
+    def lock(self, upload_id: str) -> asyncio.Lock:
+        """Per-upload lock serialising concurrent PATCH requests."""
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    def create(self, length: int, filename: str, content_type: str) -> dict:
+        """
+        Register a new upload of a declared total length.
+
+        Raises:
+            UploadTooLarge: If length exceeds max_bytes
+        """
+        if length > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.purge_expired()
+
+        upload = {
+            "id": str(uuid.uuid4()),
+            "length": length,
+            "filename": filename,
+            "content_type": content_type,
+            "created_at": time.time(),
+        }
+        self.data_path(upload["id"]).touch()
+        self._meta_path(upload["id"]).write_text(json.dumps(upload))
+        return {**upload, "offset": 0}
+
+    def get(self, upload_id: str) -> Optional[dict]:
+        """
+        Get upload metadata and current offset.
+
+        Returns:
+            Upload dictionary or None if unknown (or not a valid upload ID)
+        """
+        try:
+            uuid.UUID(upload_id)
+        except ValueError:
+            return None
+
+        try:
+            upload = json.loads(self._meta_path(upload_id).read_text())
+            upload["offset"] = self.data_path(upload_id).stat().st_size
+        except (FileNotFoundError, ValueError):
+            return None
+        return upload
+
+    async def append(self, upload: dict, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """
+        Append streamed chunks to an upload, starting at offset.
+
+        A failure mid-stream keeps whatever bytes were written, so the client
+        can resume from the new offset.
+
+        Returns:
+            New offset after the append
+
+        Raises:
+            OffsetMismatch: If offset is not the upload's current offset
+            UploadTooLarge: If the chunks run past the declared length
+        """
+        current = self.data_path(upload["id"]).stat().st_size
+        if offset != current:
+            raise OffsetMismatch(current)
+
+        with open(self.data_path(upload["id"]), "ab") as fh:
+            async for chunk in chunks:
+                if current + len(chunk) > upload["length"]:
+                    raise UploadTooLarge(upload["length"])
+                await asyncio.to_thread(fh.write, chunk)
+                current += len(chunk)
+        return current
+
+    async def iter_chunks(self, upload: dict) -> AsyncIterator[bytes]:
+        """Read a completed upload back in fixed-size chunks."""
+        with open(self.data_path(upload["id"]), "rb") as fh:
+            while True:
+                chunk = await asyncio.to_thread(fh.read, self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def delete(self, upload_id: str) -> None:
+        for path in (self.data_path(upload_id), self._meta_path(upload_id)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self._locks.pop(upload_id, None)
+
+    def purge_expired(self) -> int:
+        """
+        Remove staged uploads older than the TTL.
+
+        Returns:
+            Number of uploads removed
+        """
+        if not self.root.exists():
+            return 0
+
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for meta_path in self.root.glob("*.json"):
+            try:
+                if os.path.getmtime(self.data_path(meta_path.stem)) < cutoff:
+                    self.delete(meta_path.stem)
+                    removed += 1
+            except FileNotFoundError:
+                self.delete(meta_path.stem)
+                removed += 1
+        return removed
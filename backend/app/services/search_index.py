@@ -0,0 +1,555 @@
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+from app.config import SEARCH_INDEX_PATH
+from app.db import Database, HEADERS, BASE_URL
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL DEFAULT '',
+    transcript TEXT NOT NULL DEFAULT '',
+    segments TEXT NOT NULL DEFAULT '[]',
+    notes TEXT NOT NULL DEFAULT '[]',
+    status TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_created_idx ON documents (created_at);
+CREATE TABLE IF NOT EXISTS document_tags (
+    session_id TEXT NOT NULL,
+    tag_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (session_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS document_tags_tag_idx ON document_tags (tag_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, transcript, notes, tags, words, tokenize = 'unicode61'
+);
+"""
+
+# bm25 column weights: title, transcript, notes, tags, and the unstemmed
+# words of all four (only there so a partly typed word can match)
+COLUMN_WEIGHTS = (8.0, 1.0, 2.0, 4.0, 0.5)
+
+WORD_RE = re.compile(r"\w+")
+
+STOPWORDS = frozenset("""
+a ai au aux avec c ce ces cet cette d dans de des du elle en et eu il ils je
+l la le les leur lui m ma mais me mes moi mon n ne nos notre nous on ou par
+pas pour qu que qui s sa se ses son sur t ta te tes toi ton tu un une vos
+votre vous y est sont
+""".split())
+
+# Longest first; a suffix is only removed if at least 3 characters remain
+SUFFIXES = sorted("""
+issements issement atrices atrice ateurs ateur ations ation ements ement
+ments ment euses euse eux ites ite ismes isme istes iste iques ique ables
+able ibles ible ances ance ences ence ives ive ifs if aient ait ais ions
+ons iez ez ant ees ee es er e s x
+""".split(), key=len, reverse=True)
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents ("Été" -> "ete", "œuvre" -> "oeuvre")."""
+    text = text.lower().replace("œ", "oe").replace("æ", "ae")
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def stem(word: str) -> str:
+    """
+    Light French stemmer over a folded word.
+
+    Strips one inflectional or derivational suffix, so "enregistrements",
+    "enregistrement" and "enregistrer" share the stem "enregistr".
+    """
+    if word.endswith("aux") and len(word) > 4:
+        return word[:-3] + "al"
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+@lru_cache(maxsize=65536)
+def _word(word: str) -> Optional[str]:
+    folded = fold(word)
+    if len(folded) < 2 or folded in STOPWORDS:
+        return None
+    return folded
+
+
+@lru_cache(maxsize=65536)
+def _term(word: str) -> Optional[str]:
+    folded = _word(word)
+    return stem(folded) if folded else None
+
+
+def terms(text: str) -> list[str]:
+    """Index terms of a text: folded, stemmed words without stopwords."""
+    return [t for t in map(_term, WORD_RE.findall((text or "").lower())) if t]
+
+
+def words(text: str) -> list[str]:
+    """Folded words of a text without stopwords, unstemmed (for prefixes)."""
+    return [w for w in map(_word, WORD_RE.findall((text or "").lower())) if w]
+
+
+class QueryMatcher:
+    """
+    A parsed search query: its FTS5 expression and a word predicate used
+    to highlight matches in the original text.
+
+    Every term must match; the last one also matches as a prefix while the
+    user is still typing it, of a stem or of an unstemmed word (a partly
+    typed word can run past its stem: "enregistreme").
+    """
+
+    def __init__(self, query: str):
+        words = [
+            w for w in WORD_RE.findall(fold(query or "")) if len(w) > 1 and w not in STOPWORDS
+        ]
+        if words and query == query.rstrip():
+            self.prefix = words[-1]
+            words = words[:-1]
+        else:
+            self.prefix = None
+        self.stems = {stem(w) for w in words}
+
+    @property
+    def empty(self) -> bool:
+        return not self.stems and not self.prefix
+
+    def expression(self) -> str:
+        parts = [f'"{s}"' for s in sorted(self.stems)]
+        if self.prefix:
+            parts.append(f'("{stem(self.prefix)}" * OR words : "{self.prefix}" *)')
+        return " AND ".join(parts)
+
+    def matches(self, word: str) -> bool:
+        term = _term(word.lower())
+        if term is None:
+            return False
+        if term in self.stems:
+            return True
+        return bool(self.prefix) and (
+            fold(word).startswith(self.prefix) or term.startswith(stem(self.prefix))
+        )
+
+
+def highlight(text: str, match: Callable[[str], bool], context_words: int = 10) -> Optional[str]:
+    """
+    Snippet around the first matching word, with every match in it wrapped
+    in <mark>. Returns None if nothing matches.
+    """
+    words = list(WORD_RE.finditer(text or ""))
+    first = next((i for i, w in enumerate(words) if match(w.group())), None)
+    if first is None:
+        return None
+
+    lo = max(first - context_words, 0)
+    hi = min(first + context_words, len(words) - 1)
+    start = words[lo].start() if lo > 0 else 0
+    end = words[hi].end() if hi < len(words) - 1 else len(text)
+    parts, cursor = [], start
+    for word in words[lo:hi + 1]:
+        if match(word.group()):
+            parts.append(text[cursor:word.start()])
+            parts.append(f"<mark>{word.group()}</mark>")
+            cursor = word.end()
+    parts.append(text[cursor:end])
+
+    snippet = "".join(parts)
+    if lo > 0:
+        snippet = "…" + snippet
+    if hi < len(words) - 1:
+        snippet += "…"
+    return snippet
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class SearchIndex:
+    """
+    Local full-text index over session titles, transcripts, notes and tag
+    names.
+
+    Documents are kept in a SQLite FTS5 table holding pre-stemmed terms
+    (accent folded, light French stemming), so queries never scan
+    transcripts in Supabase. The routers update it incrementally on each
+    write; backfill() loads existing sessions into an empty index.
+
+    Every statement runs under one lock, and callers on the event loop go
+    through asyncio.to_thread so index I/O never blocks it. Until the index
+    is ready (loaded or backfilled) callers fall back to upstream search.
+    """
+
+    def __init__(self, db_path: str = SEARCH_INDEX_PATH):
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        # Reentrant: add_note reads and upserts in one critical section
+        self._lock = threading.RLock()
+        self._ready = False
+
+    def _migrate(self) -> None:
+        # Indexes built before the unstemmed words column are rebuilt in place
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(documents_fts)")]
+        if "words" in columns:
+            return
+        self._conn.execute("DROP TABLE documents_fts")
+        self._conn.executescript(SCHEMA)
+        for (session_id,) in self._conn.execute("SELECT session_id FROM documents").fetchall():
+            self._reindex(session_id)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM documents").fetchone()[0]
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether queries reflect Supabase (backfilled, or loaded from disk).
+
+        A flag set by backfill and cleared by clear(), so the event loop can
+        check it without touching SQLite.
+        """
+        return self._ready
+
+    # Writes
+
+    def _reindex(self, session_id: str) -> None:
+        row = self._conn.execute(
+            "SELECT id, title, transcript, notes FROM documents WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return
+        doc_id, title, transcript, notes = row
+        tags = [name for (name,) in self._conn.execute(
+            "SELECT name FROM document_tags WHERE session_id = ?", (session_id,)
+        )]
+        self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+        texts = (title, transcript, " ".join(json.loads(notes)), " ".join(tags))
+        self._conn.execute(
+            "INSERT INTO documents_fts (rowid, title, transcript, notes, tags, words) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                doc_id,
+                *(" ".join(terms(text)) for text in texts),
+                " ".join(words(" ".join(texts))),
+            ),
+        )
+
+    def upsert(
+        self,
+        session_id: str,
+        title: Optional[str] = None,
+        transcript: Optional[str] = None,
+        segments: Optional[list] = None,
+        status: Optional[str] = None,
+        created_at: Optional[str] = None,
+        notes: Optional[list[str]] = None,
+        tags: Optional[list[dict]] = None,
+    ) -> None:
+        """
+        Add or update one session. Only the fields given are changed.
+
+        Args:
+            tags: Replaces the session's tags ([{"id", "name"}])
+        """
+        fields = {
+            "title": title,
+            "transcript": transcript,
+            "segments": json.dumps(segments) if segments is not None else None,
+            "status": status,
+            "notes": json.dumps(notes) if notes is not None else None,
+        }
+        fields = {k: v for k, v in fields.items() if v is not None}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO documents (session_id, created_at) VALUES (?, ?) "
+                    "ON CONFLICT (session_id) DO NOTHING",
+                    (session_id, created_at or _now()),
+                )
+                if created_at:
+                    fields["created_at"] = created_at
+                if fields:
+                    assignments = ", ".join(f"{k} = ?" for k in fields)
+                    self._conn.execute(
+                        f"UPDATE documents SET {assignments} WHERE session_id = ?",
+                        (*fields.values(), session_id),
+                    )
+                if tags is not None:
+                    self._conn.execute(
+                        "DELETE FROM document_tags WHERE session_id = ?", (session_id,)
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO document_tags VALUES (?, ?, ?)",
+                        [(session_id, t["id"], t.get("name") or "") for t in tags],
+                    )
+                self._reindex(session_id)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def upsert_session(self, session: dict) -> None:
+        """Index a Supabase session row (optionally with embedded tags/notes)."""
+        if session.get("deleted_at"):
+            self.remove(session["id"])
+            return
+        self.upsert(
+            session["id"],
+            title=session.get("title") or "",
+            transcript=session.get("transcript") or "",
+            segments=session.get("transcript_segments") or [],
+            status=session.get("status"),
+            created_at=session.get("created_at"),
+            notes=[n["content"] for n in session["notes"]] if "notes" in session else None,
+            tags=session["tags"] if "tags" in session else None,
+        )
+
+    def add_note(self, session_id: str, content: str) -> None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT notes FROM documents WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            notes = json.loads(row[0]) if row else []
+            self.upsert(session_id, notes=notes + [content])
+
+    def add_tags(self, session_id: str, tags: Iterable[dict]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO document_tags VALUES (?, ?, ?)",
+                [(session_id, t["id"], t.get("name") or "") for t in tags],
+            )
+            self._reindex(session_id)
+
+    def _reindex_tagged(self, tag_id: str, change: str, params: tuple) -> None:
+        with self._lock:
+            session_ids = [sid for (sid,) in self._conn.execute(
+                "SELECT session_id FROM document_tags WHERE tag_id = ?", (tag_id,)
+            )]
+            self._conn.execute(change, params)
+            for session_id in session_ids:
+                self._reindex(session_id)
+
+    def rename_tag(self, tag_id: str, name: str) -> None:
+        self._reindex_tagged(
+            tag_id, "UPDATE document_tags SET name = ? WHERE tag_id = ?", (name, tag_id)
+        )
+
+    def remove_tag(self, tag_id: str, session_id: Optional[str] = None) -> None:
+        """Drop a tag from one session, or from every session if none given."""
+        if session_id is None:
+            self._reindex_tagged(tag_id, "DELETE FROM document_tags WHERE tag_id = ?", (tag_id,))
+            return
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM document_tags WHERE session_id = ? AND tag_id = ?",
+                (session_id, tag_id),
+            )
+            self._reindex(session_id)
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM documents WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (row[0],))
+                self._conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+            self._conn.execute("DELETE FROM document_tags WHERE session_id = ?", (session_id,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ready = False
+            self._conn.executescript(
+                "DELETE FROM documents_fts; DELETE FROM documents; DELETE FROM document_tags;"
+            )
+
+    # Queries
+
+    def _where(
+        self, matcher: QueryMatcher, status: Optional[str], tag_ids: Optional[list[str]] = None
+    ) -> tuple[str, list]:
+        where, params = "documents_fts MATCH ?", [matcher.expression()]
+        if status:
+            where += " AND d.status = ?"
+            params.append(status)
+        if tag_ids:
+            where += (
+                " AND d.session_id IN (SELECT session_id FROM document_tags"
+                f" WHERE tag_id IN ({','.join('?' * len(tag_ids))}))"
+            )
+            params += tag_ids
+        return where, params
+
+    def match_ids(
+        self,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        status: Optional[str] = None,
+        after: Optional[list] = None,
+        tag_ids: Optional[list[str]] = None,
+    ) -> list[str]:
+        """
+        Matching session ids, newest first (for filtered listings).
+
+        Args:
+            after: (created_at, session_id) keyset of the previous page
+            tag_ids: Only sessions tagged with any of these
+        """
+        matcher = QueryMatcher(query)
+        if matcher.empty:
+            return []
+        where, params = self._where(matcher, status, tag_ids)
+        if after:
+            where += " AND (d.created_at, d.session_id) < (?, ?)"
+            params += list(after)
+        with self._lock:
+            return [sid for (sid,) in self._conn.execute(
+                f"SELECT d.session_id FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+                f"WHERE {where} ORDER BY d.created_at DESC, d.session_id DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            )]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        status: Optional[str] = None,
+        max_segments: int = 3,
+    ) -> dict:
+        """
+        Ranked search with highlighted snippets.
+
+        Returns:
+            {"total", "took_ms", "results": [{"session_id", "title",
+            "created_at", "score", "title_highlight", "snippet", "notes",
+            "tags", "segments": [{"id", "start", "end", "snippet"}]}]}
+        """
+        started = time.perf_counter()
+        matcher = QueryMatcher(query)
+        if matcher.empty:
+            return {"total": 0, "took_ms": 0.0, "results": []}
+
+        where, params = self._where(matcher, status)
+        base = f"FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid WHERE {where}"
+        with self._lock:
+            total = self._conn.execute(f"SELECT count(*) {base}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT d.session_id, d.title, d.transcript, d.segments, d.notes, d.created_at, "
+                f"bm25(documents_fts, {', '.join(map(str, COLUMN_WEIGHTS))}) AS score "
+                f"{base} ORDER BY score LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+            tags_by_session = {row[0]: [name for (name,) in self._conn.execute(
+                "SELECT name FROM document_tags WHERE session_id = ?", (row[0],)
+            )] for row in rows}
+
+        results = []
+        for session_id, title, transcript, segments, notes, created_at, score in rows:
+            tags = tags_by_session[session_id]
+            matched_segments = []
+            for segment in json.loads(segments):
+                snippet = highlight(segment.get("text", ""), matcher.matches)
+                if snippet:
+                    matched_segments.append({
+                        "id": segment.get("id"),
+                        "start": segment.get("start"),
+                        "end": segment.get("end"),
+                        "snippet": snippet,
+                    })
+                    if len(matched_segments) >= max_segments:
+                        break
+            results.append({
+                "session_id": session_id,
+                "title": title,
+                "created_at": created_at,
+                "score": round(-score, 4),
+                "title_highlight": highlight(title, matcher.matches, context_words=50),
+                "snippet": highlight(transcript, matcher.matches),
+                "notes": [s for s in (highlight(n, matcher.matches) for n in json.loads(notes)) if s],
+                "tags": [t for t in tags if matcher.matches(t) or any(map(matcher.matches, t.split()))],
+                "segments": matched_segments,
+            })
+
+        return {
+            "total": total,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+            "results": results,
+        }
+
+    # Backfill
+
+    async def backfill(self, db: Database, page_size: int = 500) -> int:
+        """
+        Load every live session from Supabase into the index.
+
+        Returns:
+            Number of sessions indexed
+        """
+        indexed, offset = 0, 0
+        while True:
+            response = await db.client.get(
+                f"{BASE_URL}/sessions",
+                headers=HEADERS,
+                params={
+                    "select": "id,title,transcript,transcript_segments,status,created_at,"
+                              "notes(content),tags(id,name)",
+                    "deleted_at": "is.null",
+                    "order": "created_at.asc,id.asc",
+                    "limit": page_size,
+                    "offset": offset,
+                },
+            )
+            response.raise_for_status()
+            sessions = response.json()
+            await asyncio.to_thread(self._upsert_sessions, sessions)
+            indexed += len(sessions)
+            if len(sessions) < page_size:
+                self._ready = True
+                return indexed
+            offset += page_size
+
+    def _upsert_sessions(self, sessions: list[dict]) -> None:
+        for session in sessions:
+            self.upsert_session(session)
+
+    async def backfill_if_empty(self, db: Database) -> None:
+        """Startup hook: fill a fresh index, logging instead of raising."""
+        if await asyncio.to_thread(self.count):
+            self._ready = True
+            return
+        try:
+            logger.info("Search index built with %d sessions", await self.backfill(db))
+        except Exception:
+            logger.exception("Search index backfill failed")
+
+
+search_index = SearchIndex()
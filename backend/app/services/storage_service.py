@@ -0,0 +1,160 @@
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Optional
+from urllib.parse import urlparse
+from app.config import UPLOAD_CHUNK_SIZE, MAX_UPLOAD_BYTES, AUDIO_SPOOL_MAX_MEMORY
+from app.db import Database, STORAGE_HEADERS, STORAGE_URL
+
+AUDIO_BUCKET = "nomad-audio"
+
+
+class UploadTooLarge(Exception):
+    """Raised while streaming when an upload exceeds MAX_UPLOAD_BYTES."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds {limit} bytes")
+        self.limit = limit
+
+
+class StorageService:
+    """Streams audio to and from Supabase Storage in fixed-size chunks."""
+
+    def __init__(
+        self,
+        db: Database,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+        max_bytes: int = MAX_UPLOAD_BYTES,
+    ):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+
+    def object_url(self, storage_path: str, bucket: str = AUDIO_BUCKET) -> str:
+        return f"{STORAGE_URL}/object/{bucket}/{storage_path}"
+
+    def public_url(self, storage_path: str, bucket: str = AUDIO_BUCKET) -> str:
+        return f"{STORAGE_URL}/object/public/{bucket}/{storage_path}"
+
+    async def iter_reader(
+        self, read: Callable[[int], Awaitable[bytes]]
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield fixed-size chunks from an async read(n) callable.
+
+        Works with UploadFile.read, so the spooled upload is never loaded
+        into memory as a whole.
+        """
+        while True:
+            chunk = await read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    async def upload_stream(
+        self,
+        storage_path: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+        content_length: Optional[int] = None,
+        bucket: str = AUDIO_BUCKET,
+        upsert: bool = False,
+        hasher=None,
+    ) -> int:
+        """
+        Stream chunks to Supabase Storage, enforcing the size limit as bytes flow.
+
+        Args:
+            storage_path: Object path inside the bucket
+            chunks: Async iterator of byte chunks
+            content_type: MIME type stored with the object
+            content_length: Exact size if known, sent as Content-Length
+                (otherwise the body is sent with chunked transfer encoding)
+            bucket: Storage bucket name
+            upsert: Overwrite an existing object at the same path
+            hasher: Optional hashlib object updated with every chunk sent
+
+        Returns:
+            Number of bytes uploaded
+
+        Raises:
+            UploadTooLarge: If the stream exceeds max_bytes
+            httpx.HTTPStatusError: If Storage rejects the upload
+        """
+        if content_length is not None and content_length > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+
+        sent = 0
+
+        async def counted() -> AsyncIterator[bytes]:
+            nonlocal sent
+            async for chunk in chunks:
+                sent += len(chunk)
+                if sent > self.max_bytes:
+                    raise UploadTooLarge(self.max_bytes)
+                if hasher is not None:
+                    hasher.update(chunk)
+                yield chunk
+
+        headers = {**STORAGE_HEADERS, "Content-Type": content_type}
+        if content_length is not None:
+            headers["Content-Length"] = str(content_length)
+        if upsert:
+            headers["x-upsert"] = "true"
+
+        response = await self.db.client.post(
+            self.object_url(storage_path, bucket),
+            headers=headers,
+            content=counted(),
+        )
+        response.raise_for_status()
+        return sent
+
+    async def download(
+        self,
+        url: str,
+        max_memory: int = AUDIO_SPOOL_MAX_MEMORY,
+        named: bool = False,
+        hasher=None,
+    ) -> BinaryIO:
+        """
+        Stream a remote audio file into a spooled temp file.
+
+        Only max_memory bytes are ever held in RAM; larger files spill to
+        disk as they arrive. The caller owns the returned file and should
+        close it (it is a context manager).
+
+        Args:
+            url: Audio URL
+            max_memory: In-memory threshold before spilling to disk
+            named: Write straight to a named temp file on disk instead, for
+                consumers (e.g. ffmpeg) that need a filesystem path
+            hasher: Optional hashlib object updated with every chunk received
+
+        Returns:
+            Temp file positioned at offset 0
+
+        Raises:
+            UploadTooLarge: If the download exceeds max_bytes
+            httpx.HTTPStatusError: If the download fails
+        """
+        suffix = Path(urlparse(url).path).suffix
+        if named:
+            spool = tempfile.NamedTemporaryFile(suffix=suffix)
+        else:
+            spool = tempfile.SpooledTemporaryFile(max_size=max_memory, suffix=suffix)
+        try:
+            received = 0
+            async with self.db.client.stream("GET", url, timeout=120.0) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(self.chunk_size):
+                    received += len(chunk)
+                    if received > self.max_bytes:
+                        raise UploadTooLarge(self.max_bytes)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    spool.write(chunk)
+            spool.seek(0)
+            return spool
+        except BaseException:
+            spool.close()
+            raise
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from typing import Optional
+from app.config import TAG_TREE_TTL_SECONDS
+from app.db import Database, HEADERS, BASE_URL
+
+
+class TagTree:
+    """
+    In-process cache of the tag hierarchy (tags.parent_id).
+
+    Ancestor and descendant sets are precomputed for every tag, so subtree
+    filters and tree rendering never query Supabase. The routers patch the
+    cache on tag create/update/delete; it is also reloaded after
+    TAG_TREE_TTL_SECONDS to pick up edits made by other workers.
+    """
+
+    def __init__(self, ttl_seconds: float = TAG_TREE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.tags: dict[str, dict] = {}
+        self.children: dict[Optional[str], list[str]] = {}
+        self.ancestors: dict[str, list[str]] = {}
+        self.descendants: dict[str, set[str]] = {}
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _rebuild(self) -> None:
+        children: dict[Optional[str], list[str]] = {}
+        for tag in sorted(self.tags.values(), key=lambda t: (t.get("name") or "", t["id"])):
+            parent = tag.get("parent_id")
+            # Orphans (parent deleted or unknown) are shown as roots
+            children.setdefault(parent if parent in self.tags else None, []).append(tag["id"])
+
+        ancestors: dict[str, list[str]] = {}
+        descendants: dict[str, set[str]] = {tag_id: set() for tag_id in self.tags}
+
+        def walk(root_id: str) -> None:
+            stack = [(root_id, [])]
+            while stack:
+                tag_id, path = stack.pop()
+                if tag_id in ancestors:
+                    continue
+                ancestors[tag_id] = path
+                for ancestor in path:
+                    descendants[ancestor].add(tag_id)
+                stack.extend((child, [*path, tag_id]) for child in reversed(children.get(tag_id, [])))
+
+        for root_id in children.get(None, []):
+            walk(root_id)
+        # A parent_id cycle has no root: break it at its first tag
+        for tag_id in [t for t in self.tags if t not in ancestors]:
+            if tag_id not in ancestors:
+                children[self.tags[tag_id].get("parent_id")].remove(tag_id)
+                children.setdefault(None, []).append(tag_id)
+                walk(tag_id)
+
+        self.children, self.ancestors, self.descendants = children, ancestors, descendants
+
+    def replace(self, tags: list[dict]) -> None:
+        self.tags = {tag["id"]: tag for tag in tags}
+        self._rebuild()
+        self.loaded_at = time.monotonic()
+
+    def upsert(self, tag: dict) -> None:
+        """Add or update one tag (after create or update)."""
+        self.tags[tag["id"]] = {**self.tags.get(tag["id"], {}), **tag}
+        self._rebuild()
+
+    def remove(self, tag_id: str) -> None:
+        """Drop a deleted tag; its children become roots until the next reload."""
+        self.tags.pop(tag_id, None)
+        self._rebuild()
+
+    def invalidate(self) -> None:
+        self.loaded_at = None
+
+    @property
+    def stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl_seconds
+
+    async def ensure_loaded(self, db: Database) -> None:
+        """
+        Load every tag if the cache is empty or expired.
+
+        Raises:
+            httpx.HTTPStatusError: If the tags query fails
+        """
+        if not self.stale:
+            return
+        async with self._lock:
+            if not self.stale:
+                return
+            response = await db.client.get(
+                f"{BASE_URL}/tags", headers=HEADERS, params={"select": "*", "order": "name.asc"}
+            )
+            response.raise_for_status()
+            self.replace(response.json())
+
+    def subtree_ids(self, tag_id: str) -> list[str]:
+        """The tag and all of its descendants (just the tag if unknown)."""
+        return [tag_id, *sorted(self.descendants.get(tag_id, ()))]
+
+    def tree(self, root_id: Optional[str] = None) -> list[dict]:
+        """Nested tags ({...tag, "children": [...]}) under root_id, or all roots."""
+        def node(tag_id: str) -> dict:
+            return {**self.tags[tag_id], "children": [node(c) for c in self.children.get(tag_id, [])]}
+
+        return [node(tag_id) for tag_id in self.children.get(root_id, [])]
+
+
+tag_tree = TagTree()
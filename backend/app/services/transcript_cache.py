@@ -0,0 +1,149 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+from app.config import TRANSCRIPT_CACHE_PATH, TRANSCRIPT_CACHE_MAX_BYTES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    key TEXT PRIMARY KEY,
+    result BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used_at REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcripts_lru_idx ON transcripts (last_used_at);
+CREATE TABLE IF NOT EXISTS audio_hashes (
+    audio_url TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL
+);
+"""
+
+
+def new_content_hasher():
+    """Hash object fed audio bytes as they stream (sha256)."""
+    return hashlib.sha256()
+
+
+class TranscriptCache:
+    """
+    On-disk transcript cache keyed by audio content and engine settings.
+
+    Results are stored zlib-compressed in a local SQLite file and evicted
+    least-recently-used first once their total size exceeds max_bytes.
+    The content hash of each known audio URL is remembered too, so
+    re-running a session hits the cache without downloading the audio again.
+    """
+
+    def __init__(self, db_path: str = TRANSCRIPT_CACHE_PATH, max_bytes: int = TRANSCRIPT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(content_hash: str, engine: str, model: str, language: Optional[str] = None) -> str:
+        return f"{content_hash}:{engine}:{model}:{language or 'auto'}"
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Look up a cached result and mark it recently used.
+
+        Returns:
+            The stored engine result, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM transcripts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE transcripts SET last_used_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, result: dict) -> None:
+        """Store a result, then evict old entries past max_bytes."""
+        blob = zlib.compress(json.dumps(result).encode())
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO transcripts (key, result, size, last_used_at, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, blob, len(blob), now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM transcripts ORDER BY last_used_at"
+        ).fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM transcripts WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def remember_audio(self, audio_url: str, content_hash: str) -> None:
+        """Record the content hash of the audio stored at audio_url."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO audio_hashes (audio_url, content_hash) VALUES (?, ?)",
+                (audio_url, content_hash),
+            )
+
+    def content_hash_for(self, audio_url: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM audio_hashes WHERE audio_url = ?", (audio_url,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+transcript_cache = TranscriptCache()
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Awaitable, BinaryIO, Callable, Optional
+from app.db import Database, HEADERS, BASE_URL
+from app.services.search_index import search_index
+from app.services.storage_service import StorageService
+from app.services.transcript_cache import TranscriptCache, new_content_hasher
+
+
+async def store_transcript(db: Database, session_id: str, result: dict) -> None:
+    """
+    Write an engine result ("text"/"segments") to its session and the
+    search index.
+
+    Raises:
+        Exception: If the session update fails
+    """
+    transcript_text = result.get("text", "")
+    segments = result.get("segments", [])
+    word_count = len(transcript_text.split()) if transcript_text else 0
+
+    resp = await db.client.patch(
+        f"{BASE_URL}/sessions?id=eq.{session_id}",
+        headers=HEADERS,
+        json={
+            "transcript": transcript_text,
+            "transcript_segments": segments,
+            "transcript_words": word_count,
+            "status": "transcribed",
+        },
+    )
+    if resp.status_code not in (200, 204):
+        raise Exception(f"Failed to update session {session_id}: {resp.text}")
+    await asyncio.to_thread(
+        search_index.upsert,
+        session_id, transcript=transcript_text, segments=segments, status="transcribed",
+    )
+
+
+async def transcribe_cached(
+    db: Database,
+    cache: TranscriptCache,
+    storage: StorageService,
+    session_id: str,
+    audio_url: str,
+    cache_key: Callable[[str], str],
+    run: Callable[[BinaryIO, str], Awaitable[dict]],
+    named: bool = False,
+    reuse: Optional[Callable[[str], Awaitable[Optional[dict]]]] = None,
+) -> dict:
+    """
+    Transcribe a stored recording through the transcript cache, then store
+    the result on its session.
+
+    A known audio URL is looked up by its remembered content hash without
+    downloading. Otherwise the audio is downloaded (hashed as it streams),
+    and identical audio under another URL is still served from the cache.
+    Only a miss reaches the engine.
+
+    Args:
+        db: Shared database client
+        cache: Transcript cache
+        storage: Storage client the audio is downloaded with
+        session_id: Session the transcript is written to
+        audio_url: Stored recording
+        cache_key: Builds the cache key (engine settings) from a content hash
+        run: Transcribes the downloaded audio, given the file and its content
+            hash (engines that normalise the audio do it here)
+        named: Download to a named temp file (for ffmpeg)
+        reuse: Optional cheaper path for a known content hash (e.g. tracks
+            normalised by an earlier attempt); returns None to download
+
+    Returns:
+        The engine result
+    """
+    result = None
+    known_hash = cache.content_hash_for(audio_url)
+    if known_hash:
+        result = cache.get(cache_key(known_hash))
+        if result is None and reuse is not None:
+            result = await reuse(known_hash)
+            if result is not None:
+                cache.put(cache_key(known_hash), result)
+
+    if result is None:
+        hasher = new_content_hasher()
+        with await storage.download(audio_url, named=named, hasher=hasher) as audio_file:
+            content_hash = hasher.hexdigest()
+            cache.remember_audio(audio_url, content_hash)
+            key = cache_key(content_hash)
+            if content_hash != known_hash:
+                result = cache.get(key)
+            if result is None:
+                result = await run(audio_file, content_hash)
+                cache.put(key, result)
+
+    await store_transcript(db, session_id, result)
+    return result
@@ -1,5 +1,190 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+from urllib.parse import urlparse
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import InvalidHandshake, InvalidURI
+from app.config import (
+    WYNONA_HOST,
+    WYNONA_PORT,
+    WYNONA_DIARIZE,
+    WYNONA_STREAM_CHUNK_SIZE,
+    WYNONA_OPEN_TIMEOUT,
+    WYNONA_PARK_RETRY_SECONDS,
+)
+from app.db import Database
+from app.services.storage_service import StorageService
+from app.services.rate_limiter import EngineUnavailable
+from app.services.transcripts import transcribe_cached
+from app.services.transcript_cache import TranscriptCache, transcript_cache
+
+MODEL = "whisperx"
+
+# Incoming messages are single segments; a generous cap still bounds memory
+MAX_MESSAGE_BYTES = 4 * 1024 * 1024
+
+
+def build_result(segments: list[dict], language: Optional[str], duration: Optional[float]) -> dict:
+    """
+    Assemble streamed WhisperX segments into the engine result shape.
+
+    Returns:
+        Result dictionary with "text", "segments", "duration" and, when the
+        server diarized the audio, the sorted "speakers" list
+    """
+    segments = sorted(segments, key=lambda s: s.get("start", 0.0))
+    for index, segment in enumerate(segments):
+        segment["id"] = index
+
+    result = {
+        "text": " ".join(s["text"].strip() for s in segments if s.get("text", "").strip()),
+        "segments": segments,
+        "duration": duration,
+    }
+    if duration is None:
+        result["duration"] = segments[-1].get("end", 0.0) if segments else 0.0
+    speakers = sorted({s["speaker"] for s in segments if s.get("speaker")})
+    if speakers:
+        result["speakers"] = speakers
+    if language:
+        result["language"] = language
+    return result
+
+
 class WynonaService:
-    """WhisperX transcription service on WYNONA GPU server (stub)."""
+    """
+    WhisperX transcription service on WYNONA GPU server.
+
+    Audio is streamed over the whisperx-stream WebSocket (/ws/transcribe)
+    in fixed-size binary frames while segments come back incrementally on
+    the same connection:
+
+        Client → Server: JSON {"type": "config", "language", "diarize", "filename"}
+        Client → Server: binary audio frames, then JSON {"type": "end"}
+        Server → Client: JSON {"type": "segment", "segment": {start, end, text, speaker?, words?}}
+        Server → Client: JSON {"type": "done", "language", "duration"}
+        Server → Client: JSON {"type": "error", "message"}
+
+    Sending waits on the socket's write buffer, so a busy GPU host slows the
+    upload down instead of growing memory on either side.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        host: str = WYNONA_HOST,
+        port: int = WYNONA_PORT,
+        diarize: bool = WYNONA_DIARIZE,
+        chunk_size: int = WYNONA_STREAM_CHUNK_SIZE,
+        cache: TranscriptCache = transcript_cache,
+    ):
+        self.db = db
+        self.storage = StorageService(db)
+        self.cache = cache
+        self.host = host
+        self.port = port
+        self.diarize = diarize
+        self.chunk_size = chunk_size
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/ws/transcribe"
+
+    async def transcribe(
+        self,
+        session_id: str,
+        audio_url: str,
+        language: Optional[str] = None,
+        on_segment: Optional[Callable[[dict], None]] = None,
+    ) -> dict:
+        if not self.host:
+            raise ValueError("WYNONA_HOST is not configured")
+
+        variant = f"{MODEL}+diarize" if self.diarize else MODEL
+
+        async def run(audio_file: BinaryIO, content_hash: str) -> dict:
+            filename = f"audio{Path(urlparse(audio_url).path).suffix.lower()}"
+            return await self.stream(audio_file, language, filename, on_segment)
+
+        return await transcribe_cached(
+            self.db, self.cache, self.storage, session_id, audio_url,
+            lambda content_hash: self.cache.key(content_hash, "wynona", variant, language),
+            run,
+        )
+
+    async def stream(
+        self,
+        audio_file: BinaryIO,
+        language: Optional[str] = None,
+        filename: str = "audio",
+        on_segment: Optional[Callable[[dict], None]] = None,
+    ) -> dict:
+        """
+        Stream one file to WhisperX and collect its segments.
+
+        Args:
+            audio_file: Audio positioned at offset 0
+            language: Language hint, or None to let WhisperX detect it
+            filename: Name sent with the config (the extension hints the format)
+            on_segment: Called with each segment as soon as it arrives
+
+        Returns:
+            Result with "text", "segments", "duration" (and "speakers")
+
+        Raises:
+            EngineUnavailable: If the WhisperX server cannot be reached
+            RuntimeError: If the server reports an error or hangs up early
+        """
+        try:
+            websocket = await connect(
+                self.url, open_timeout=WYNONA_OPEN_TIMEOUT, max_size=MAX_MESSAGE_BYTES
+            )
+        except (OSError, asyncio.TimeoutError, InvalidHandshake, InvalidURI) as e:
+            raise EngineUnavailable(
+                "wynona",
+                f"WhisperX unreachable at {self.url}: {e}",
+                retry_after=WYNONA_PARK_RETRY_SECONDS,
+            )
+
+        async with websocket:
+            await websocket.send(json.dumps({
+                "type": "config",
+                "language": language,
+                "diarize": self.diarize,
+                "filename": filename,
+            }))
+            sender = asyncio.create_task(self._send_audio(websocket, audio_file))
+            try:
+                segments, done = await self._receive(websocket, on_segment)
+            finally:
+                if not sender.done():
+                    sender.cancel()
+                await asyncio.gather(sender, return_exceptions=True)
+
+        return build_result(segments, done.get("language"), done.get("duration"))
+
+    async def _send_audio(self, websocket: ClientConnection, audio_file: BinaryIO) -> None:
+        while True:
+            # Spooled or named temp files read from disk; keep it off the loop
+            chunk = await asyncio.to_thread(audio_file.read, self.chunk_size)
+            if not chunk:
+                break
+            await websocket.send(chunk)
+        await websocket.send(json.dumps({"type": "end"}))
 
-    async def transcribe(self, session_id: str, audio_url: str) -> dict:
-        raise NotImplementedError("WynonaService.transcribe() not yet implemented")
+    async def _receive(
+        self, websocket: ClientConnection, on_segment: Optional[Callable[[dict], None]]
+    ) -> tuple[list[dict], dict]:
+        segments = []
+        async for message in websocket:
+            event = json.loads(message)
+            if event.get("type") == "segment":
+                segments.append(event["segment"])
+                if on_segment:
+                    on_segment(event["segment"])
+            elif event.get("type") == "done":
+                return segments, event
+            elif event.get("type") == "error":
+                raise RuntimeError(f"WhisperX error: {event.get('message')}")
+        raise RuntimeError("WhisperX closed the stream before finishing")
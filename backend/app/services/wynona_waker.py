@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import re
+import socket
+import time
+from typing import Callable, Optional
+from app.config import (
+    WYNONA_WOL_MAC,
+    WYNONA_WOL_BROADCAST,
+    WYNONA_WOL_PORT,
+    WYNONA_WAKE_BACKLOG_SECONDS,
+    WYNONA_WAKE_CHECK_SECONDS,
+    WYNONA_BOOT_DEADLINE_SECONDS,
+    WYNONA_WAKE_COOLDOWN_SECONDS,
+    WYNONA_PARK_RETRY_SECONDS,
+)
+from app.services.engine_health import EngineHealthProber
+from app.services.queue_manager import QueueManager
+from app.services.rate_limiter import EngineUnavailable
+
+logger = logging.getLogger(__name__)
+
+MAC_RE = re.compile(r"^[0-9A-Fa-f]{2}([:-]?)(?:[0-9A-Fa-f]{2}\1){4}[0-9A-Fa-f]{2}$")
+
+
+def build_magic_packet(mac: str) -> bytes:
+    """
+    Build a wake-on-LAN magic packet: 6 x 0xFF then the MAC 16 times.
+
+    Raises:
+        ValueError: If mac is not a 6-byte MAC address
+    """
+    if not MAC_RE.match(mac or ""):
+        raise ValueError(f"Invalid MAC address: {mac!r}")
+    mac_bytes = bytes.fromhex(re.sub(r"[:-]", "", mac))
+    return b"\xff" * 6 + mac_bytes * 16
+
+
+def send_magic_packet(
+    mac: str, broadcast: str = WYNONA_WOL_BROADCAST, port: int = WYNONA_WOL_PORT
+) -> None:
+    """Broadcast a magic packet over UDP (sent 3 times, UDP may drop one)."""
+    packet = build_magic_packet(mac)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        for _ in range(3):
+            sock.sendto(packet, (broadcast, port))
+
+
+class WynonaWaker:
+    """
+    Wakes the WYNONA GPU host on demand and ahead of demand.
+
+    States: "online" (health check green), "booting" (magic packet sent,
+    within the boot deadline), "failed" (deadline passed; no new wake until
+    the cooldown ends) and "asleep".
+
+    A scheduler loop wakes WYNONA when queued audio that could run on it
+    for free (wynona jobs plus queued "auto" jobs) crosses a threshold, and
+    moves queued "auto" jobs onto it once it comes online. WYNONA jobs that
+    reach a worker early are parked until the host is up; once the boot
+    deadline passes, every queued WYNONA job falls back to Groq at once.
+    Without a fallback engine, parked jobs are bounded by the worker's
+    parking budget instead.
+    """
+
+    def __init__(
+        self,
+        queue: QueueManager,
+        prober: EngineHealthProber,
+        mac: str = WYNONA_WOL_MAC,
+        fallback_engine: Optional[str] = "groq-turbo",
+        on_ready: Optional[Callable[[], None]] = None,
+        send: Callable[[str], None] = send_magic_packet,
+        backlog_threshold_seconds: float = WYNONA_WAKE_BACKLOG_SECONDS,
+        check_seconds: float = WYNONA_WAKE_CHECK_SECONDS,
+        boot_deadline_seconds: float = WYNONA_BOOT_DEADLINE_SECONDS,
+        cooldown_seconds: float = WYNONA_WAKE_COOLDOWN_SECONDS,
+        park_retry_seconds: float = WYNONA_PARK_RETRY_SECONDS,
+    ):
+        self.queue = queue
+        self.prober = prober
+        self.mac = mac
+        self.fallback_engine = fallback_engine
+        self.on_ready = on_ready
+        self.send = send
+        self.backlog_threshold_seconds = backlog_threshold_seconds
+        self.check_seconds = check_seconds
+        self.boot_deadline_seconds = boot_deadline_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.park_retry_seconds = park_retry_seconds
+        self.woken_at: Optional[float] = None
+        self.wake_reason: Optional[str] = None
+        self.wakes_total = 0
+        self.rerouted_total = 0
+        self._online = False
+        self._failed_boot: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def state(self) -> str:
+        if self._online:
+            return "online"
+        if self.woken_at is None:
+            return "asleep"
+        elapsed = time.time() - self.woken_at
+        if elapsed <= self.boot_deadline_seconds:
+            return "booting"
+        if elapsed <= self.boot_deadline_seconds + self.cooldown_seconds:
+            return "failed"
+        return "asleep"
+
+    def wake(self, reason: str) -> bool:
+        """
+        Send the magic packet unless a boot is already in progress.
+
+        Returns:
+            True if a packet was sent
+
+        Raises:
+            ValueError: If no valid WYNONA_WOL_MAC is configured
+        """
+        if self.state in ("online", "booting"):
+            return False
+        self.send(self.mac)
+        self.woken_at = time.time()
+        self.wake_reason = reason
+        self.wakes_total += 1
+        logger.info("Sent wake-on-LAN to WYNONA: %s", reason)
+        return True
+
+    def eligible_backlog_seconds(self) -> float:
+        """Queued audio seconds that could run on WYNONA for free."""
+        return self.queue.queued_audio_seconds("wynona", include_routed=True)
+
+    def _reroute_to_wynona(self) -> int:
+        """Move queued "auto" jobs to WYNONA now that it is up."""
+        moved = self.queue.reroute_queued("wynona", "wynona came online")
+        self.rerouted_total += moved
+        return moved
+
+    def _fall_back_after_failed_boot(self) -> int:
+        """Move jobs parked on WYNONA to the fallback engine, once per failed boot."""
+        if self._failed_boot == self.woken_at or not self.fallback_engine:
+            return 0
+        self._failed_boot = self.woken_at
+        return self.queue.reassign_queued(
+            "wynona", self.fallback_engine,
+            f"WYNONA did not come online, falling back to {self.fallback_engine}",
+        )
+
+    def _set_online(self, online: bool) -> None:
+        came_online = online and not self._online
+        self._online = online
+        if online:
+            self.woken_at = None
+        if came_online:
+            moved = self._reroute_to_wynona()
+            if moved:
+                logger.info("WYNONA online, moved %d queued auto jobs to it", moved)
+            if self.on_ready:
+                self.on_ready()
+
+    async def tick(self) -> None:
+        """One scheduler step: track boot progress, wake on backlog."""
+        # While booting, probe directly rather than waiting for the prober
+        if self.state == "booting":
+            status = await self.prober.probe("wynona")
+        else:
+            status = await self.prober.status("wynona")
+        self._set_online(status == "online")
+
+        if self.state == "failed":
+            moved = self._fall_back_after_failed_boot()
+            if moved:
+                logger.info(
+                    "WYNONA boot failed, moved %d parked jobs to %s", moved, self.fallback_engine
+                )
+                if self.on_ready:
+                    self.on_ready()
+        elif self.state == "asleep" and self.mac:
+            backlog = self.eligible_backlog_seconds()
+            if backlog >= self.backlog_threshold_seconds:
+                self.wake(f"{backlog:.0f}s of audio queued for free transcription")
+
+    async def ensure_ready(self) -> None:
+        """
+        Make sure WYNONA can take a job, waking it if needed.
+
+        Raises:
+            EngineUnavailable: To park the job while WYNONA boots, or to move
+                it to the fallback engine when it cannot be woken in time
+        """
+        self._set_online(await self.prober.status("wynona") == "online")
+        if self._online:
+            return
+        if self.state == "asleep" and self.mac:
+            self.wake("wynona job waiting")
+        if self.state == "booting":
+            waited = time.time() - self.woken_at
+            raise EngineUnavailable(
+                "wynona",
+                f"WYNONA booting ({waited:.0f}s of {self.boot_deadline_seconds:.0f}s), job parked",
+                retry_after=self.park_retry_seconds,
+            )
+        reason = "WYNONA did not come online" if self.mac else "WYNONA offline and no WYNONA_WOL_MAC"
+        if self.fallback_engine:
+            raise EngineUnavailable(
+                "wynona", f"{reason}, falling back to {self.fallback_engine}",
+                fallback=self.fallback_engine,
+            )
+        raise EngineUnavailable(
+            "wynona", f"{reason}, job parked", retry_after=self.park_retry_seconds
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "wol_configured": bool(self.mac),
+            "woken_at": self.woken_at,
+            "wake_reason": self.wake_reason,
+            "wakes_total": self.wakes_total,
+            "rerouted_total": self.rerouted_total,
+            "eligible_backlog_seconds": self.eligible_backlog_seconds(),
+            "backlog_threshold_seconds": self.backlog_threshold_seconds,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("WYNONA wake scheduler step failed")
+            await asyncio.sleep(self.check_seconds)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,50 @@
+-- Tag statistics exposed as PostgREST computed fields on app_nomad.tags.
+-- Usage: GET /rest/v1/tags?select=*,session_count:tag_session_count,...
+
+create index if not exists session_tags_tag_id_idx on app_nomad.session_tags (tag_id);
+create index if not exists tags_parent_id_idx on app_nomad.tags (parent_id);
+
+-- Ids of a tag and all of its descendants
+create or replace function app_nomad.tag_subtree_ids(root_id uuid)
+returns setof uuid
+language sql stable
+as $$
+  with recursive subtree as (
+    select id from app_nomad.tags where id = root_id
+    union
+    select child.id from app_nomad.tags child join subtree s on child.parent_id = s.id
+  )
+  select id from subtree;
+$$;
+
+-- Sessions tagged directly with this tag
+create or replace function app_nomad.tag_session_count(t app_nomad.tags)
+returns bigint
+language sql stable
+as $$
+  select count(*) from app_nomad.session_tags st
+  join app_nomad.sessions s on s.id = st.session_id
+  where st.tag_id = t.id and s.deleted_at is null;
+$$;
+
+-- Distinct sessions tagged with this tag or any descendant tag
+create or replace function app_nomad.tag_session_count_rollup(t app_nomad.tags)
+returns bigint
+language sql stable
+as $$
+  select count(distinct st.session_id) from app_nomad.session_tags st
+  join app_nomad.sessions s on s.id = st.session_id
+  where st.tag_id in (select app_nomad.tag_subtree_ids(t.id)) and s.deleted_at is null;
+$$;
+
+-- Total audio duration of the distinct sessions in the rollup
+create or replace function app_nomad.tag_total_duration_seconds(t app_nomad.tags)
+returns bigint
+language sql stable
+as $$
+  select coalesce(sum(s.duration_seconds), 0) from app_nomad.sessions s
+  where s.deleted_at is null and s.id in (
+    select st.session_id from app_nomad.session_tags st
+    where st.tag_id in (select app_nomad.tag_subtree_ids(t.id))
+  );
+$$;
@@ -0,0 +1,8 @@
+-- Indexes matching the keyset order of the session and tag listings, so a
+-- page after any cursor is a single index range scan.
+
+create index if not exists sessions_created_at_id_idx
+  on app_nomad.sessions (created_at desc, id desc);
+
+create index if not exists tags_name_id_idx
+  on app_nomad.tags (name, id);
@@ -0,0 +1,17 @@
+-- Session list projection: computed fields on app_nomad.sessions so list
+-- cards get a transcript preview without downloading the transcript.
+-- Usage: GET /rest/v1/sessions?select=id,title,transcript_preview:session_transcript_preview,...
+
+create or replace function app_nomad.session_transcript_preview(s app_nomad.sessions)
+returns text
+language sql stable
+as $$
+  select left(s.transcript, 200);
+$$;
+
+create or replace function app_nomad.session_transcript_length(s app_nomad.sessions)
+returns integer
+language sql stable
+as $$
+  select coalesce(char_length(s.transcript), 0);
+$$;
@@ -0,0 +1,57 @@
+-- Content versions for conditional GETs (ETag / If-None-Match).
+-- Each function hashes exactly what the API returns for the row. The
+-- versions are computed fields, so a plain GET selects them alongside the
+-- row (select=*,version:session_version), and RPCs, so a revalidation
+-- costs one call returning 32 characters instead of the row.
+-- Usage: POST /rest/v1/rpc/session_etag {"session_id": "..."}
+-- Requires 001_tag_stats.sql (tag_version hashes the computed stats).
+
+-- Session row with its tags and notes (GET /api/sessions/:id)
+create or replace function app_nomad.session_version(s app_nomad.sessions)
+returns text
+language sql stable
+as $$
+  select md5(
+    row_to_json(s)::text
+    || coalesce((
+      select json_agg(t order by t.id)::text from app_nomad.tags t
+      join app_nomad.session_tags st on st.tag_id = t.id
+      where st.session_id = s.id
+    ), '')
+    || coalesce((
+      select json_agg(n order by n.created_at, n.id)::text from app_nomad.notes n
+      where n.session_id = s.id
+    ), '')
+  );
+$$;
+
+create or replace function app_nomad.session_etag(session_id uuid)
+returns text
+language sql stable
+as $$
+  select app_nomad.session_version(s)
+  from app_nomad.sessions s
+  where s.id = session_etag.session_id;
+$$;
+
+-- Tag row with its session statistics (GET /api/tags/:id)
+create or replace function app_nomad.tag_version(t app_nomad.tags)
+returns text
+language sql stable
+as $$
+  select md5(
+    row_to_json(t)::text
+    || app_nomad.tag_session_count(t)::text || ':'
+    || app_nomad.tag_session_count_rollup(t)::text || ':'
+    || app_nomad.tag_total_duration_seconds(t)::text
+  );
+$$;
+
+create or replace function app_nomad.tag_etag(tag_id uuid)
+returns text
+language sql stable
+as $$
+  select app_nomad.tag_version(t)
+  from app_nomad.tags t
+  where t.id = tag_etag.tag_id;
+$$;
@@ -0,0 +1,15 @@
+-- Atomic mark append: concatenates onto the JSONB marks array inside a
+-- single UPDATE, so concurrent taps serialise on the row lock instead of
+-- overwriting each other through a read-modify-write.
+-- Usage: POST /rest/v1/rpc/append_session_marks {"session_id": "...", "new_marks": [...]}
+-- Returns the full marks array, or null if the session does not exist.
+
+create or replace function app_nomad.append_session_marks(session_id uuid, new_marks jsonb)
+returns jsonb
+language sql volatile
+as $$
+  update app_nomad.sessions s
+  set marks = coalesce(s.marks, '[]'::jsonb) || new_marks
+  where s.id = append_session_marks.session_id
+  returning s.marks;
+$$;
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Round-trip benchmark for the mutating endpoints
+
+Runs each endpoint against a mocked Supabase that delays every request by
+a fixed round-trip time (the API talks to a distant Supabase region) and
+reports how many upstream calls each request made and its latency, next
+to the same endpoints before the existence-check round trips were
+dropped (BASELINE).
+
+The baseline was measured by running this script against the tree before
+that change (80 ms RTT, median of 10 runs):
+
+    endpoint                        upstream calls  median ms
+    delete_session                             2.0      165.7
+    add_note_to_session                        2.0      165.3
+    delete_tag                                 2.0      164.1
+    associate_tags_with_session                3.0      165.6
+    transcribe_session                         1.0       83.8
+
+Every request there was bound by its sequential round trips, so the
+baseline is kept as (upstream calls, sequential round trips) and scaled to
+the --rtt-ms given.
+
+Usage:
+    python tests/benchmark_round_trips.py [--rtt-ms 80] [--runs 10]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Same isolation as tests/conftest.py: no real Supabase, temporary stores
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark-service-key")
+for name, filename in (
+    ("QUEUE_DB_PATH", "queue.sqlite3"),
+    ("TRANSCRIPT_CACHE_PATH", "cache.sqlite3"),
+    ("SEARCH_INDEX_PATH", "search.sqlite3"),
+):
+    os.environ.setdefault(name, os.path.join(tempfile.mkdtemp(prefix="nomad-bench-"), filename))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.db import Database, get_db
+from app.main import app
+
+SESSION = {
+    "id": "s1",
+    "title": "Réunion",
+    "status": "pending",
+    "audio_url": "martun/s1.webm",
+    "duration_seconds": 60,
+    "input_mode": "rec",
+    "created_at": "2026-01-01T10:00:00+00:00",
+}
+TAG = {"id": "t1", "name": "Call", "created_at": "2026-01-01T00:00:00Z"}
+
+ENDPOINTS = [
+    ("delete_session", "DELETE", "/api/sessions/s1", None),
+    ("add_note_to_session", "POST", "/api/sessions/s1/notes", {"content": "Relancer Marc"}),
+    ("delete_tag", "DELETE", "/api/tags/t1", None),
+    ("associate_tags_with_session", "POST", "/api/sessions/s1/tags", {"tag_ids": ["t1"]}),
+    ("transcribe_session", "POST", "/api/transcribe/s1", {"engine": "groq-turbo"}),
+]
+
+# Before: a GET checking existence, then the write (associate_tags_with_session
+# read the session and tags concurrently, then upserted)
+BASELINE = {
+    "delete_session": (2, 2),
+    "add_note_to_session": (2, 2),
+    "delete_tag": (2, 2),
+    "associate_tags_with_session": (3, 2),
+    "transcribe_session": (1, 1),
+}
+
+
+class SlowSupabase:
+    """Answers like PostgREST for one session and one tag, after rtt seconds."""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.calls = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.rtt)
+        table = request.url.path.rsplit("/", 1)[1]
+        if table == "notes":
+            note = {"id": "n1", "session_id": "s1", "created_at": "2026-01-01T11:00:00Z",
+                    **json.loads(request.content)}
+            return httpx.Response(201, json=[note])
+        if table == "session_tags":
+            return httpx.Response(201, json=json.loads(request.content))
+        if table == "tags":
+            return httpx.Response(200, json=[TAG])
+        return httpx.Response(200, json=[{**SESSION, "tags": [], "notes": []}])
+
+
+def run(rtt_ms: float, runs: int) -> list[dict]:
+    upstream = SlowSupabase(rtt_ms / 1000)
+    app.dependency_overrides[get_db] = lambda: Database(transport=httpx.MockTransport(upstream.handle))
+    client = TestClient(app)
+    results = []
+    try:
+        for name, method, path, body in ENDPOINTS:
+            timings = []
+            upstream.calls = 0
+            for _ in range(runs):
+                started = time.perf_counter()
+                response = client.request(method, path, json=body)
+                timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code < 300, (name, response.status_code, response.text)
+            results.append({
+                "endpoint": name,
+                "upstream_calls": upstream.calls / runs,
+                "median_ms": statistics.median(timings),
+            })
+    finally:
+        app.dependency_overrides.clear()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rtt-ms", type=float, default=80.0, help="Simulated Supabase round trip")
+    parser.add_argument("--runs", type=int, default=10, help="Requests per endpoint")
+    args = parser.parse_args()
+
+    print(f"Supabase RTT {args.rtt_ms:.0f} ms, {args.runs} runs per endpoint\n")
+    print(
+        f"{'endpoint':<30} {'calls before':>13} {'calls after':>12} "
+        f"{'ms before*':>11} {'ms after':>9}"
+    )
+    for row in run(args.rtt_ms, args.runs):
+        calls, round_trips = BASELINE[row["endpoint"]]
+        print(
+            f"{row['endpoint']:<30} {calls:>13.1f} {row['upstream_calls']:>12.1f} "
+            f"{round_trips * args.rtt_ms:>11.1f} {row['median_ms']:>9.1f}"
+        )
+    print("\n* baseline round trips x RTT (measured values in the module docstring)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+import pytest
+
+# Point Supabase at an unroutable local port so tests never reach a real
+# project; tests that need upstream responses use httpx.MockTransport.
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+
+# Keep the durable job queue, transcript cache and search index out of the
+# working tree
+os.environ.setdefault(
+    "QUEUE_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="nomad-tests-"), "queue.sqlite3")
+)
+os.environ.setdefault(
+    "TRANSCRIPT_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="nomad-tests-"), "cache.sqlite3")
+)
+os.environ.setdefault(
+    "SEARCH_INDEX_PATH", os.path.join(tempfile.mkdtemp(prefix="nomad-tests-"), "search.sqlite3")
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_upstream_features():
+    # Each test starts with every optional upstream SQL feature assumed installed
+    from app.db import features
+
+    features.reset()
+    yield
+    features.reset()
@@ -0,0 +1,151 @@
+"""Local stand-in for Deepgram's /v1/listen, pre-recorded and streaming."""
+import asyncio
+import hashlib
+import json
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+from websockets.asyncio.server import serve
+from websockets.datastructures import Headers
+from websockets.http11 import Response
+
+
+def _words(text, start, end):
+    tokens = text.split()
+    step = (end - start) / len(tokens)
+    return [
+        {
+            "word": token.strip(".,!?").lower(),
+            "punctuated_word": token,
+            "start": round(start + i * step, 3),
+            "end": round(start + (i + 1) * step, 3),
+            "confidence": 0.98,
+        }
+        for i, token in enumerate(tokens)
+    ]
+
+
+class FakeDeepgram:
+    """
+    Answers with canned utterances.
+
+    handle() is an httpx.MockTransport handler for pre-recorded requests;
+    the async context manager serves the streaming API on a local port,
+    emitting one interim and one final result per utterance after every
+    bytes_per_result bytes of audio, and the rest on CloseStream.
+
+    Args:
+        utterances: (text, start, end[, channel]) tuples, in order
+        api_key: Token expected in the Authorization header
+        bytes_per_result: Audio bytes received per streamed utterance
+        status_code: Pre-recorded response status (e.g. 429)
+    """
+
+    def __init__(self, utterances, api_key="test-deepgram-key", bytes_per_result=4096, status_code=200):
+        self.utterances = utterances
+        self.api_key = api_key
+        self.bytes_per_result = bytes_per_result
+        self.status_code = status_code
+        self.requests = []
+        self.params = None
+        self.bytes_received = 0
+        self.digest = hashlib.sha256()
+        self.closed_cleanly = False
+
+    # Pre-recorded
+
+    def payload(self, multichannel=False):
+        channels = max((u[3] if len(u) > 3 else 0) for u in self.utterances) + 1 if multichannel else 1
+        utterances = [
+            {
+                "start": u[1],
+                "end": u[2],
+                "transcript": u[0],
+                "channel": u[3] if multichannel and len(u) > 3 else 0,
+                "words": _words(*u[:3]),
+            }
+            for u in self.utterances
+        ]
+        return {
+            "metadata": {"duration": max(u[2] for u in self.utterances)},
+            "results": {
+                "channels": [
+                    {
+                        "alternatives": [{
+                            "transcript": " ".join(x["transcript"] for x in utterances if x["channel"] == c),
+                            "words": [w for x in utterances if x["channel"] == c for w in x["words"]],
+                        }]
+                    }
+                    for c in range(channels)
+                ],
+                "utterances": utterances,
+            },
+        }
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        self.requests.append({
+            "params": dict(request.url.params),
+            "headers": dict(request.headers),
+            "bytes": len(body),
+        })
+        if request.headers.get("Authorization") != f"Token {self.api_key}":
+            return httpx.Response(401, json={"err_code": "INVALID_AUTH"})
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, headers={"Retry-After": "1"}, json={})
+        multichannel = request.url.params.get("multichannel") == "true"
+        return httpx.Response(200, json=self.payload(multichannel))
+
+    # Streaming
+
+    def _results(self, text, start, end, is_final):
+        return json.dumps({
+            "type": "Results",
+            "start": start,
+            "duration": round(end - start, 3),
+            "is_final": is_final,
+            "speech_final": is_final,
+            "channel": {"alternatives": [{
+                "transcript": text if is_final else " ".join(text.split()[:-1]),
+                "words": _words(text, start, end) if is_final else [],
+            }]},
+        })
+
+    def _authorize(self, connection, request):
+        if request.headers.get("Authorization") != f"Token {self.api_key}":
+            return Response(401, "Unauthorized", Headers(), b"")
+        return None
+
+    async def _handler(self, websocket):
+        self.params = {k: v[0] for k, v in parse_qs(urlparse(websocket.request.path).query).items()}
+        pending = list(self.utterances)
+        emitted_until = 0
+        async for message in websocket:
+            if isinstance(message, str):
+                if json.loads(message).get("type") == "CloseStream":
+                    self.closed_cleanly = True
+                    break
+                continue
+            self.bytes_received += len(message)
+            self.digest.update(message)
+            while pending and self.bytes_received - emitted_until >= self.bytes_per_result:
+                text, start, end = pending.pop(0)[:3]
+                await websocket.send(self._results(text, start, end, False))
+                await websocket.send(self._results(text, start, end, True))
+                emitted_until += self.bytes_per_result
+            await asyncio.sleep(0)
+
+        for text, start, end, *_ in pending:
+            await websocket.send(self._results(text, start, end, True))
+        end = max((u[2] for u in self.utterances), default=0.0)
+        await websocket.send(json.dumps({"type": "Metadata", "duration": end}))
+
+    async def __aenter__(self):
+        self._server = await serve(self._handler, "127.0.0.1", 0, process_request=self._authorize)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.ws_url = f"ws://{host}:{port}/v1/listen"
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
@@ -0,0 +1,67 @@
+"""Local stand-in for the whisperx-stream container's /ws/transcribe."""
+import asyncio
+import hashlib
+import json
+
+from websockets.asyncio.server import serve
+
+
+class FakeWhisperX:
+    """
+    Streams canned segments back while audio is still arriving.
+
+    Args:
+        segments: Segments to emit, in order
+        segment_latency: Delay before each segment is sent
+        read_delay: Delay after each audio frame is read, to simulate a busy
+            GPU host and exercise back-pressure
+        error: If set, reply with an error message instead of segments
+    """
+
+    def __init__(self, segments, segment_latency=0.0, read_delay=0.0, error=None):
+        self.segments = segments
+        self.segment_latency = segment_latency
+        self.read_delay = read_delay
+        self.error = error
+        self.config = None
+        self.bytes_received = 0
+        self.frames_received = 0
+        self.digest = hashlib.sha256()
+        self.url = None
+
+    async def _handler(self, websocket):
+        self.config = json.loads(await websocket.recv())
+
+        async def emit():
+            for segment in self.segments:
+                await asyncio.sleep(self.segment_latency)
+                await websocket.send(json.dumps({"type": "segment", "segment": segment}))
+
+        emitter = asyncio.create_task(emit()) if not self.error else None
+        async for message in websocket:
+            if isinstance(message, str):
+                if json.loads(message).get("type") == "end":
+                    break
+                continue
+            self.bytes_received += len(message)
+            self.frames_received += 1
+            self.digest.update(message)
+            if self.read_delay:
+                await asyncio.sleep(self.read_delay)
+
+        if self.error:
+            await websocket.send(json.dumps({"type": "error", "message": self.error}))
+            return
+        await emitter
+        end = self.segments[-1]["end"] if self.segments else 0.0
+        await websocket.send(json.dumps({"type": "done", "language": "fr", "duration": end}))
+
+    async def __aenter__(self):
+        self._server = await serve(self._handler, "127.0.0.1", 0, max_queue=2)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.host, self.port = host, port
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
@@ -0,0 +1,63 @@
+import asyncio
+
+import httpx
+
+from app.db import Database
+from app.services.audio_normalizer import AudioNormalizer, merge_channels
+from app.services.groq_service import GroqService
+from app.services.transcript_cache import TranscriptCache
+
+
+def test_merge_channels_interleaves_by_time_and_labels_segments():
+    mic = {"segments": [{"start": 0.0, "end": 2.0, "text": "Salut"},
+                        {"start": 5.0, "end": 6.0, "text": "oui"}], "duration": 6.0}
+    system = {"segments": [{"start": 2.5, "end": 4.0, "text": "Bonjour à tous"}],
+              "duration": 6.2, "language": "french"}
+
+    merged = merge_channels([("mic", mic), ("system", system)])
+
+    assert merged["text"] == "Salut Bonjour à tous oui"
+    assert [s["channel"] for s in merged["segments"]] == ["mic", "system", "mic"]
+    assert [s["id"] for s in merged["segments"]] == [0, 1, 2]
+    assert merged["duration"] == 6.2
+    assert merged["language"] == "french"
+
+
+def test_stereo_split_is_configurable_and_cached_per_session(tmp_path):
+    downmix = AudioNormalizer(root=str(tmp_path), stereo_mode="downmix")
+    split = AudioNormalizer(root=str(tmp_path), stereo_mode="split")
+
+    assert not downmix.splits("stereo")
+    assert split.splits("stereo")
+    assert not split.splits("mono")
+
+    tracks = split.track_paths("s1", "ab" * 32, split=True)
+    assert [label for _, label in tracks] == ["mic", "system"]
+    assert split.cached("s1", "ab" * 32, split=True) is None
+    for path, _ in tracks:
+        path.write_bytes(b"opus")
+    assert split.cached("s1", "ab" * 32, split=True) == tracks
+
+
+def test_unprocessed_audio_is_labelled_with_its_real_format(tmp_path):
+    sent = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "api.groq.com":
+            sent["body"] = request.read()
+            return httpx.Response(200, json={"text": "ok", "segments": []})
+        if request.method == "GET":
+            return httpx.Response(200, content=b"webm bytes")
+        return httpx.Response(204)
+
+    service = GroqService(
+        Database(transport=httpx.MockTransport(handler)),
+        cache=TranscriptCache(str(tmp_path / "cache.sqlite3")),
+    )
+    service.api_key = "test"
+    service.chunker.ffmpeg = "missing-ffmpeg"
+
+    asyncio.run(service.transcribe("s1", "http://storage/martun/s1.webm"))
+
+    assert b'filename="audio.webm"' in sent["body"]
+    assert b"Content-Type: audio/webm" in sent["body"]
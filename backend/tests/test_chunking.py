@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from app.services import chunking
+from app.services.chunking import (
+    AudioChunker, dedupe_overlap, parse_silences, plan_chunks, stitch_segments,
+)
+from app.services.transcript_cache import TranscriptCache
+
+
+def test_parse_silences_pairs_start_and_end():
+    stderr = "\n".join([
+        "[silencedetect @ 0x1] silence_start: -0.01",
+        "[silencedetect @ 0x1] silence_end: 1.2 | silence_duration: 1.21",
+        "[silencedetect @ 0x1] silence_start: 300.5",
+        "[silencedetect @ 0x1] silence_end: 301.5 | silence_duration: 1",
+        "[silencedetect @ 0x1] silence_start: 900",
+    ])
+    assert parse_silences(stderr) == [(0.0, 1.2), (300.5, 301.5)]
+
+
+def test_plan_chunks_cuts_at_latest_silence_then_hard_cuts_with_overlap():
+    silences = [(290.0, 292.0), (500.0, 502.0)]
+    chunks = plan_chunks(1500.0, silences, max_seconds=600, min_seconds=120, overlap_seconds=2)
+
+    assert chunks[0] == (0.0, 501.0)
+    # No silence in [621, 1101]: hard cut, next chunk overlaps by 2 s
+    assert chunks[1] == (501.0, 1101.0)
+    assert chunks[2] == (1099.0, 1500.0)
+    assert all(end - start <= 600 for start, end in chunks)
+
+
+def test_plan_chunks_short_recording_is_single_chunk():
+    assert plan_chunks(42.0, []) == [(0.0, 42.0)]
+
+
+def test_dedupe_overlap_trims_repeated_words():
+    assert dedupe_overlap("on a décidé de repousser", "De repousser le lancement.") == "le lancement."
+    assert dedupe_overlap("bonjour", "au revoir") == "au revoir"
+
+
+def test_stitch_segments_offsets_timestamps_and_drops_overlap():
+    first = {"text": "a b c", "language": "french", "segments": [
+        {"start": 0.0, "end": 5.0, "text": " bonjour à tous"},
+        {"start": 5.0, "end": 10.0, "text": " on commence la réunion"},
+    ]}
+    second = {"text": "...", "segments": [
+        {"start": 0.0, "end": 1.0, "text": " la réunion"},
+        {"start": 0.5, "end": 4.0, "text": " la réunion maintenant"},
+        {"start": 4.0, "end": 8.0, "text": " premier point"},
+    ]}
+
+    merged = stitch_segments([(0.0, 10.0, first), (9.0, 17.0, second)])
+
+    assert [s["start"] for s in merged["segments"]] == [0.0, 5.0, 9.5, 13.0]
+    assert [s["id"] for s in merged["segments"]] == [0, 1, 2, 3]
+    assert merged["text"] == "bonjour à tous on commence la réunion maintenant premier point"
+    assert merged["language"] == "french"
+    assert merged["duration"] == 17.0
+
+
+def test_chunks_are_cut_by_stream_copy_and_short_tracks_are_sent_whole(tmp_path, monkeypatch):
+    track = tmp_path / "s1.ogg"
+    track.write_bytes(b"OggS normalised")
+    commands = []
+
+    async def fake_run_process(*args):
+        commands.append(args)
+        with open(args[-1], "wb") as piece:
+            piece.write(b"OggS piece")
+        return "", ""
+
+    monkeypatch.setattr(chunking, "run_process", fake_run_process)
+    chunker = AudioChunker()
+    sent = []
+
+    async def transcribe_piece(piece, filename, content_type):
+        sent.append(piece.read())
+        return {"text": "bonjour", "segments": []}
+
+    async def plan_whole(path):
+        return [(0.0, 42.0)]
+
+    chunker.plan = plan_whole
+    asyncio.run(chunker.transcribe(str(track), transcribe_piece))
+    assert commands == [] and sent == [b"OggS normalised"]
+
+    async def plan_two(path):
+        return [(0.0, 600.0), (600.0, 900.0)]
+
+    chunker.plan = plan_two
+    asyncio.run(chunker.transcribe(str(track), transcribe_piece))
+    assert len(commands) == 2
+    assert all("copy" in command and "libopus" not in command for command in commands)
+
+
+def test_a_failed_chunk_cancels_the_others_and_finished_chunks_are_cached(tmp_path, monkeypatch):
+    track = tmp_path / "s1.ogg"
+    track.write_bytes(b"OggS normalised")
+
+    async def fake_run_process(*args):
+        with open(args[-1], "wb") as piece:
+            piece.write(args[args.index("-ss") + 1].encode())
+        return "", ""
+
+    monkeypatch.setattr(chunking, "run_process", fake_run_process)
+    chunker = AudioChunker(max_attempts=1)
+
+    async def plan_three(path):
+        return [(0.0, 600.0), (600.0, 1200.0), (1200.0, 1500.0)]
+
+    chunker.plan = plan_three
+    cache = TranscriptCache(":memory:")
+    sent, finished = [], []
+
+    async def flaky_engine(piece, filename, content_type):
+        start = piece.read().decode()
+        sent.append(start)
+        if start == "600.000":
+            raise RuntimeError("engine error")
+        if start == "1200.000":
+            await asyncio.sleep(10)
+        finished.append(start)
+        return {"text": start, "segments": []}
+
+    def key(start, end):
+        return f"s1:{start}-{end}"
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(chunker.transcribe(str(track), flaky_engine, cache, key))
+    # The slow chunk was cancelled instead of running on after the failure
+    assert finished == ["0.000"]
+
+    sent.clear()
+
+    async def engine(piece, filename, content_type):
+        start = piece.read().decode()
+        sent.append(start)
+        return {"text": start, "segments": []}
+
+    merged = asyncio.run(chunker.transcribe(str(track), engine, cache, key))
+    assert sorted(sent) == ["1200.000", "600.000"]
+    assert merged["text"] == "0.000 600.000 1200.000"
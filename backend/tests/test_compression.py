@@ -0,0 +1,85 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.compression import available_encodings, negotiate
+from app.db import Database, get_db
+from app.main import app
+from app.models.schemas import SessionResponse
+
+SEGMENTS = [
+    {"id": i, "start": i * 3.1, "end": i * 3.1 + 2.9, "speaker": f"SPEAKER_0{i % 2}",
+     "text": f"et donc on reprend le point sur le budget du projet {i}"}
+    for i in range(3000)
+]
+SESSION = {
+    "id": "s1",
+    "title": "Réunion",
+    "status": "transcribed",
+    "transcript": " ".join(s["text"] for s in SEGMENTS),
+    "transcript_segments": SEGMENTS,
+    "created_at": "2026-01-01T10:00:00+00:00",
+    "internal_column": "not in the response model",
+    "tags": [{"id": "t1", "name": "Call", "created_at": "2026-01-01T00:00:00Z", "session_tags": []}],
+    "notes": [],
+}
+
+
+def _client() -> TestClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "/rpc/" in request.url.path:
+            return httpx.Response(200, json="a" * 32)
+        return httpx.Response(200, json=[SESSION])
+
+    app.dependency_overrides[get_db] = lambda: Database(transport=httpx.MockTransport(handler))
+    return TestClient(app)
+
+
+def test_negotiation_follows_q_values_then_server_preference():
+    encodings = {"zstd": None, "br": None, "gzip": None}
+    assert negotiate("gzip, deflate, br, zstd", encodings) == "zstd"
+    assert negotiate("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+    assert negotiate("*;q=0.1, zstd;q=0", encodings) == "br"
+    assert negotiate("identity", encodings) is None
+    assert "gzip" in available_encodings()
+
+
+def test_large_session_detail_is_compressed_and_shaped_without_validation():
+    client = _client()
+    try:
+        plain = client.get("/api/sessions/s1", headers={"Accept-Encoding": "identity"})
+        packed = client.get("/api/sessions/s1", headers={"Accept-Encoding": "gzip"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert "Content-Encoding" not in plain.headers
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert packed.headers["Vary"] == "Accept-Encoding"
+    # httpx decodes the body; Content-Length is the size on the wire
+    assert len(plain.content) / int(packed.headers["Content-Length"]) > 5
+
+    body = packed.json()
+    assert body == plain.json()
+    assert "internal_column" not in body
+    assert "session_tags" not in body["tags"][0]
+    assert body["tags"][0]["emoji"] == "🏷️"
+    assert len(body["transcript_segments"]) == 3000
+    assert body.keys() == SessionResponse.model_validate(SESSION).model_dump().keys()
+
+
+def test_small_responses_are_sent_uncompressed():
+    response = TestClient(app).get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.json() == {"status": "ok", "service": "nomad-api"}
+
+
+@pytest.mark.parametrize("module,encoding", [("zstandard", "zstd"), ("brotli", "br")])
+def test_optional_encodings_when_installed(module, encoding):
+    pytest.importorskip(module)
+    client = _client()
+    try:
+        response = client.get("/api/sessions/s1", headers={"Accept-Encoding": f"gzip, {encoding}"})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.json()["title"] == "Réunion"
@@ -0,0 +1,41 @@
+import asyncio
+
+import httpx
+
+from app.db import Database
+
+
+def test_stats_count_requests_in_flight_until_the_response_closes():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="ok"))
+    db = Database(max_connections=4, transport=transport)
+
+    async def main():
+        async with db.client.stream("GET", "http://upstream/a") as response:
+            during = db.stats()
+            await response.aread()
+        await db.client.get("http://upstream/b")
+        await db.close()
+        return during
+
+    during = asyncio.run(main())
+    assert during["in_flight"] == 1 and during["utilisation"] == 0.25 and during["waiting"] == 0
+    after = db.stats()
+    assert after["in_flight"] == 0 and after["peak_in_flight"] == 1
+    assert after["requests_total"] == after["responses_total"] == 2
+
+
+def test_client_from_a_previous_event_loop_is_closed():
+    db = Database(transport=httpx.MockTransport(lambda r: httpx.Response(200)))
+
+    async def open_client():
+        return db.client
+
+    async def replace_client():
+        client = db.client
+        await asyncio.sleep(0)
+        return client
+
+    first = asyncio.run(open_client())
+    second = asyncio.run(replace_client())
+    assert second is not first
+    assert first.is_closed and not second.is_closed
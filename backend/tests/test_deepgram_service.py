@@ -0,0 +1,124 @@
+import asyncio
+import hashlib
+
+import httpx
+import pytest
+
+from app.db import Database
+from app.services.deepgram_service import DeepgramService
+from app.services.rate_limiter import EngineRateLimited, EngineUnavailable
+from app.services.transcript_cache import TranscriptCache
+from tests.fake_deepgram import FakeDeepgram
+
+UTTERANCES = [
+    ("Bonjour à tous.", 0.2, 1.9),
+    ("Merci d'être là.", 2.4, 3.8),
+    ("On commence.", 4.1, 5.0),
+]
+AUDIO = b"webm" * 4096
+
+
+def make_service(tmp_path, fake, stored):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "api.deepgram.com":
+            return await fake.handle(request)
+        if request.method == "GET":
+            return httpx.Response(200, content=AUDIO)
+        stored.append(request.read())
+        return httpx.Response(204)
+
+    service = DeepgramService(
+        Database(transport=httpx.MockTransport(handler)),
+        api_key=fake.api_key,
+        cache=TranscriptCache(str(tmp_path / "cache.sqlite3")),
+    )
+    service.normalizer.stereo_mode = "split"
+    return service
+
+
+def test_batch_result_has_the_groq_shape_and_is_stored_and_cached(tmp_path):
+    fake, stored = FakeDeepgram(UTTERANCES), []
+    service = make_service(tmp_path, fake, stored)
+
+    async def main():
+        first = await service.transcribe("s1", "http://storage/martun/s1.webm", language="fr")
+        second = await service.transcribe("s2", "http://storage/martun/s1.webm", language="fr")
+        return first, second
+
+    first, second = asyncio.run(main())
+
+    assert first["text"] == "Bonjour à tous. Merci d'être là. On commence."
+    assert [(s["id"], s["start"], s["end"]) for s in first["segments"]] == [
+        (0, 0.2, 1.9), (1, 2.4, 3.8), (2, 4.1, 5.0)
+    ]
+    assert first["words"][0] == {"word": "Bonjour", "start": 0.2, "end": 0.767}
+    assert first["duration"] == 5.0
+    assert second == first
+
+    assert len(fake.requests) == 1
+    request = fake.requests[0]
+    assert request["bytes"] == len(AUDIO)
+    assert request["headers"]["content-type"] == "audio/webm"
+    assert request["params"]["language"] == "fr"
+    assert request["params"]["utterances"] == "true"
+    assert len(stored) == 2 and b'"status":"transcribed"' in stored[0].replace(b" ", b"")
+
+
+def test_split_stereo_is_sent_once_as_multichannel(tmp_path):
+    fake = FakeDeepgram([("Salut", 0.0, 1.0, 0), ("Bonjour à tous", 1.5, 3.0, 1), ("oui", 3.5, 4.0, 0)])
+    service = make_service(tmp_path, fake, [])
+
+    result = asyncio.run(service.transcribe("s1", "http://storage/martun/s1.webm", mix_mode="stereo"))
+
+    assert fake.requests[0]["params"]["multichannel"] == "true"
+    assert result["text"] == "Salut Bonjour à tous oui"
+    assert [s["channel"] for s in result["segments"]] == ["mic", "system", "mic"]
+
+
+def test_rate_limited_batch_request_raises_engine_rate_limited(tmp_path):
+    service = make_service(tmp_path, FakeDeepgram(UTTERANCES, status_code=429), [])
+
+    with pytest.raises(EngineRateLimited):
+        asyncio.run(service.transcribe("s1", "http://storage/martun/s1.webm"))
+
+
+def test_stream_pushes_interim_and_final_results_and_collects_segments(tmp_path):
+    events = []
+
+    async def on_event(event):
+        events.append(event)
+
+    async def main():
+        async with FakeDeepgram(UTTERANCES, bytes_per_result=4096) as fake:
+            service = make_service(tmp_path, fake, [])
+            service.ws_url = fake.ws_url
+            stream = service.stream("fr", on_event)
+            await stream.start()
+            for offset in range(0, len(AUDIO), 1024):
+                await stream.feed(AUDIO[offset:offset + 1024])
+            result = await stream.finish()
+            return fake, result
+
+    fake, result = asyncio.run(main())
+
+    assert fake.params["interim_results"] == "true"
+    assert fake.params["language"] == "fr"
+    assert fake.closed_cleanly
+    assert fake.digest.hexdigest() == hashlib.sha256(AUDIO).hexdigest()
+    assert result["text"] == "Bonjour à tous. Merci d'être là. On commence."
+    assert [s["id"] for s in result["segments"]] == [0, 1, 2]
+    assert result["duration"] == 5.0
+    # Each utterance shows up as partial text before it is final
+    assert [e["is_final"] for e in events] == [False, True, False, True, False, True]
+
+
+def test_stream_with_bad_key_is_unavailable(tmp_path):
+    async def main():
+        async with FakeDeepgram(UTTERANCES) as fake:
+            service = make_service(tmp_path, fake, [])
+            service.ws_url = fake.ws_url
+            service.api_key = "wrong"
+            await service.stream("fr", lambda event: None).start()
+
+    with pytest.raises(EngineUnavailable):
+        asyncio.run(main())
@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+
+from app.db import Database
+from app.services.engine_health import EngineHealthProber
+
+TARGETS = {
+    "groq": ("https://groq.test/models", {}),
+    "deepgram": ("https://deepgram.test/projects", {}),
+    "wynona": ("http://wynona.test:8765/health", {}),
+}
+
+
+def make_prober(handler, **kwargs):
+    db = Database(transport=httpx.MockTransport(handler))
+    return EngineHealthProber(db, targets=TARGETS, **kwargs)
+
+
+def test_probes_record_status_latency_and_availability():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "wynona.test":
+            raise httpx.ConnectError("asleep", request=request)
+        return httpx.Response(401 if request.url.host == "deepgram.test" else 200)
+
+    prober = make_prober(handler)
+    asyncio.run(prober.refresh())
+
+    groq = prober.snapshot("groq-turbo")
+    assert groq["status"] == "online"
+    assert groq["availability"] == 1.0
+    assert groq["latency_ms"] is not None
+    assert prober.snapshot("deepgram")["last_error"] == "HTTP 401"
+    wynona = prober.snapshot("wynona")
+    assert wynona["status"] == "offline"
+    assert wynona["last_error"] == "ConnectError"
+    assert wynona["consecutive_failures"] == 1
+
+
+def test_status_answers_from_cache_and_revalidates_in_background():
+    probes = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        probes.append(request.url.host)
+        return httpx.Response(200)
+
+    prober = make_prober(handler, ttl_seconds=60)
+
+    async def main():
+        # Cold cache: answer immediately, refresh in the background
+        assert await prober.status("wynona") == "unknown"
+        await prober._refresh
+        assert await prober.status("wynona") == "online"
+        # Fresh cache: no new probe
+        await prober.status("groq-large")
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert len(probes) == 3
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from app.services.engine_router import EngineRouter
+from app.services.queue_manager import QueueManager
+
+ALL_ENABLED = {"groq-turbo": True, "groq-large": True, "deepgram": True, "wynona": True}
+
+
+def make_router(tmp_path, wynona="online", enabled=ALL_ENABLED):
+    checks = []
+
+    async def health(engine):
+        checks.append(engine)
+        return wynona if engine == "wynona" else "online"
+
+    queue = QueueManager(db_path=str(tmp_path / "q.sqlite3"))
+    return EngineRouter(queue, health, enabled=enabled, max_wait_seconds=900), queue, checks
+
+
+def test_prefers_free_wynona(tmp_path):
+    router, _, checks = make_router(tmp_path)
+
+    decision = asyncio.run(router.route(600))
+
+    assert decision["engine"] == "wynona"
+    assert "cheapest" in decision["reason"]
+    assert "wynona" in checks
+
+
+def test_long_wynona_backlog_spills_over_to_groq(tmp_path):
+    router, queue, _ = make_router(tmp_path)
+    queue.add_job("s1", "wynona", meta={"duration_seconds": 3 * 3600})
+
+    decision = asyncio.run(router.route(600))
+
+    assert decision["engine"] == "groq-turbo"
+    assert "wynona backlog too long" in decision["reason"]
+
+
+def test_offline_wynona_falls_back_by_mode(tmp_path):
+    router, _, _ = make_router(tmp_path, wynona="offline")
+
+    assert asyncio.run(router.route(60))["engine"] == "groq-turbo"
+    assert asyncio.run(router.route(60, input_mode="live"))["engine"] == "deepgram"
+    assert "unavailable: wynona" in asyncio.run(router.route(60))["reason"]
+
+
+def test_no_engine_available_raises(tmp_path):
+    router, _, _ = make_router(tmp_path, wynona="offline", enabled={})
+
+    with pytest.raises(ValueError):
+        asyncio.run(router.route(60))
@@ -0,0 +1,109 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from app.db import Database, etags, get_db
+from app.main import app
+
+SESSION = {
+    "id": "s1",
+    "title": "Réunion",
+    "status": "transcribed",
+    "input_mode": "record",
+    "transcript": "mot " * 5000,
+    "created_at": "2026-01-01T10:00:00+00:00",
+    "tags": [],
+    "notes": [],
+}
+TAG = {"id": "t1", "name": "Call", "created_at": "2026-01-01T00:00:00Z", "session_count": 2}
+
+
+def _client(handler) -> TestClient:
+    app.dependency_overrides[get_db] = lambda: Database(transport=httpx.MockTransport(handler))
+    return TestClient(app)
+
+
+def test_session_revalidation_is_answered_from_the_upstream_version():
+    calls = []
+    version = {"value": "a" * 32}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path.endswith("/rpc/session_etag"):
+            return httpx.Response(200, json=version["value"])
+        if "version:session_version" in request.url.params["select"]:
+            return httpx.Response(200, json=[{**SESSION, "version": version["value"]}])
+        return httpx.Response(200, json=[SESSION])
+
+    client = _client(handler)
+    try:
+        first = client.get("/api/sessions/s1")
+        etag = first.headers["ETag"]
+        # The version comes back as a column of the session select
+        assert calls == ["/rest/v1/sessions"]
+        assert "version" not in first.json()
+        # Weak once gzipped by the compression middleware
+        assert etag == f'W/"v-{"a" * 32}"'
+        assert first.headers["Cache-Control"] == "private, no-cache"
+
+        calls.clear()
+        cached = client.get("/api/sessions/s1", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert calls == ["/rest/v1/rpc/session_etag"]
+
+        version["value"] = "b" * 32
+        changed = client.get("/api/sessions/s1", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.json()["title"] == "Réunion"
+        assert changed.headers["ETag"] != etag
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_content_hash_etag_when_version_functions_are_missing():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if "/rpc/" in request.url.path:
+            return httpx.Response(404, json={"code": "PGRST202", "message": "function not found"})
+        if "tag_version" in request.url.params["select"]:
+            return httpx.Response(400, json={"code": "42703", "message": "column does not exist"})
+        return httpx.Response(200, json=[TAG])
+
+    client = _client(handler)
+    try:
+        first = client.get("/api/tags/t1")
+        cached = client.get("/api/tags/t1", headers={"If-None-Match": f'W/"x", {first.headers["ETag"]}'})
+        assert cached.status_code == 304
+        assert client.get("/api/tags/t1").json()["session_count"] == 2
+        # The missing function and version column are only tried once
+        assert calls.count("/rest/v1/rpc/tag_etag") == 1
+        assert calls.count("/rest/v1/tags") == 4
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_listings_revalidate_against_a_hash_of_the_page():
+    tags = [dict(TAG)]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=tags)
+
+    client = _client(handler)
+    try:
+        first = client.get("/api/tags/")
+        etag = first.headers["ETag"]
+        assert client.get("/api/tags/", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/api/tags/", params={"cursor": ""}).headers["ETag"] != etag
+
+        tags[0]["session_count"] = 3
+        assert client.get("/api/tags/", headers={"If-None-Match": etag}).status_code == 200
+
+        sessions = client.get("/api/sessions/", params={"fields": "title"})
+        again = client.get(
+            "/api/sessions/", params={"fields": "title"}, headers={"If-None-Match": sessions.headers["ETag"]}
+        )
+        assert again.status_code == 304
+    finally:
+        app.dependency_overrides.clear()
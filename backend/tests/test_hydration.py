@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+
+from app.db import Database, features
+from app.db import hydration
+
+
+def _session(session_id: str, **extra) -> dict:
+    return {"id": session_id, "created_at": "2026-01-01T00:00:00Z", **extra}
+
+
+def test_hydrate_sessions_uses_single_embedded_select():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=[
+            _session("s2", tags=[{"id": "t1"}], notes=None),
+            _session("s1", tags=[], notes=[{"id": "n1", "session_id": "s1"}]),
+        ])
+
+    db = Database(transport=httpx.MockTransport(handler))
+    sessions = asyncio.run(hydration.hydrate_sessions(db, ["s1", "s2", "missing"]))
+
+    assert len(calls) == 1
+    assert calls[0].url.params["select"] == hydration.SESSION_EMBED_SELECT
+    assert [s["id"] for s in sessions] == ["s1", "s2"]
+    assert sessions[1]["notes"] == []
+
+
+def test_hydrate_session_falls_back_to_concurrent_fetches():
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/sessions") and "tags(" in request.url.params["select"]:
+            return httpx.Response(400, json={"code": "PGRST200", "message": "no relationship"})
+        if path.endswith("/sessions"):
+            return httpx.Response(200, json=[_session("s1")])
+        if path.endswith("/session_tags"):
+            return httpx.Response(200, json=[{"session_id": "s1", "tag": {"id": "t1"}}])
+        if path.endswith("/notes"):
+            return httpx.Response(500)
+        return httpx.Response(404)
+
+    db = Database(transport=httpx.MockTransport(handler))
+    session = asyncio.run(hydration.hydrate_session(db, "s1"))
+
+    assert session["tags"] == [{"id": "t1"}]
+    assert session["notes"] == []
+    assert features.available("session_embedding") is False
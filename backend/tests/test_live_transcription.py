@@ -0,0 +1,132 @@
+import asyncio
+import wave
+
+from app.services.live_transcription import LiveTranscriber, LocalAgreement, PcmRingBuffer
+
+RATE = 1000  # Hz; keeps the test PCM small
+SECOND = b"\x00\x00" * RATE
+
+# One word per second of "speech": (word, start, end) in absolute time
+SPEECH = [(f"mot{i}", i + 0.1, i + 0.8) for i in range(20)]
+
+
+def make_engine(transcriber, calls, delay=0.0):
+    """Fake engine: returns the words heard inside the window it is sent."""
+
+    async def transcribe_window(audio_file):
+        with wave.open(audio_file) as wav:
+            length = wav.getnframes() / wav.getframerate()
+        window_end = transcriber.ring.end_time
+        window_start = window_end - length
+        calls.append((round(window_start, 3), round(window_end, 3)))
+        await asyncio.sleep(delay)
+        words = [
+            {"word": w, "start": start - window_start, "end": end - window_start}
+            for w, start, end in SPEECH
+            if start >= window_start and end <= window_end
+        ]
+        return {"text": " ".join(w["word"] for w in words), "words": words}
+
+    return transcribe_window
+
+
+def test_ring_buffer_stays_bounded_and_tracks_absolute_time():
+    ring = PcmRingBuffer(max_seconds=5, sample_rate=RATE)
+    for _ in range(4):
+        assert ring.append(SECOND) == 0.0
+    assert ring.append(SECOND * 3) == 2.0
+
+    assert len(ring.data) == 5 * len(SECOND)
+    assert (ring.start_time, ring.end_time) == (2.0, 7.0)
+    pcm, start = ring.window(3)
+    assert (len(pcm), start) == (3 * len(SECOND), 4.0)
+
+    ring.trim_to(5.5)
+    assert ring.start_time == 5.5
+    assert ring.end_time == 7.0
+
+
+def test_local_agreement_commits_only_what_two_passes_agree_on():
+    agreement = LocalAgreement()
+
+    def words(*tokens):
+        return [{"word": t, "start": i, "end": i + 0.9} for i, t in enumerate(tokens)]
+
+    assert agreement.insert(words("Bonjour", "à", "tous")) == []
+    committed = agreement.insert(words("bonjour", "à", "tout", "le"))
+    assert [w["word"] for w in committed] == ["bonjour", "à"]
+    assert agreement.pending_text == "tout le"
+
+    # Later passes only need to agree on the uncommitted tail
+    agreement.insert(words("bonjour", "à", "tout", "le", "monde"))
+    assert agreement.text == "bonjour à tout le"
+    assert agreement.flush() == [{"word": "monde", "start": 4, "end": 4.9}]
+    assert agreement.segments() == [
+        {"id": 0, "start": 0, "end": 4.9, "text": "bonjour à tout le monde"}
+    ]
+
+
+def test_streams_partial_and_final_text_and_commits_everything_on_stop():
+    events, calls = [], []
+
+    async def on_event(event):
+        events.append(event)
+
+    async def main():
+        transcriber = LiveTranscriber(
+            None, on_event,
+            buffer_seconds=8, window_max_seconds=6, step_seconds=2, max_lag_seconds=10,
+            sample_rate=RATE,
+        )
+        transcriber.transcribe_window = make_engine(transcriber, calls)
+        transcriber.start()
+        for _ in range(len(SPEECH)):
+            transcriber.add_pcm(SECOND)
+            await asyncio.sleep(0.01)
+        await transcriber.stop()
+        return transcriber
+
+    transcriber = asyncio.run(main())
+
+    assert transcriber.agreement.text == " ".join(w for w, _, _ in SPEECH)
+    finals = [e for e in events if e.get("is_final")]
+    assert " ".join(e["text"] for e in finals) == transcriber.agreement.text
+    assert any(e.get("is_final") is False for e in events)
+    # Every pass saw a bounded window, never the whole recording
+    assert all(end - start <= 6 for start, end in calls)
+    assert len(transcriber.ring.data) <= 8 * len(SECOND)
+    assert transcriber.duration == len(SPEECH)
+
+
+def test_slow_engine_pushes_back_until_it_catches_up():
+    calls = []
+
+    async def on_event(event):
+        pass
+
+    async def main():
+        transcriber = LiveTranscriber(
+            None, on_event,
+            buffer_seconds=30, window_max_seconds=10, step_seconds=1, max_lag_seconds=3,
+            sample_rate=RATE,
+        )
+        transcriber.transcribe_window = make_engine(transcriber, calls, delay=0.2)
+        transcriber.start()
+
+        transcriber.add_pcm(SECOND)
+        await asyncio.sleep(0.05)  # first pass in flight
+        transcriber.add_pcm(SECOND * 4)
+        assert transcriber.lag_seconds > 3
+
+        waiter = asyncio.create_task(transcriber.wait_for_capacity())
+        await asyncio.sleep(0.05)
+        blocked = not waiter.done()
+        await asyncio.wait_for(waiter, timeout=2)
+        lag_after = transcriber.lag_seconds
+        await transcriber.stop()
+        return blocked, lag_after
+
+    blocked, lag_after = asyncio.run(main())
+
+    assert blocked
+    assert lag_after <= 3
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.db import Database, get_db, marks
+from app.main import app
+
+
+class FakeSessions:
+    """Upstream holding one session's marks; the RPC appends atomically."""
+
+    def __init__(self, with_function: bool = True):
+        self.marks = None
+        self.with_function = with_function
+        self.calls = []
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(f"{request.method} {request.url.path}")
+        if request.url.path.endswith("/rpc/append_session_marks"):
+            if not self.with_function:
+                return httpx.Response(404, json={"code": "PGRST202", "message": "function not found"})
+            body = json.loads(request.content)
+            if body["session_id"] != "s1":
+                return httpx.Response(200, content=b"null")
+            await asyncio.sleep(0)
+            self.marks = (self.marks or []) + body["new_marks"]
+            return httpx.Response(200, json=self.marks)
+
+        if request.method == "GET":
+            return httpx.Response(200, json=[{"marks": self.marks}])
+        # Compare-and-swap PATCH: applies only if marks are unchanged
+        expected = request.url.params["marks"]
+        current = "is.null" if self.marks is None else f"eq.{json.dumps(self.marks, separators=(',', ':'))}"
+        if expected != current:
+            return httpx.Response(200, json=[])
+        self.marks = json.loads(request.content)["marks"]
+        return httpx.Response(200, json=[{"marks": self.marks}])
+
+
+def test_batch_of_marks_is_one_atomic_round_trip():
+    upstream = FakeSessions()
+    app.dependency_overrides[get_db] = lambda: Database(transport=httpx.MockTransport(upstream.handle))
+    client = TestClient(app)
+    try:
+        single = client.post("/api/sessions/s1/marks", json={"time": 12, "label": "Intro"})
+        batch = client.post("/api/sessions/s1/marks/batch", json={"marks": [{"time": 40}, {"time": 41}]})
+        missing = client.post("/api/sessions/nope/marks/batch", json={"marks": [{"time": 1}]})
+        empty = client.post("/api/sessions/s1/marks/batch", json={"marks": []})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert single.status_code == 201
+    assert single.json() == {"time": 12, "label": "Intro"}
+    assert batch.json() == {"marks": [{"time": 40}, {"time": 41}], "total": 3}
+    assert missing.status_code == 404
+    assert empty.status_code == 422
+    assert upstream.calls == ["POST /rest/v1/rpc/append_session_marks"] * 3
+
+
+def test_concurrent_appends_never_lose_marks():
+    for with_function in (True, False):
+        upstream = FakeSessions(with_function)
+        db = Database(transport=httpx.MockTransport(upstream.handle))
+
+        async def tap_concurrently():
+            await asyncio.gather(*(marks.append_marks(db, "s1", [{"time": t}]) for t in range(4)))
+
+        asyncio.run(tap_concurrently())
+        assert sorted(m["time"] for m in upstream.marks) == [0, 1, 2, 3]
+
+
+def test_null_labels_are_dropped_and_a_losing_compare_and_swap_gives_up_with_409():
+    upstream = FakeSessions(with_function=False)
+    db = Database(transport=httpx.MockTransport(upstream.handle))
+    asyncio.run(marks.append_marks(db, "s1", [{"time": 1, "label": None}, {"time": 2, "label": "Q"}]))
+    assert upstream.marks == [{"time": 1}, {"time": 2, "label": "Q"}]
+
+    class Contended(FakeSessions):
+        async def handle(self, request: httpx.Request) -> httpx.Response:
+            if request.method == "PATCH":
+                self.calls.append("PATCH")
+                return httpx.Response(200, json=[])  # Another writer always wins
+            return await super().handle(request)
+
+    contended = Contended(with_function=False)
+    app.dependency_overrides[get_db] = lambda: Database(transport=httpx.MockTransport(contended.handle))
+    try:
+        response = TestClient(app).post("/api/sessions/s1/marks", json={"time": 3})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 409
+    assert contended.calls.count("PATCH") == marks.CAS_ATTEMPTS
@@ -0,0 +1,68 @@
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.db import Database, get_db
+from app.main import app
+
+
+def _client(handler) -> TestClient:
+    app.dependency_overrides[get_db] = lambda: Database(transport=httpx.MockTransport(handler))
+    return TestClient(app)
+
+
+def test_mutations_are_single_requests_that_detect_missing_rows():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(f"{request.method} {request.url.path.rsplit('/', 1)[1]}")
+        known = "s1" in str(request.url) or "t1" in str(request.url) or b'"s1"' in request.content
+        if request.method == "POST" and not known:
+            return httpx.Response(409, json={"code": "23503", "message": "violates foreign key constraint"})
+        if request.method == "POST":
+            note = {"id": "n1", "created_at": "2026-01-01T11:00:00Z", **json.loads(request.content)}
+            return httpx.Response(201, json=[note])
+        return httpx.Response(200, json=[{"id": "s1"}] if known else [])
+
+    client = _client(handler)
+    try:
+        assert client.delete("/api/sessions/s1").status_code == 204
+        assert client.post("/api/sessions/s1/notes", json={"content": "Relancer Marc"}).status_code == 201
+        assert client.delete("/api/tags/t1").status_code == 204
+        assert calls == ["PATCH sessions", "POST notes", "DELETE tags"]
+
+        assert client.delete("/api/sessions/nope").status_code == 404
+        assert client.post("/api/sessions/nope/notes", json={"content": "x"}).status_code == 404
+        assert client.delete("/api/tags/nope").status_code == 404
+        assert len(calls) == 6
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_update_of_a_missing_session_is_404():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "nope" in str(request.url):
+            return httpx.Response(200, content=b"")
+        return httpx.Response(400, json={"code": "22P02", "message": "invalid input syntax for type uuid"})
+
+    client = _client(handler)
+    try:
+        assert client.put("/api/sessions/nope", json={"title": "x"}).status_code == 404
+        assert client.put("/api/sessions/not-a-uuid", json={"title": "x"}).status_code == 404
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_malformed_ids_are_404_on_every_mutation():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(400, json={"code": "22P02", "message": "invalid input syntax for type uuid"})
+
+    client = _client(handler)
+    try:
+        assert client.delete("/api/sessions/not-a-uuid").status_code == 404
+        assert client.post("/api/sessions/not-a-uuid/notes", json={"content": "x"}).status_code == 404
+        assert client.delete("/api/tags/not-a-uuid").status_code == 404
+        assert client.post("/api/sessions/not-a-uuid/tags", json={"tag_ids": ["t1"]}).status_code == 404
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,74 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from app.db import Database, get_db
+from app.db.pagination import decode_cursor, encode_cursor, keyset_filter
+from app.main import app
+
+
+def _session(i: int) -> dict:
+    return {"id": f"s{i}", "status": "transcribed", "created_at": f"2026-01-{i:02d}T10:00:00+00:00"}
+
+
+def _client(rows: list[dict], calls: list) -> TestClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params)
+        limit = int(request.url.params["limit"])
+        return httpx.Response(200, json=rows[:limit])
+
+    app.dependency_overrides[get_db] = lambda: Database(transport=httpx.MockTransport(handler))
+    return TestClient(app)
+
+
+def test_cursor_round_trip_and_keyset_filter():
+    cursor = encode_cursor(["2026-01-05T10:00:00+00:00", "s5"])
+    assert decode_cursor(cursor, 2) == ["2026-01-05T10:00:00+00:00", "s5"]
+
+    assert keyset_filter([("created_at", "desc"), ("id", "desc")], ["t", "s5"]) == (
+        '(created_at.lt."t",and(created_at.eq."t",id.lt."s5"))'
+    )
+    assert keyset_filter([("name", "asc"), ("id", "asc")], ['Réunion, "Q3"', "t1"]) == (
+        '(name.gt."Réunion, \\"Q3\\"",and(name.eq."Réunion, \\"Q3\\"",id.gt."t1"))'
+    )
+
+
+def test_sessions_cursor_pages_use_keyset_not_offset():
+    calls = []
+    client = _client([_session(i) for i in range(9, 0, -1)], calls)
+    try:
+        first = client.get("/api/sessions/", params={"limit": 3, "cursor": ""})
+        assert first.status_code == 200
+        page = first.json()
+        assert [s["id"] for s in page["items"]] == ["s9", "s8", "s7"]
+        assert page["next_cursor"] == first.headers["X-Next-Cursor"]
+        assert calls[0]["limit"] == "4"
+        assert calls[0]["order"] == "created_at.desc,id.desc"
+
+        client.get("/api/sessions/", params={"limit": 3, "cursor": page["next_cursor"]})
+        assert "offset" not in calls[1]
+        assert calls[1]["or"] == (
+            '(created_at.lt."2026-01-07T10:00:00+00:00",'
+            'and(created_at.eq."2026-01-07T10:00:00+00:00",id.lt."s7"))'
+        )
+
+        assert client.get("/api/sessions/", params={"cursor": "not-a-cursor"}).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_offset_listing_keeps_its_plain_list_shape():
+    calls = []
+    client = _client([_session(i) for i in range(3, 0, -1)], calls)
+    try:
+        last = client.get("/api/sessions/", params={"limit": 5, "offset": 10})
+        assert [s["id"] for s in last.json()] == ["s3", "s2", "s1"]
+        assert "X-Next-Cursor" not in last.headers
+        assert calls[0]["offset"] == "10"
+
+        tags = [{"id": f"t{i}", "name": f"tag {i}", "created_at": "2026-01-01T00:00:00Z"} for i in range(3)]
+        client = _client(tags, calls)
+        listed = client.get("/api/tags/", params={"limit": 2})
+        assert len(listed.json()) == 2
+        assert decode_cursor(listed.headers["X-Next-Cursor"], 2) == ["tag 1", "t1"]
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from app.services.job_worker import JobWorker
+from app.services.queue_manager import QueueManager
+
+
+def test_jobs_survive_restart_and_stale_leases_are_recovered(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    queue = QueueManager(db_path=path)
+    job_id = queue.add_job("session-1", "groq-turbo", "https://audio/1.webm")
+
+    leased = queue.lease("w1", lease_seconds=0.01)
+    assert leased["id"] == job_id and leased["status"] == "processing"
+    assert queue.lease("w2", lease_seconds=60) is None
+    queue.close()
+
+    # Simulate a crash: a new process opens the same file after the lease expired
+    time.sleep(0.02)
+    restarted = QueueManager(db_path=path)
+    assert restarted.recover_stale_leases() == 1
+    job = restarted.get_job(job_id)
+    assert job["status"] == "queued" and job["audio_url"] == "https://audio/1.webm"
+    assert restarted.lease("w1", lease_seconds=60)["attempts"] == 2
+
+
+def test_startup_recovers_other_processes_leases_and_fences_their_outcomes(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    previous = QueueManager(db_path=path)
+    job_id = previous.add_job("session-1", "groq-turbo")
+    stale = previous.lease("w1", lease_seconds=3600)
+
+    # The lease has not expired, but its owner is an earlier process
+    restarted = QueueManager(db_path=path)
+    assert restarted.recover_stale_leases() == 1
+    current = restarted.lease("w1", lease_seconds=60)
+    assert current["id"] == job_id and current["lease_owner"] != stale["lease_owner"]
+    assert restarted.recover_stale_leases() == 0
+
+    # The old owner can no longer touch the new attempt
+    assert not previous.heartbeat(job_id, stale["lease_owner"], 60)
+    assert not previous.complete(job_id, stale["lease_owner"])
+    assert previous.fail(job_id, stale["lease_owner"], "boom") == ""
+    assert restarted.complete(job_id, current["lease_owner"])
+    assert restarted.get_job(job_id)["status"] == "completed"
+
+
+def test_failed_attempts_back_off_then_fail(tmp_path):
+    queue = QueueManager(db_path=str(tmp_path / "q.sqlite3"), max_attempts=2, retry_base_seconds=60)
+    job_id = queue.add_job("session-1", "groq-turbo")
+
+    owner = queue.lease("w1", lease_seconds=60)["lease_owner"]
+    assert queue.fail(job_id, owner, "429 Too Many Requests") == "queued"
+    # Backoff keeps it from being leased straight away
+    assert queue.lease("w1", lease_seconds=60) is None
+
+    queue._conn.execute("UPDATE jobs SET available_at = 0")
+    owner = queue.lease("w1", lease_seconds=60)["lease_owner"]
+    assert queue.fail(job_id, owner, "still failing") == "failed"
+    assert queue.get_job(job_id)["last_error"] == "still failing"
+
+
+def test_worker_completes_and_fails_permanent_errors_without_retry(tmp_path):
+    queue = QueueManager(db_path=str(tmp_path / "q.sqlite3"))
+    ok_id = queue.add_job("s1", "groq-turbo")
+    bad_id = queue.add_job("s2", "nope")
+
+    async def handler(job):
+        if job["engine"] == "nope":
+            raise ValueError("Unknown engine: nope")
+
+    async def main():
+        worker = JobWorker(queue, handler, concurrency=1)
+        for _ in range(2):
+            await worker.run_job(queue.lease("w", 60))
+
+    asyncio.run(main())
+    assert queue.get_job(ok_id)["status"] == "completed"
+    assert queue.get_job(bad_id)["status"] == "failed"
+    assert queue.get_job(bad_id)["attempts"] == 1
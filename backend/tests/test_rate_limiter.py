@@ -0,0 +1,62 @@
+import asyncio
+
+from app.services.job_worker import JobWorker
+from app.services.queue_manager import QueueManager
+from app.services.rate_limiter import (
+    EngineLimiter,
+    EngineRateLimited,
+    LimiterRegistry,
+    parse_retry_after,
+)
+
+
+def test_limiter_enforces_concurrency_and_request_bucket():
+    limiter = EngineLimiter("groq-turbo", concurrency=2, requests_per_minute=3)
+
+    assert limiter.try_acquire() == 0.0
+    assert limiter.try_acquire() == 0.0
+    assert limiter.try_acquire() > 0  # concurrency cap
+    limiter.release()
+    assert limiter.try_acquire() == 0.0
+    limiter.release()
+    limiter.release()
+    # Bucket of 3 is spent; the next token is ~20 s away
+    assert 15 < limiter.try_acquire() <= 20
+
+
+def test_rate_limited_blocks_and_halves_rate():
+    limiter = EngineLimiter("groq-turbo", concurrency=5, requests_per_minute=60)
+    limiter.on_rate_limited(retry_after=30)
+
+    assert 29 < limiter.try_acquire() <= 30
+    assert limiter.snapshot()["rate_scale"] == 0.5
+
+
+def test_parse_retry_after_accepts_seconds_and_garbage():
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after(None, default=5) == 5
+    assert parse_retry_after("soon", default=7) == 7
+
+
+def test_throttled_and_429_jobs_wait_in_queue_without_using_attempts(tmp_path):
+    queue = QueueManager(db_path=str(tmp_path / "q.sqlite3"))
+    limiters = LimiterRegistry({"groq-turbo": {"concurrency": 1, "requests_per_minute": None,
+                                               "audio_seconds_per_minute": 600}})
+    long_id = queue.add_job("s1", "groq-turbo", meta={"duration_seconds": 900})
+    short_id = queue.add_job("s2", "groq-turbo", meta={"duration_seconds": 60})
+
+    async def handler(job):
+        raise EngineRateLimited("groq-turbo", 45)
+
+    async def main():
+        worker = JobWorker(queue, handler, limiters=limiters)
+        await worker.run_job(queue.lease("w", 60))  # 900 s of audio drains the bucket
+        await worker.run_job(queue.lease("w", 60))  # throttled before calling the engine
+
+    asyncio.run(main())
+    for job_id in (long_id, short_id):
+        job = queue.get_job(job_id)
+        assert job["status"] == "queued"
+        assert job["attempts"] == 0
+        assert job["meta"]["throttled"]
+    assert limiters.snapshot()["groq-turbo"]["rate_limited_total"] == 1
@@ -0,0 +1,113 @@
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db import Database, get_db
+from app.main import app
+from app.routers import upload
+from app.services.resumable_upload import ResumableUploadStore
+from app.services.search_index import search_index
+from app.services.storage_service import StorageService, UploadTooLarge
+
+
+def _metadata(filename: str) -> str:
+    return f"filename {base64.b64encode(filename.encode()).decode()}"
+
+
+def test_resumable_upload_resumes_and_streams_to_storage(tmp_path, monkeypatch):
+    received = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "/storage/v1/object/" in request.url.path:
+            received["storage"] = request.read()
+            return httpx.Response(200, json={"Key": request.url.path})
+        received["session"] = request.read()
+        row = {**json.loads(received["session"]), "created_at": "2026-01-05T08:00:00+00:00"}
+        return httpx.Response(201, json=[row])
+
+    db = Database(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(upload, "storage_service", StorageService(db, chunk_size=4))
+    monkeypatch.setattr(upload, "resumable_store", ResumableUploadStore(root=str(tmp_path), chunk_size=4))
+    probed = []
+
+    async def probe_duration(path):
+        probed.append(open(path, "rb").read())
+        return 1234.4
+
+    monkeypatch.setattr(upload.audio_chunker, "probe_duration", probe_duration)
+    monkeypatch.setattr(type(upload.audio_chunker), "available", property(lambda self: True))
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    try:
+        created = client.post(
+            "/api/upload/resumable",
+            headers={"Upload-Length": "10", "Upload-Metadata": _metadata("memo.webm")},
+        )
+        assert created.status_code == 201
+        url = created.headers["Location"]
+
+        patch_headers = {"Content-Type": "application/offset+octet-stream"}
+        first = client.patch(url, content=b"01234", headers={**patch_headers, "Upload-Offset": "0"})
+        assert first.status_code == 204
+        assert first.headers["Upload-Offset"] == "5"
+
+        # A retried chunk at a stale offset is rejected with the real offset
+        stale = client.patch(url, content=b"01234", headers={**patch_headers, "Upload-Offset": "0"})
+        assert stale.status_code == 409
+        assert stale.headers["Upload-Offset"] == "5"
+
+        assert client.head(url).headers["Upload-Offset"] == "5"
+
+        done = client.patch(url, content=b"56789", headers={**patch_headers, "Upload-Offset": "5"})
+        assert done.status_code == 200
+        assert done.json()["session_id"]
+        assert received["storage"] == b"0123456789"
+        # The staged file is probed so the limiter is charged for its real length
+        assert probed == [b"0123456789"]
+        assert json.loads(received["session"])["duration_seconds"] == 1234
+        # Indexed at creation under its Supabase created_at, not when transcribed
+        session_id = done.json()["session_id"]
+        assert search_index._conn.execute(
+            "SELECT created_at FROM documents WHERE session_id = ?", (session_id,)
+        ).fetchone() == ("2026-01-05T08:00:00+00:00",)
+        assert client.head(url).status_code == 404
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_resumable_upload_rejects_bytes_past_declared_length(tmp_path):
+    store = ResumableUploadStore(root=str(tmp_path), max_bytes=100)
+    assert store.get("../etc/passwd") is None
+
+    created = store.create(4, "a.wav", "audio/wav")
+
+    async def chunks():
+        yield b"12345"
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(store.append(created, 0, chunks()))
+    assert store.get(created["id"])["offset"] == 0
+
+    with pytest.raises(UploadTooLarge):
+        store.create(101, "b.wav", "audio/wav")
+
+
+def test_patch_racing_a_finished_upload_is_not_found(tmp_path, monkeypatch):
+    store = ResumableUploadStore(root=str(tmp_path))
+    monkeypatch.setattr(upload, "resumable_store", store)
+    created = store.create(10, "memo.webm", "audio/webm")
+    # Looked up just before another request completed (or cancelled) it
+    monkeypatch.setattr(store, "get", lambda upload_id: created)
+    store.delete(created["id"])
+
+    response = TestClient(app).patch(
+        f"/api/upload/resumable/{created['id']}",
+        content=b"01234",
+        headers={"Content-Type": "application/offset+octet-stream", "Upload-Offset": "0"},
+    )
+    assert response.status_code == 404
@@ -0,0 +1,158 @@
+import random
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.db import Database, get_db
+from app.main import app
+from app.routers import sessions
+from app.services.search_index import SearchIndex, stem, terms
+
+SEGMENTS = [
+    {"id": 0, "start": 0.0, "end": 4.2, "text": "Bonjour, on commence la réunion d'équipe."},
+    {"id": 1, "start": 4.5, "end": 9.0, "text": "Les enregistrements du marché sont prêts."},
+    {"id": 2, "start": 9.3, "end": 12.0, "text": "Merci à tous."},
+]
+
+
+def make_index(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    index.upsert(
+        "s1",
+        title="Réunion hebdomadaire",
+        transcript=" ".join(s["text"] for s in SEGMENTS),
+        segments=SEGMENTS,
+        status="transcribed",
+        created_at="2026-01-02T10:00:00+00:00",
+    )
+    index.upsert(
+        "s2",
+        title="Idées en vrac",
+        transcript="Penser à appeler le garagiste pour les chevaux du moteur.",
+        status="transcribed",
+        created_at="2026-01-03T10:00:00+00:00",
+    )
+    return index
+
+
+def test_french_terms_fold_accents_and_share_stems():
+    assert terms("L'été des Enregistrements") == ["ete", "enregistr"]
+    assert stem("enregistrer") == stem("enregistrement") == "enregistr"
+    assert stem("chevaux") == stem("cheval")
+
+
+def test_search_is_accent_insensitive_stemmed_and_highlighted(tmp_path):
+    index = make_index(tmp_path)
+
+    result = index.search("enregistrement marche ")
+
+    assert result["total"] == 1
+    hit = result["results"][0]
+    assert hit["session_id"] == "s1"
+    assert "<mark>enregistrements</mark> du <mark>marché</mark>" in hit["snippet"]
+    assert hit["segments"] == [{
+        "id": 1, "start": 4.5, "end": 9.0,
+        "snippet": "Les <mark>enregistrements</mark> du <mark>marché</mark> sont prêts.",
+    }]
+
+
+def test_title_matches_rank_first_and_last_word_matches_as_prefix(tmp_path):
+    index = make_index(tmp_path)
+    index.upsert("s3", title="Notes diverses", transcript="Compte rendu de la réunion de lundi.",
+                 created_at="2026-01-04T10:00:00+00:00")
+
+    result = index.search("reuni")
+
+    assert [r["session_id"] for r in result["results"]] == ["s1", "s3"]
+    assert result["results"][0]["title_highlight"] == "<mark>Réunion</mark> hebdomadaire"
+
+
+def test_a_word_typed_letter_by_letter_keeps_matching(tmp_path):
+    index = make_index(tmp_path)
+    index.upsert("s3", transcript="Ils jouaient pendant la pause.", created_at="2026-01-04")
+
+    # Prefixes running past the stem ("enregistreme", "jouai") still match
+    for word, session_id in (("enregistrements", "s1"), ("jouaient", "s3")):
+        for end in range(3, len(word) + 1):
+            assert index.match_ids(word[:end], limit=10) == [session_id], word[:end]
+
+
+def test_incremental_updates_cover_notes_tags_renames_and_deletes(tmp_path):
+    index = make_index(tmp_path)
+
+    index.add_note("s2", "Rappeler Jeanne demain")
+    index.add_tags("s2", [{"id": "t1", "name": "Urgent"}])
+    assert index.match_ids("jeanne", 10) == ["s2"]
+    assert index.match_ids("urgent", 10) == ["s2"]
+    assert index.match_ids("chevaux", 10, tag_ids=["t1", "t7"]) == ["s2"]
+    assert index.match_ids("chevaux", 10, tag_ids=["t7"]) == []
+
+    index.rename_tag("t1", "Atelier")
+    assert index.match_ids("urgent ", 10) == []
+    assert index.search("atelier")["results"][0]["tags"] == ["Atelier"]
+
+    index.upsert("s2", title="Atelier mécanique")
+    assert index.search("vrac")["total"] == 0
+    assert index.match_ids("chevaux", 10) == ["s2"]
+
+    index.remove("s2")
+    assert index.match_ids("chevaux", 10) == []
+    assert index.count() == 1
+
+
+def test_listing_filter_pages_newest_first_with_status(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    for day in range(1, 6):
+        index.upsert(f"s{day}", transcript="point budget", created_at=f"2026-01-0{day}T00:00:00",
+                     status="transcribed" if day % 2 else "pending")
+
+    assert index.match_ids("budget", 2) == ["s5", "s4"]
+    assert index.match_ids("budget", 2, offset=2) == ["s3", "s2"]
+    assert index.match_ids("budget", 10, status="pending") == ["s4", "s2"]
+
+
+def test_listing_search_falls_back_to_title_ilike_until_the_index_is_ready(tmp_path, monkeypatch):
+    index = make_index(tmp_path)
+    monkeypatch.setattr(sessions, "search_index", index)
+    params = []
+    row = {"id": "s1", "title": "Réunion", "created_at": "2026-01-02T10:00:00+00:00"}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        params.append(dict(request.url.params))
+        return httpx.Response(200, json=[row])
+
+    app.dependency_overrides[get_db] = lambda: Database(transport=httpx.MockTransport(handler))
+    client = TestClient(app)
+    try:
+        # Documents on disk but not yet backfilled
+        assert not index.ready
+        client.get("/api/sessions/", params={"search": "réunion", "fields": "title"})
+        assert params[-1]["title"] == "ilike.*réunion*"
+
+        assert client.post("/api/sessions/search/reindex").json() == {"indexed": 1}
+        assert index.ready
+        client.get("/api/sessions/", params={"search": "réunion", "fields": "title"})
+        assert "title" not in params[-1] and params[-1]["id"] == "in.(s1)"
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_search_stays_fast_on_a_large_index(tmp_path):
+    rng = random.Random(7)
+    vocabulary = (
+        "projet client budget réunion équipe planning livraison facture devis "
+        "maquette serveur déploiement rendez-vous appel relance contrat"
+    ).split()
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    for i in range(5000):
+        words = " ".join(rng.choice(vocabulary) for _ in range(200))
+        index.upsert(f"s{i}", title=f"Session {i}", transcript=words,
+                     created_at=f"2026-01-01T00:00:{i % 60:02d}")
+    index.upsert("needle", title="Inventaire", transcript="Le carburateur est à changer.")
+
+    result = index.search("carburateurs ")
+    assert [r["session_id"] for r in result["results"]] == ["needle"]
+
+    result = index.search("facture devis", limit=20)
+    assert result["total"] > 1000
+    assert result["took_ms"] < 250
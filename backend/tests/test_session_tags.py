@@ -0,0 +1,139 @@
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.db import Database, get_db
+from app.main import app
+from app.services.search_index import search_index
+
+
+def _tag(tag_id: str) -> dict:
+    return {"id": tag_id, "name": f"tag {tag_id}", "created_at": "2026-01-01T00:00:00Z"}
+
+
+def _client(handler) -> TestClient:
+    app.dependency_overrides[get_db] = lambda: Database(transport=httpx.MockTransport(handler))
+    return TestClient(app)
+
+
+def test_associate_tags_upserts_while_reading_the_session():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        path = request.url.path
+        if path.endswith("/sessions"):
+            return httpx.Response(200, json=[{
+                "id": "s1", "created_at": "2026-01-01T10:00:00+00:00", "tags": [_tag("t1")], "notes": [],
+            }])
+        if path.endswith("/tags"):
+            # t9 does not exist
+            return httpx.Response(200, json=[_tag("t1"), _tag("t2")])
+        rows = json.loads(request.content)
+        if any(row["tag_id"] == "t9" for row in rows):
+            return httpx.Response(409, json={"code": "23503", "message": "violates foreign key constraint"})
+        return httpx.Response(201, json=rows)
+
+    client = _client(handler)
+    try:
+        known = client.post("/api/sessions/s1/tags", json={"tag_ids": ["t2", "t2"]})
+        assert [t["id"] for t in known.json()["tags"]] == ["t1", "t2"]
+        assert sorted(c.url.path.rsplit("/", 1)[1] for c in calls) == ["session_tags", "sessions", "tags"]
+        upsert = next(c for c in calls if c.method == "POST")
+        assert upsert.url.params["on_conflict"] == "session_id,tag_id"
+        assert "resolution=ignore-duplicates" in upsert.headers["Prefer"]
+        assert json.loads(upsert.content) == [{"session_id": "s1", "tag_id": "t2"}]
+
+        calls.clear()
+        unknown = client.post("/api/sessions/s1/tags", json={"tag_ids": ["t2", "t9"]})
+        assert unknown.status_code == 200
+        retry = [c for c in calls if c.method == "POST"][-1]
+        assert json.loads(retry.content) == [
+            {"session_id": "s1", "tag_id": "t1"}, {"session_id": "s1", "tag_id": "t2"},
+        ]
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_associate_tags_indexes_tags_the_session_read_already_holds():
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/sessions"):
+            # Read after the upsert landed: t2 is already there
+            return httpx.Response(200, json=[{
+                "id": "s42", "created_at": "2026-01-01T10:00:00+00:00",
+                "tags": [_tag("t1"), _tag("t2")], "notes": [],
+            }])
+        if path.endswith("/tags"):
+            return httpx.Response(200, json=[_tag("t2")])
+        return httpx.Response(201, json=json.loads(request.content))
+
+    search_index.upsert("s42", title="Réunion budget", tags=[_tag("t1")])
+    client = _client(handler)
+    try:
+        response = client.post("/api/sessions/s42/tags", json={"tag_ids": ["t2"]})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [t["id"] for t in response.json()["tags"]] == ["t1", "t2"]
+    assert search_index.match_ids("budget", limit=10, tag_ids=["t2"]) == ["s42"]
+    search_index.remove("s42")
+
+
+def test_bulk_retag_of_many_sessions_takes_two_calls():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        path = request.url.path
+        if request.method == "POST":
+            return httpx.Response(201, json=json.loads(request.content))
+        if request.method == "GET":
+            return httpx.Response(200, json=[_tag("t1"), _tag("t2")])
+        if request.method == "DELETE":
+            return httpx.Response(200, json=[{"session_id": "s0", "tag_id": "t3"}])
+        ids = request.url.params["id"][4:-1].split(",")
+        return httpx.Response(200, json=[{"id": i, "status": "archived", "deleted_at": None} for i in ids])
+
+    session_ids = [f"s{i}" for i in range(100)]
+    client = _client(handler)
+    try:
+        retag = client.post("/api/sessions/bulk", json={"session_ids": session_ids, "add_tag_ids": ["t1", "t2"]})
+        assert retag.json() == {"updated": None, "tags_added": 200, "tags_removed": 0}
+        assert sorted(c.method for c in calls) == ["GET", "POST"]
+        upsert = next(c for c in calls if c.method == "POST")
+        assert len(json.loads(upsert.content)) == 200
+
+        calls.clear()
+        mixed = client.post("/api/sessions/bulk", json={
+            "session_ids": session_ids, "remove_tag_ids": ["t3"], "status": "archived",
+        })
+        assert mixed.json() == {"updated": 100, "tags_added": 0, "tags_removed": 1}
+        assert sorted(c.method for c in calls) == ["DELETE", "PATCH"]
+
+        conflicting = client.post("/api/sessions/bulk", json={
+            "session_ids": ["s1"], "add_tag_ids": ["t1"], "remove_tag_ids": ["t1"],
+        })
+        assert conflicting.status_code == 400
+        assert client.post("/api/sessions/bulk", json={"session_ids": ["s1"]}).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_bulk_only_maps_foreign_key_violations_to_404():
+    conflict = {"code": "23503", "message": "violates foreign key constraint"}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            return httpx.Response(409, json=conflict)
+        return httpx.Response(200, json=[_tag("t1")])
+
+    client = _client(handler)
+    try:
+        body = {"session_ids": ["s1"], "add_tag_ids": ["t1"]}
+        assert client.post("/api/sessions/bulk", json=body).status_code == 404
+        conflict.update(code="23505", message="duplicate key value violates unique constraint")
+        assert client.post("/api/sessions/bulk", json=body).status_code == 409
+    finally:
+        app.dependency_overrides.clear()
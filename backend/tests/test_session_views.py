@@ -0,0 +1,138 @@
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.db import Database, get_db, session_views
+from app.main import app
+
+SEGMENTS = [{"id": i, "start": i * 3.0, "end": i * 3.0 + 2.5, "text": "mot " * 30} for i in range(2000)]
+FULL_ROW = {
+    "id": "s1",
+    "title": "Réunion",
+    "status": "transcribed",
+    "input_mode": "live",
+    "duration_seconds": 6000,
+    "transcript": "mot " * 60000,
+    "transcript_segments": SEGMENTS,
+    "transcript_words": 60000,
+    "created_at": "2026-01-01T10:00:00+00:00",
+}
+
+
+def _client(handler) -> TestClient:
+    app.dependency_overrides[get_db] = lambda: Database(transport=httpx.MockTransport(handler))
+    return TestClient(app)
+
+
+def _project(select: str) -> dict:
+    row = {}
+    for part in select.split(","):
+        if part == "session_tags(tag_id)":
+            row["session_tags"] = [{"tag_id": "t1"}, {"tag_id": "t2"}]
+        elif part.startswith("transcript_preview:"):
+            row["transcript_preview"] = FULL_ROW["transcript"][:200]
+        elif part.startswith("transcript_length:"):
+            row["transcript_length"] = len(FULL_ROW["transcript"])
+        elif part == "*":
+            row.update(FULL_ROW)
+        elif part in FULL_ROW:
+            row[part] = FULL_ROW[part]
+    return row
+
+
+def test_summary_view_is_the_default_and_drops_heavy_columns():
+    selects = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        selects.append(request.url.params["select"])
+        return httpx.Response(200, json=[_project(request.url.params["select"])])
+
+    client = _client(handler)
+    try:
+        summary = client.get("/api/sessions/")
+        full = client.get("/api/sessions/", params={"view": "full"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert "transcript," not in selects[0] and "transcript_segments" not in selects[0]
+    card = summary.json()[0]
+    assert card["tag_ids"] == ["t1", "t2"]
+    assert card["transcript_length"] == 240000
+    assert len(card["transcript_preview"]) == 200
+    assert "transcript" not in card
+    assert selects[1] == "*"
+    # Hundreds of kilobytes for a full row, well under a kilobyte per summary card
+    assert len(full.content) > 500_000
+    assert len(summary.content) < 1_000
+
+
+def test_fields_select_exact_columns_and_reject_unknown_ones():
+    selects = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        selects.append(request.url.params["select"])
+        return httpx.Response(200, json=[_project(request.url.params["select"])])
+
+    client = _client(handler)
+    try:
+        sparse = client.get("/api/sessions/", params={"fields": "title,tag_ids"})
+        bad = client.get("/api/sessions/", params={"fields": "title,password"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert selects == ["id,created_at,title,session_tags(tag_id)"]
+    assert sparse.json() == [{
+        "id": "s1", "created_at": "2026-01-01T10:00:00+00:00", "title": "Réunion", "tag_ids": ["t1", "t2"],
+    }]
+    assert bad.status_code == 400
+
+
+def test_summary_falls_back_when_computed_fields_are_missing():
+    selects = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        select = request.url.params["select"]
+        selects.append(select)
+        if "session_transcript_preview" in select:
+            return httpx.Response(400, json={"code": "42703", "message": "column does not exist"})
+        return httpx.Response(200, json=[_project(select)])
+
+    client = _client(handler)
+    try:
+        cards = client.get("/api/sessions/").json()
+        client.get("/api/sessions/")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert cards[0]["transcript_preview"] is None
+    assert cards[0]["title"] == "Réunion"
+    # The unsupported select is only tried once
+    assert len(selects) == 3
+    assert json.dumps(selects[1:]).count("session_transcript_preview") == 0
+
+
+def test_missing_session_tags_relationship_keeps_the_preview_and_the_tag_filter():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if request.url.path.endswith("/session_tags"):
+            return httpx.Response(200, json=[{"session_id": "s1"}, {"session_id": "s1"}])
+        if "session_tags" in request.url.params["select"]:
+            return httpx.Response(400, json={"code": "PGRST200", "message": "no relationship"})
+        return httpx.Response(200, json=[_project(request.url.params["select"])])
+
+    client = _client(handler)
+    try:
+        cards = client.get("/api/sessions/", params={"tag": "t1"}).json()
+    finally:
+        app.dependency_overrides.clear()
+
+    retried = calls[-1].url.params
+    assert "session_tags" not in retried["select"] and "tag_filter.tag_id" not in retried
+    assert calls[-2].url.params["tag_id"] == "in.(t1)"
+    assert retried["id"] == "in.(s1)"
+    # Only the relationship is disabled; the computed preview still comes back
+    assert len(cards[0]["transcript_preview"]) == 200
+    assert cards[0]["tag_ids"] == []
@@ -0,0 +1,54 @@
+import asyncio
+
+import httpx
+
+from app.db import Database
+from app.db import tag_stats
+
+
+def _tag(tag_id: str, **extra) -> dict:
+    return {"id": tag_id, "name": tag_id, "created_at": "2026-01-01T00:00:00Z", **extra}
+
+
+def test_tag_stats_single_round_trip():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=[
+            _tag("a", session_count=2, session_count_rollup=5, total_duration_seconds=600),
+            _tag("b", session_count=0, session_count_rollup=0, total_duration_seconds=0),
+        ])
+
+    db = Database(transport=httpx.MockTransport(handler))
+    tags = asyncio.run(tag_stats.fetch_tags_with_stats(db, {"limit": 500}))
+
+    assert len(calls) == 1
+    assert "tag_session_count_rollup" in calls[0].url.params["select"]
+    assert tags[0]["session_count_rollup"] == 5
+
+
+def test_tag_stats_falls_back_to_embedded_count():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if "tag_session_count" in request.url.params["select"]:
+            return httpx.Response(400, json={"code": "42703", "message": "column does not exist"})
+        return httpx.Response(200, json=[
+            _tag("a", session_tags=[{"count": 3}]),
+            _tag("b", session_tags=[]),
+        ])
+
+    db = Database(transport=httpx.MockTransport(handler))
+    tags = asyncio.run(tag_stats.fetch_tags_with_stats(db, {}))
+    assert [t["session_count"] for t in tags] == [3, 0]
+    # Soft-deleted sessions are left out of the count, as in the computed fields
+    assert calls[-1].url.params["select"] == "*,session_tags(count(),sessions!inner())"
+    assert calls[-1].url.params["session_tags.sessions.deleted_at"] == "is.null"
+    assert "session_tags" not in tags[0]
+
+    # Subsequent calls skip the unsupported select entirely
+    calls.clear()
+    asyncio.run(tag_stats.fetch_tags_with_stats(db, {}))
+    assert len(calls) == 1
@@ -0,0 +1,72 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from app.db import Database, get_db
+from app.main import app
+from app.services.tag_tree import TagTree, tag_tree
+
+TAGS = [
+    {"id": "work", "name": "Travail", "parent_id": None, "created_at": "2026-01-01T00:00:00Z"},
+    {"id": "calls", "name": "Appels", "parent_id": "work", "created_at": "2026-01-01T00:00:00Z"},
+    {"id": "clients", "name": "Clients", "parent_id": "calls", "created_at": "2026-01-01T00:00:00Z"},
+    {"id": "home", "name": "Maison", "parent_id": None, "created_at": "2026-01-01T00:00:00Z"},
+]
+
+
+def test_tree_precomputes_ancestors_and_descendants_and_patches():
+    tree = TagTree()
+    tree.replace(TAGS)
+
+    assert tree.ancestors["clients"] == ["work", "calls"]
+    assert tree.subtree_ids("work") == ["work", "calls", "clients"]
+    assert tree.subtree_ids("unknown") == ["unknown"]
+    assert [n["id"] for n in tree.tree()] == ["home", "work"]
+
+    # Moving a subtree updates both sides
+    tree.upsert({"id": "calls", "parent_id": "home"})
+    assert tree.subtree_ids("home") == ["home", "calls", "clients"]
+    assert tree.descendants["work"] == set()
+
+    tree.remove("calls")
+    assert [n["id"] for n in tree.tree()] == ["clients", "home", "work"]
+
+    tree.replace([{"id": "x", "name": "x", "parent_id": "y"}, {"id": "y", "name": "y", "parent_id": "x"}])
+    assert tree.subtree_ids("x") == ["x", "y"]
+
+
+def test_tree_endpoint_and_descendant_filter_use_the_cache():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if request.url.path.endswith("/tags") and request.method == "GET":
+            return httpx.Response(200, json=TAGS)
+        if request.url.path.endswith("/tags"):
+            return httpx.Response(201, json=[{
+                "id": "family", "name": "Famille", "parent_id": "home", "created_at": "2026-01-02T00:00:00Z",
+            }])
+        return httpx.Response(200, json=[])
+
+    tag_tree.invalidate()
+    app.dependency_overrides[get_db] = lambda: Database(transport=httpx.MockTransport(handler))
+    client = TestClient(app)
+    try:
+        tree = client.get("/api/tags/tree").json()
+        assert [n["name"] for n in tree] == ["Maison", "Travail"]
+        assert tree[1]["children"][0]["children"][0]["id"] == "clients"
+
+        client.post("/api/tags/", json={"name": "Famille", "parent_id": "home"})
+        assert client.get("/api/tags/tree").json()[0]["children"][0]["id"] == "family"
+
+        calls.clear()
+        client.get("/api/sessions/", params={"tag": "work", "include_descendants": "true"})
+        assert len(calls) == 1
+        assert calls[0].url.params["tag_filter.tag_id"] == "in.(work,calls,clients)"
+        assert calls[0].url.params["select"].endswith(",tag_filter:session_tags!inner()")
+
+        calls.clear()
+        client.get("/api/sessions/", params={"tag": "calls"})
+        assert calls[0].url.params["tag_filter.tag_id"] == "in.(calls)"
+    finally:
+        app.dependency_overrides.clear()
+        tag_tree.invalidate()
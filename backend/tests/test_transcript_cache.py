@@ -0,0 +1,56 @@
+import asyncio
+import os
+
+import httpx
+
+from app.db import Database
+from app.services.groq_service import GroqService
+from app.services.transcript_cache import TranscriptCache
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "cache.sqlite3"), max_bytes=100_000)
+    # Random text barely compresses: ~40 KB per entry, so only two fit
+    noisy = {"text": os.urandom(40_000).hex()}
+
+    cache.put("a", noisy)
+    cache.put("b", noisy)
+    assert cache.get("a") is not None  # "a" is now the most recently used
+    cache.put("c", noisy)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == noisy
+    stats = cache.stats()
+    assert stats["evictions"] >= 1
+    assert stats["size_bytes"] <= 100_000
+
+
+def test_identical_audio_is_transcribed_once(tmp_path):
+    calls = {"download": 0, "groq": 0, "patch": 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "api.groq.com":
+            calls["groq"] += 1
+            return httpx.Response(200, json={"text": "bonjour", "segments": []})
+        if request.method == "GET":
+            calls["download"] += 1
+            return httpx.Response(200, content=b"same audio bytes")
+        calls["patch"] += 1
+        return httpx.Response(204)
+
+    cache = TranscriptCache(str(tmp_path / "cache.sqlite3"))
+    service = GroqService(Database(transport=httpx.MockTransport(handler)), cache=cache)
+    service.api_key = "test"
+    service.chunker.ffmpeg = "missing-ffmpeg"
+
+    async def main():
+        await service.transcribe("s1", "http://storage/a.mp3", "groq-turbo", "fr")
+        await service.transcribe("s1", "http://storage/a.mp3", "groq-turbo", "fr")
+        await service.transcribe("s2", "http://storage/b.mp3", "groq-turbo", "fr")
+        await service.transcribe("s2", "http://storage/b.mp3", "groq-large", "fr")
+
+    asyncio.run(main())
+    # Re-run of a known URL skips the download; a copy of the same file
+    # downloads (to hash it) but is not sent to the engine again
+    assert calls == {"download": 3, "groq": 2, "patch": 4}
+    assert cache.stats()["hits"] == 2
@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import io
+import time
+
+import pytest
+
+from app.services.job_worker import JobWorker
+from app.services.queue_manager import QueueManager
+from app.services.rate_limiter import EngineUnavailable
+from app.services.wynona_service import WynonaService
+from tests.fake_whisperx import FakeWhisperX
+
+SEGMENTS = [
+    {"start": 0.0, "end": 2.1, "text": " Bonjour à tous.", "speaker": "SPEAKER_00"},
+    {"start": 2.4, "end": 4.0, "text": " Merci d'être là.", "speaker": "SPEAKER_01"},
+    {"start": 4.2, "end": 6.5, "text": " On commence.", "speaker": "SPEAKER_00"},
+]
+
+
+def make_service(server, chunk_size=64 * 1024):
+    return WynonaService(None, host=server.host, port=server.port, chunk_size=chunk_size)
+
+
+def test_streams_audio_and_collects_diarized_segments_incrementally():
+    audio = bytes(range(256)) * 4096  # 1 MiB
+    arrivals = []
+
+    async def main():
+        async with FakeWhisperX(SEGMENTS, segment_latency=0.05) as server:
+            started = time.perf_counter()
+            result = await make_service(server).stream(
+                io.BytesIO(audio), "fr", "audio.webm",
+                on_segment=lambda s: arrivals.append(time.perf_counter() - started),
+            )
+            return server, result, time.perf_counter() - started
+
+    server, result, elapsed = asyncio.run(main())
+
+    assert server.config == {"type": "config", "language": "fr", "diarize": True, "filename": "audio.webm"}
+    assert server.bytes_received == len(audio)
+    assert server.digest.hexdigest() == hashlib.sha256(audio).hexdigest()
+    assert result["text"] == "Bonjour à tous. Merci d'être là. On commence."
+    assert result["speakers"] == ["SPEAKER_00", "SPEAKER_01"]
+    assert result["duration"] == 6.5
+    # Segments are delivered as they are produced, not all at the end
+    assert len(arrivals) == 3
+    assert arrivals[0] < elapsed - 0.05
+
+
+def test_slow_server_paces_the_upload_without_losing_frames():
+    audio = b"\x01" * (2 * 1024 * 1024)
+
+    async def main():
+        async with FakeWhisperX(SEGMENTS[:1], read_delay=0.002) as server:
+            started = time.perf_counter()
+            await make_service(server, chunk_size=16 * 1024).stream(io.BytesIO(audio))
+            return server, time.perf_counter() - started
+
+    server, elapsed = asyncio.run(main())
+
+    assert server.frames_received == len(audio) // (16 * 1024)
+    assert server.bytes_received == len(audio)
+    # 128 frames at >= 2 ms each: the sender waited for the reader
+    assert elapsed >= 128 * 0.002
+
+
+def test_server_error_and_unreachable_host():
+    async def failing():
+        async with FakeWhisperX([], error="CUDA out of memory") as server:
+            await make_service(server).stream(io.BytesIO(b"audio"))
+
+    with pytest.raises(RuntimeError, match="CUDA out of memory"):
+        asyncio.run(failing())
+
+    service = WynonaService(None, host="127.0.0.1", port=9)
+    with pytest.raises(EngineUnavailable):
+        asyncio.run(service.stream(io.BytesIO(b"audio")))
+
+
+def test_unreachable_host_parks_the_job_until_the_budget_runs_out(tmp_path):
+    queue = QueueManager(db_path=str(tmp_path / "q.sqlite3"), max_attempts=2)
+    job_id = queue.add_job("s1", "wynona")
+    service = WynonaService(None, host="127.0.0.1", port=9)
+
+    async def handler(job):
+        await service.stream(io.BytesIO(b"audio"))
+
+    async def run_once():
+        queue._conn.execute("UPDATE jobs SET available_at = 0")
+        await JobWorker(queue, handler, max_park_seconds=60).run_job(queue.lease("w", 60))
+
+    asyncio.run(run_once())
+    job = queue.get_job(job_id)
+    assert job["status"] == "queued" and job["attempts"] == 0
+    assert job["meta"]["parked_since"]
+
+    queue.update_meta(job_id, parked_since=time.time() - 61)
+    asyncio.run(run_once())
+    assert queue.get_job(job_id)["attempts"] == 1
+    asyncio.run(run_once())
+    job = queue.get_job(job_id)
+    assert job["status"] == "failed" and "parked for" in job["last_error"]
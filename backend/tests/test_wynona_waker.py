@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.job_worker import JobWorker
+from app.services.queue_manager import QueueManager
+from app.services.rate_limiter import EngineUnavailable
+from app.services.wynona_waker import WynonaWaker, build_magic_packet
+
+MAC = "aa:bb:cc:dd:ee:ff"
+
+
+class FakeProber:
+    def __init__(self, status="offline"):
+        self.current = status
+
+    async def status(self, engine):
+        return self.current
+
+    async def probe(self, engine):
+        return self.current
+
+
+def make_waker(tmp_path, **kwargs):
+    queue = QueueManager(db_path=str(tmp_path / "q.sqlite3"))
+    prober = FakeProber()
+    sent = []
+    waker = WynonaWaker(queue, prober, mac=MAC, send=sent.append, **kwargs)
+    return waker, queue, prober, sent
+
+
+def test_magic_packet_layout():
+    packet = build_magic_packet("AA-BB-CC-DD-EE-FF")
+    assert len(packet) == 102
+    assert packet[:6] == b"\xff" * 6
+    assert packet[6:12] == bytes.fromhex("aabbccddeeff")
+    with pytest.raises(ValueError):
+        build_magic_packet("not-a-mac")
+
+
+def test_backlog_triggers_one_wake_and_online_reroutes_auto_jobs(tmp_path):
+    waker, queue, prober, sent = make_waker(tmp_path, backlog_threshold_seconds=1000)
+    queue.add_job("s1", "groq-turbo", meta={"duration_seconds": 600, "routing": {"engine": "groq-turbo"}})
+    pinned = queue.add_job("s2", "groq-large", meta={"duration_seconds": 600})
+
+    asyncio.run(waker.tick())
+    assert sent == []
+
+    auto = queue.add_job("s3", "groq-turbo", meta={"duration_seconds": 600, "routing": {"engine": "groq-turbo"}})
+    asyncio.run(waker.tick())
+    asyncio.run(waker.tick())
+    assert sent == [MAC]
+    assert waker.state == "booting"
+
+    prober.current = "online"
+    asyncio.run(waker.tick())
+    assert waker.state == "online"
+    assert queue.get_job(auto)["engine"] == "wynona"
+    assert queue.get_job(pinned)["engine"] == "groq-large"
+
+
+def test_wynona_jobs_park_while_booting_then_fall_back_to_groq(tmp_path):
+    waker, queue, _, sent = make_waker(tmp_path, boot_deadline_seconds=300, park_retry_seconds=15)
+    job_id = queue.add_job("s1", "wynona", meta={"duration_seconds": 60})
+
+    async def handler(job):
+        await waker.ensure_ready()
+
+    async def main():
+        worker = JobWorker(queue, handler)
+        await worker.run_job(queue.lease("w", 60))
+
+    asyncio.run(main())
+    job = queue.get_job(job_id)
+    assert sent == [MAC]
+    assert job["status"] == "queued"
+    assert job["attempts"] == 0
+    assert "parked" in job["meta"]["throttled"]
+
+    waker.woken_at = time.time() - 301  # boot deadline passed
+    with pytest.raises(EngineUnavailable) as excinfo:
+        asyncio.run(waker.ensure_ready())
+    assert excinfo.value.fallback == "groq-turbo"
+    assert waker.state == "failed"
+
+
+def test_failed_boot_moves_every_parked_job_to_the_fallback_at_once(tmp_path):
+    waker, queue, _, sent = make_waker(tmp_path, boot_deadline_seconds=300, park_retry_seconds=15)
+    parked = [queue.add_job(f"s{i}", "wynona", meta={"duration_seconds": 60}) for i in range(3)]
+    queue._conn.execute("UPDATE jobs SET available_at = ?", (time.time() + 15,))
+    assert waker.eligible_backlog_seconds() == 180
+
+    waker.wake("test")
+    waker.woken_at = time.time() - 301  # boot deadline passed
+    asyncio.run(waker.tick())
+    asyncio.run(waker.tick())
+
+    jobs = [queue.get_job(job_id) for job_id in parked]
+    assert {job["engine"] for job in jobs} == {"groq-turbo"}
+    assert all(job["meta"]["fallback"]["from"] == "wynona" for job in jobs)
+    assert queue.lease("w", 60) is not None  # no longer waiting out the park delay
+    assert waker.eligible_backlog_seconds() == 0